@@ -0,0 +1,38 @@
+"""Layout time versus node count.  Run:  python -m backend.bench.layout_bench"""
+import random
+import statistics
+import time
+
+from backend.services.layout import layout_diagram
+
+SIZES = [10, 25, 50, 100, 200, 400]
+REPEATS = 5
+
+
+def _diagram(layout: str, n: int, rng: random.Random) -> dict:
+    nodes = [{"id": f"n{i}", "label": f"node {i}"} for i in range(n)]
+    if layout == "tree":
+        edges = [{"from": f"n{(i - 1) // 2}", "to": f"n{i}"} for i in range(1, n)]
+    elif layout == "graph":
+        edges = [{"from": f"n{i}", "to": f"n{rng.randrange(n)}"} for i in range(n) for _ in range(2)]
+    else:
+        edges = []
+    return {"layout": layout, "nodes": nodes, "edges": edges}
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'layout':<8}{'nodes':>7}{'median ms':>12}{'max ms':>10}")
+    for layout in ("array", "tree", "graph"):
+        for n in SIZES:
+            diagram = _diagram(layout, n, rng)
+            times = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                layout_diagram(diagram)
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"{layout:<8}{n:>7}{statistics.median(times):>12.2f}{max(times):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Replay realistic whiteboard sessions against backend.main:app with local upstream stand-ins.
+
+Run:  python -m backend.bench.load_test --clients 50 --duration 120 --speed 5
+
+Each simulated client follows the frontend cadence (scaled by --speed): a checkpoint with audio
+at the server-hinted interval (10 s before the first reply) or right after an edit once the hinted
+minimum gap has passed, a debounced /visualize after pseudocode edits, a /coach trigger about once a minute,
+and a WebSocket subscription for the whole session.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import httpx
+import websockets
+
+from backend.bench.upstreams import add_arguments
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHECKPOINT_INTERVAL = 10.0
+CHECKPOINT_MIN_GAP = 5.0
+VISUALIZE_DEBOUNCE = 3.0
+EDIT_INTERVAL = 8.0
+COACH_INTERVAL = 60.0
+
+PSEUDOCODE_LINES = [
+    "seen = {}",
+    "for i, x in enumerate(nums):",
+    "    if target - x in seen:",
+    "        return [seen[target - x], i]",
+    "    seen[x] = i",
+    "# maybe sort first and use two pointers?",
+    "left, right = 0, len(nums) - 1",
+    "while left < right:",
+]
+
+
+def _png(width: int = 64, height: int = 64) -> bytes:
+    raw = b"".join(b"\x00" + os.urandom(width) for _ in range(height))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def _whiteboard(n_shapes: int) -> str:
+    store = {}
+    for i in range(n_shapes):
+        store[f"shape:s{i}"] = {
+            "typeName": "shape", "id": f"shape:s{i}", "type": "geo", "x": i * 70, "y": 100,
+            "props": {"geo": "rectangle", "w": 60, "h": 40, "text": str(i)},
+        }
+    return json.dumps({"store": store, "schema": {}})
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.ws_messages = 0
+
+    def record(self, name: str, seconds: float, ok: bool):
+        self.latencies.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+async def _timed(stats: Stats, name: str, coro):
+    start = time.perf_counter()
+    try:
+        resp = await coro
+        ok = resp.status_code < 400
+    except Exception:
+        ok, resp = False, None
+    stats.record(name, time.perf_counter() - start, ok)
+    return resp
+
+
+async def _ws_reader(url: str, stats: Stats, stop: asyncio.Event):
+    try:
+        async with websockets.connect(url) as ws:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    stats.ws_messages += 1
+                except asyncio.TimeoutError:
+                    continue
+    except Exception:
+        stats.record("ws", 0.0, False)
+
+
+async def run_client(client: httpx.AsyncClient, ws_base: str, stats: Stats, duration: float, speed: float, rng: random.Random):
+    resp = await _timed(stats, "POST /sessions", client.post("/sessions", json={"lc_id": "1"}))
+    if resp is None or resp.status_code >= 400:
+        return
+    session_id = resp.json()["session_id"]
+    stop = asyncio.Event()
+    reader = asyncio.create_task(_ws_reader(f"{ws_base}/ws/{session_id}", stats, stop))
+
+    start = time.monotonic()
+    seq, shapes, lines = 0, 0, 1
+    next_checkpoint = start + rng.uniform(0, CHECKPOINT_INTERVAL) / speed
+    last_checkpoint, min_gap = start, CHECKPOINT_MIN_GAP
+    next_edit = start + rng.uniform(0, EDIT_INTERVAL) / speed
+    next_coach = start + rng.uniform(0.5, 1.5) * COACH_INTERVAL / speed
+    visualize_at = None
+
+    while time.monotonic() - start < duration:
+        now = time.monotonic()
+        if now >= next_edit:
+            lines = min(len(PSEUDOCODE_LINES), lines + 1)
+            shapes += rng.random() < 0.6
+            visualize_at = now + VISUALIZE_DEBOUNCE / speed
+            next_edit = now + rng.expovariate(1 / EDIT_INTERVAL) / speed
+            # The hinted interval only bounds idle time: an edit goes out once the minimum gap has passed
+            next_checkpoint = min(next_checkpoint, max(now, last_checkpoint + min_gap / speed))
+        pseudocode = "\n".join(PSEUDOCODE_LINES[:lines])
+
+        if now >= next_checkpoint:
+            audio = os.urandom(rng.randint(8_000, 40_000))
+            resp = await _timed(stats, "POST /checkpoints", client.post("/checkpoints", data={
+                "session_id": session_id, "sequence_num": str(seq), "pseudocode": pseudocode,
+                "whiteboard_json": _whiteboard(shapes), "labels": "[]",
+            }, files={"audio_blob": ("chunk.webm", audio, "audio/webm")}))
+            ack = resp.json() if resp is not None and resp.status_code < 400 else {}
+            seq += not ack.get("noop", False)
+            # Honour the server's cadence hint like the frontend engine does
+            last_checkpoint = now
+            min_gap = ack.get("min_interval_s", CHECKPOINT_MIN_GAP)
+            next_checkpoint = now + ack.get("next_interval_s", CHECKPOINT_INTERVAL) / speed
+        if visualize_at and now >= visualize_at:
+            await _timed(stats, "POST /visualize", client.post("/visualize", json={"pseudocode": pseudocode, "problem_title": "Two Sum"}))
+            visualize_at = None
+        if now >= next_coach:
+            await _timed(stats, "POST /sessions/{id}/coach", client.post(f"/sessions/{session_id}/coach", data={
+                "trigger_type": rng.choice(["hint", "reflect", "pause"]), "reveal_mode": "false",
+            }, files={
+                "whiteboard_png": ("whiteboard.png", _png(), "image/png"),
+                "audio_blob": ("audio.webm", os.urandom(20_000), "audio/webm"),
+            }))
+            next_coach = now + COACH_INTERVAL / speed
+
+        wake = min(t for t in (next_checkpoint, next_edit, next_coach, visualize_at or float("inf")))
+        await asyncio.sleep(max(0.0, min(wake - time.monotonic(), 0.5)))
+
+    stop.set()
+    await reader
+
+
+def _db_bytes(workdir: str) -> int:
+    """SQLite file plus its write-ahead log (0 when DATABASE_URL points elsewhere)."""
+    paths = [os.path.join(workdir, "sketch2solve.db" + suffix) for suffix in ("", "-wal")]
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _loop_lag(metrics_text: str) -> dict:
+    buckets, total, count = [], 0.0, 0
+    for line in metrics_text.splitlines():
+        if line.startswith("s2s_event_loop_lag_seconds_bucket"):
+            le = line.split('le="')[1].split('"')[0]
+            buckets.append((float("inf") if le == "+Inf" else float(le), int(float(line.rsplit(" ", 1)[1]))))
+        elif line.startswith("s2s_event_loop_lag_seconds_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith("s2s_event_loop_lag_seconds_count"):
+            count = int(float(line.rsplit(" ", 1)[1]))
+    p99 = next((le for le, c in buckets if count and c >= 0.99 * count), 0.0)
+    return {"mean_ms": (total / count * 1000) if count else 0.0, "p99_le_ms": p99 * 1000, "probes": count}
+
+
+async def _wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def main(args):
+    workdir = tempfile.mkdtemp(prefix="s2s-bench-")
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    backend_url = f"http://127.0.0.1:{args.port}"
+    upstream_args = [f"--{k.replace('_', '-')}={v}" for k, v in vars(args).items()
+                     if k.startswith(("openai_", "elevenlabs_", "leetcode_"))]
+    env = {
+        **os.environ,
+        "PYTHONPATH": REPO_ROOT,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{upstream_url}/v1",
+        "ELEVENLABS_API_KEY": "bench",
+        "ELEVENLABS_BASE_URL": upstream_url,
+        "LEETCODE_GRAPHQL_URL": f"{upstream_url}/graphql",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        # The stand-in LeetCode answers must not overwrite the repo's problem cache
+        "PROBLEMS_CACHE_PATH": os.path.join(workdir, "problems_cache.json"),
+    }
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "backend.bench.upstreams", "--port", str(args.upstream_port), *upstream_args],
+                         cwd=REPO_ROOT, env=env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port), "--log-level", "warning"],
+                         cwd=workdir, env=env),
+    ]
+    backend_pid = procs[1].pid
+    try:
+        await _wait_ready(f"{upstream_url}/stats")
+        await _wait_ready(f"{backend_url}/health")
+        rss_before = _rss_bytes(backend_pid)
+        db_before = _db_bytes(workdir)
+
+        stats = Stats()
+        rng = random.Random(args.seed)
+        limits = httpx.Limits(max_connections=args.clients * 2, max_keepalive_connections=args.clients * 2)
+        started = time.perf_counter()
+        async with httpx.AsyncClient(base_url=backend_url, timeout=120.0, limits=limits) as client:
+            await asyncio.gather(*(
+                run_client(client, backend_url.replace("http", "ws"), stats, args.duration, args.speed, random.Random(rng.random()))
+                for _ in range(args.clients)
+            ))
+            elapsed = time.perf_counter() - started
+            lag = _loop_lag((await client.get("/metrics")).text)
+            upstream_calls = (await client.get(f"{upstream_url}/stats")).json()
+
+        rss_after = _rss_bytes(backend_pid)
+        db_after = _db_bytes(workdir)
+
+        total = sum(len(v) for v in stats.latencies.values())
+        print(f"\n{args.clients} clients, {elapsed:.1f}s wall, speed x{args.speed:g}")
+        print(f"{'endpoint':<28}{'count':>7}{'err':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, values in sorted(stats.latencies.items()):
+            print(f"{name:<28}{len(values):>7}{stats.errors.get(name, 0):>6}{len(values) / elapsed:>8.1f}"
+                  f"{_pct(values, 50) * 1000:>9.0f}{_pct(values, 95) * 1000:>9.0f}{_pct(values, 99) * 1000:>9.0f}")
+        print(f"{'total':<28}{total:>7}{sum(stats.errors.values()):>6}{total / elapsed:>8.1f}")
+        print(f"\nWebSocket messages received: {stats.ws_messages}")
+        print(f"Event-loop lag: mean {lag['mean_ms']:.2f} ms, p99 <= {lag['p99_le_ms']:.1f} ms over {lag['probes']} probes")
+        print(f"DB size: {db_before / 1024:.0f} KiB -> {db_after / 1024:.0f} KiB "
+              f"({(db_after - db_before) / max(args.clients, 1) / 1024:.1f} KiB/session)")
+        print(f"Uploads on disk: {_dir_size(env['UPLOAD_DIR']) / 1024 / 1024:.1f} MiB")
+        print(f"Backend RSS: {rss_before / 2**20:.0f} MiB -> {rss_after / 2**20:.0f} MiB "
+              f"({(rss_after - rss_before) / max(args.clients, 1) / 1024:.0f} KiB/session)")
+        print(f"Upstream calls: {upstream_calls}")
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=10)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of simulated activity per client")
+    parser.add_argument("--speed", type=float, default=1.0, help="compress the frontend cadence by this factor")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--upstream-port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the temporary DB and uploads directory")
+    add_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
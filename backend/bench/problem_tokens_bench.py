@@ -0,0 +1,60 @@
+"""Prompt size of the problem catalog before and after ingestion-time preprocessing.
+
+Run:  python -m backend.bench.problem_tokens_bench [--catalog path/to/problems.json]
+
+Counts tokens with tiktoken (o200k_base) when installed, otherwise with a word/punctuation estimate
+that tracks BPE counts closely for HTML-heavy text. The default catalog is backend/data/problems_cache.json.
+"""
+import argparse
+import json
+import re
+import time
+
+from backend.prompts.coach_brain import build_text_context
+from backend.services.problem_text import preprocess_problem
+from backend.services.problems import CACHE_PATH
+
+
+def _counter():
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding("o200k_base")
+        return "tiktoken o200k_base", lambda text: len(enc.encode(text))
+    except ImportError:
+        return "estimate", lambda text: len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def _prompt(problem: dict) -> str:
+    return build_text_context(problem=problem, pseudocode="", labels=[], transcript="", trigger_type="hint", reveal_mode=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", default=CACHE_PATH)
+    args = parser.parse_args()
+
+    with open(args.catalog, encoding="utf-8") as f:
+        catalog = {k: v for k, v in json.load(f).items() if "title" in v}
+    name, count = _counter()
+
+    rows, elapsed = [], 0.0
+    for key, raw in catalog.items():
+        raw = {k: v for k, v in raw.items() if k != "description_html"}
+        start = time.perf_counter()
+        processed = preprocess_problem(raw)
+        elapsed += time.perf_counter() - start
+        rows.append((key, raw["title"], count(raw.get("description", "")), count(processed["description"]),
+                     count(_prompt(raw)), count(_prompt(processed))))
+
+    print(f"tokens counted with {name}; {len(rows)} problems from {args.catalog}\n")
+    print(f"{'#':>5}  {'title':<44}{'desc before':>12}{'after':>7}{'prompt before':>15}{'after':>7}")
+    for key, title, d0, d1, p0, p1 in sorted(rows, key=lambda r: r[4] - r[5], reverse=True):
+        print(f"{key:>5}  {title[:42]:<44}{d0:>12}{d1:>7}{p0:>15}{p1:>7}")
+    d0, d1, p0, p1 = (sum(r[i] for r in rows) for i in range(2, 6))
+    print(f"\n{'total':>5}  {'':<44}{d0:>12}{d1:>7}{p0:>15}{p1:>7}")
+    print(f"description tokens -{(1 - d1 / d0) * 100:.0f}%, static prompt tokens -{(1 - p1 / p0) * 100:.0f}%, "
+          f"preprocessing {elapsed / len(rows) * 1e6:.0f} µs/problem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Problem search on a synthetic 3500-problem catalog: index build/load cost and query latency,
+versus a linear substring scan over titles.
+
+Run:  python -m backend.bench.search_bench --problems 3500 --queries 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend.services.problem_index import ProblemIndex, normalize
+
+WORDS = (
+    "two sum add numbers longest substring without repeating characters median sorted arrays palindromic "
+    "container water valid parentheses merge lists search rotated array combination permutations rotate image "
+    "group anagrams maximum subarray jump game intervals unique paths climbing stairs edit distance minimum "
+    "window subsets word binary tree level order traversal depth path cost stock profit linked cycle lru cache "
+    "min stack number islands course schedule trie kth largest element house robber coin change product "
+    "string matrix graph k closest points frequent elements meeting rooms alien dictionary decode ways"
+).split()
+TAGS = ["Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting", "Greedy", "Depth-First Search",
+        "Binary Search", "Tree", "Breadth-First Search", "Two Pointers", "Stack", "Graph", "Heap (Priority Queue)",
+        "Sliding Window", "Linked List", "Trie", "Backtracking", "Union Find"]
+
+
+def synthetic_catalog(n: int, rng: random.Random) -> list[dict]:
+    problems, seen = [], set()
+    for lc_id in range(1, n + 1):
+        while True:
+            title = " ".join(w.capitalize() for w in rng.sample(WORDS, rng.randint(2, 6)))
+            if title not in seen:
+                seen.add(title)
+                break
+        problems.append({
+            "id": lc_id, "title": title, "slug": normalize(title).replace(" ", "-"),
+            "difficulty": rng.choice(["Easy", "Medium", "Medium", "Hard"]),
+            "tags": rng.sample(TAGS, rng.randint(1, 4)), "paid_only": rng.random() < 0.15,
+        })
+    return problems
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def queries(catalog: list[dict], n: int, rng: random.Random) -> list[tuple[str, str, int]]:
+    out = []
+    for _ in range(n):
+        p = rng.choice(catalog)
+        words = p["title"].lower().split()
+        kind = rng.choice(["prefix", "words", "typo", "number"])
+        if kind == "prefix":
+            text = " ".join(words[:2])
+            q = text[: rng.randint(2, len(text))]
+        elif kind == "words":
+            q = " ".join(rng.sample(words, min(2, len(words))))
+        elif kind == "typo":
+            q = " ".join(_typo(w, rng) for w in words[:3])
+        else:
+            q = str(p["id"])[: rng.randint(1, len(str(p["id"])))]
+        out.append((kind, q, p["id"]))
+    return out
+
+
+def linear_scan(catalog: list[dict], q: str, limit: int = 10) -> list[dict]:
+    needle = normalize(q)
+    return [p for p in catalog if needle in normalize(p["title"]) or needle == str(p["id"])][:limit]
+
+
+def _pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=3500)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    catalog = synthetic_catalog(args.problems, rng)
+    start = time.perf_counter()
+    index = ProblemIndex(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "problem_index.json.gz")
+        index.to_file(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        ProblemIndex.from_file(path)
+        load_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(catalog)} problems: build {build_ms:.0f} ms, file {size / 1024:.0f} KiB, load (read + build) {load_ms:.0f} ms\n")
+
+    workload = queries(catalog, args.queries, rng)
+    # "recall": the problem the query was derived from is among the 10 results
+    print(f"{'query kind':<12}{'n':>6}{'index p50 µs':>14}{'p99 µs':>9}{'scan p50 µs':>13}{'recall (index/scan)':>22}")
+    for kind in ("prefix", "words", "typo", "number", "all"):
+        picked = [(q, target) for k, q, target in workload if kind in ("all", k)]
+        timings, scans, found, scan_found = [], [], 0, 0
+        for q, target in picked:
+            t = time.perf_counter()
+            results = index.search(q)
+            timings.append(time.perf_counter() - t)
+            found += any(p["id"] == target for p in results)
+            t = time.perf_counter()
+            results = linear_scan(catalog, q)
+            scans.append(time.perf_counter() - t)
+            scan_found += any(p["id"] == target for p in results)
+        print(f"{kind:<12}{len(picked):>6}{statistics.median(timings) * 1e6:>14.0f}{_pct(timings, 99) * 1e6:>9.0f}"
+              f"{statistics.median(scans) * 1e6:>13.0f}{f'{found / len(picked):.0%} / {scan_found / len(picked):.0%}':>22}")
+
+
+if __name__ == "__main__":
+    main()
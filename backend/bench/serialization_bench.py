@@ -0,0 +1,96 @@
+"""CPU cost of encoding response bodies and WebSocket broadcasts: FastAPI's default path
+(jsonable_encoder + json.dumps) vs. backend.core.serialization, plus gzip size/cost.
+
+Run:  python -m backend.bench.serialization_bench
+"""
+import gzip
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.core.serialization import FastJSONResponse, GZIP_LEVEL, dumps, orjson
+from backend.services.layout import layout_diagram
+
+WORDS = "so the left pointer moves when the window sum exceeds k and we shrink until it fits again".split()
+
+
+def _transcript(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _analysis(rng: random.Random, i: int, at: datetime) -> dict:
+    return {
+        "analysis_id": f"a{i:04d}", "trigger_type": "pause", "checkpoint_id": f"c{i:04d}",
+        "inferred_approach": {"pattern": "sliding_window", "confidence": 0.82, "evidence": _transcript(rng, 40)},
+        "visual_description": _transcript(rng, 30), "missing_pieces": ["shrink condition", "empty input"],
+        "questions": ["What does the window hold?", "When do you move left?"], "micro_hint": _transcript(rng, 15),
+        "reveal_outline": None, "snapshot_url": f"/uploads/s/snap_{i}.3f2a9c.png", "created_at": at.isoformat(),
+    }
+
+
+def payloads() -> dict[str, dict]:
+    rng = random.Random(0)
+    now = datetime(2026, 1, 1)
+    problem = {"title": "Minimum Window Substring", "description": _transcript(rng, 400),
+               "constraints": ["1 <= s.length <= 10^5"] * 4, "examples": [{"input": "s", "output": "t"}] * 3,
+               "topicTags": ["Hash Table", "String", "Sliding Window"]}
+    graph = {"layout": "graph", "nodes": [{"id": f"n{i}", "label": f"node {i}"} for i in range(150)],
+             "edges": [{"from": f"n{i}", "to": f"n{rng.randrange(150)}"} for i in range(150) for _ in range(2)]}
+    return {
+        "get_session (60 kB transcript)": {
+            "session_id": "s", "problem": problem, "status": "active",
+            "full_transcript": _transcript(rng, 10000), "checkpoint_count": 180, "analysis_count": 24,
+        },
+        "get_card": {
+            "id": "m", "session_id": "s", "final_pattern": "sliding_window", "key_invariants": ["window valid"] * 6,
+            "approach_evolution": [{"pattern": "brute_force", "confidence": 0.4, "count": 3}] * 12,
+            "unanswered_questions": ["?"] * 4, "full_transcript": _transcript(rng, 10000), "created_at": now,
+        },
+        "visualize (150-node graph)": {"shapes": layout_diagram(graph)},
+        "hydrate (20 analyses)": {
+            "session_id": "s", "problem": problem, "status": "active",
+            "analyses": [_analysis(rng, i, now + timedelta(minutes=i)) for i in range(20)],
+            "transcript": [{"sequence_num": i, "text": _transcript(rng, 40)} for i in range(50)],
+        },
+        "ws coach_response": {"type": "coach_response", **_analysis(rng, 0, now), "tts_url": None},
+    }
+
+
+def _cpu_us(fn, min_time: float = 0.3) -> float:
+    n, elapsed = 0, 0.0
+    start = time.process_time()
+    while elapsed < min_time:
+        for _ in range(20):
+            fn()
+        n += 20
+        elapsed = time.process_time() - start
+    return elapsed / n * 1e6
+
+
+def main():
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}, gzip level {GZIP_LEVEL}\n")
+    print(f"{'payload':<32}{'bytes':>9}{'default µs':>12}{'fast µs':>10}{'speedup':>9}{'gzip bytes':>12}{'gzip µs':>9}")
+    for name, body in payloads().items():
+        encoded = FastJSONResponse(body).body
+        default = _cpu_us(lambda: JSONResponse(jsonable_encoder(body)).body)
+        fast = _cpu_us(lambda: FastJSONResponse(body).body)
+        compressed = gzip.compress(encoded, compresslevel=GZIP_LEVEL)
+        gz = _cpu_us(lambda: gzip.compress(encoded, compresslevel=GZIP_LEVEL))
+        print(f"{name:<32}{len(encoded):>9}{default:>12.0f}{fast:>10.0f}{default / fast:>8.1f}x"
+              f"{len(compressed):>12}{gz:>9.0f}")
+
+    import json
+
+    message = payloads()["ws coach_response"]
+    print(f"\n{'broadcast to N tabs':<32}{'per-subscriber µs':>19}{'encode-once µs':>16}")
+    for subscribers in (1, 2, 4, 8):
+        old = _cpu_us(lambda: [json.dumps(message) for _ in range(subscribers)])
+        new = _cpu_us(lambda: dumps(message).decode())
+        print(f"{subscribers:<32}{old:>19.1f}{new:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Cold-start cost: import time of backend.main, time to live/ready, and first vs. warm request latency.
+
+Run:  python -m backend.bench.startup_bench --runs 5
+
+Each run starts a fresh interpreter, so nothing is cached between runs except the OS page cache.
+OPENAI_API_KEY is set to a dummy value; the measured requests never reach OpenAI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Matches the local BFS template, so /visualize never calls the LLM
+PSEUDOCODE = """queue = deque([start])
+visited = {start}
+while queue:
+    node = queue.popleft()
+    for nxt in graph[node]:
+        if nxt not in visited:
+            visited.add(nxt)
+            queue.append(nxt)"""
+
+
+def _env(workdir: str) -> dict:
+    return {
+        **os.environ, "PYTHONPATH": REPO_ROOT, "OPENAI_API_KEY": "bench",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"), "ANALYTICS_DIR": os.path.join(workdir, "analytics"),
+    }
+
+
+def import_time(workdir: str) -> float:
+    code = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_env(workdir), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _poll(client: httpx.Client, path: str, start: float, accept=(200,), timeout: float = 60.0) -> float | None:
+    while time.perf_counter() - start < timeout:
+        try:
+            if client.get(path).status_code in accept:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def serve_timings(workdir: str, port: int) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(workdir),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30.0) as client:
+            live = _poll(client, "/health", start)
+            ready = _poll(client, "/ready", start, accept=(200, 404))  # 404: tree without a readiness probe
+            requests = []
+            for _ in range(3):
+                t = time.perf_counter()
+                sid = client.post("/sessions", json={"problem_text": "Shortest path in a grid"}).json()["session_id"]
+                client.post("/visualize", json={"pseudocode": PSEUDOCODE, "problem_title": "Grid"})
+                client.get(f"/sessions/{sid}/hydrate")
+                requests.append(time.perf_counter() - t)
+        return {"live": live, "ready": ready, "first": requests[0], "warm": statistics.median(requests[1:])}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8950)
+    args = parser.parse_args()
+
+    imports, serves = [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="s2s-startup-") as workdir:
+            imports.append(import_time(workdir))
+        with tempfile.TemporaryDirectory(prefix="s2s-startup-") as workdir:
+            serves.append(serve_timings(workdir, args.port))
+
+    def ms(values):
+        values = [v for v in values if v is not None]
+        return f"{statistics.median(values) * 1000:8.0f} ms (min {min(values) * 1000:.0f})" if values else "     n/a"
+
+    print(f"import backend.main      {ms(imports)}")
+    print(f"process start -> live    {ms([s['live'] for s in serves])}")
+    print(f"process start -> ready   {ms([s['ready'] for s in serves])}")
+    print(f"first request (3 calls)  {ms([s['first'] for s in serves])}")
+    print(f"warm request (3 calls)   {ms([s['warm'] for s in serves])}")
+
+
+if __name__ == "__main__":
+    main()
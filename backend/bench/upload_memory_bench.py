@@ -0,0 +1,147 @@
+"""Per-request memory of upload handling: the old buffered path (`await upload.read()`, then copies
+for hashing, decoding, base64 and storage) vs. streaming from the parser's spool file.
+
+Reports Python-heap peak (tracemalloc, which also sees numpy buffers) while handling one upload,
+and what is still held when the upstream call would start. Both paths share the current audio decoder,
+so the audio difference is only what buffering the upload itself costs.
+
+Run:  python -m backend.bench.upload_memory_bench
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="s2s-upload-bench-"))
+
+from starlette.datastructures import Headers, UploadFile  # noqa: E402
+
+from backend.services.audio import load_av, preprocess_audio, SAMPLE_RATE  # noqa: E402
+from backend.services.semantic_cache import board_hash  # noqa: E402
+from backend.services.storage import (  # noqa: E402
+    UPLOAD_SPOOL_BYTES, MAX_AUDIO_UPLOAD_BYTES, MAX_IMAGE_UPLOAD_BYTES, receive_upload, save_blob, save_file,
+)
+
+
+def _speech_like(seconds: float, rate: int = 48000) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    # Half-second tone bursts over a noise floor, so VAD keeps about half of it
+    bursts = (np.sin(2 * np.pi * 0.8 * t) > 0).astype(np.float32)
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * bursts
+    return (tone + 0.003 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def webm_audio(seconds: float) -> bytes:
+    av = load_av()
+    buf = io.BytesIO()
+    with av.open(buf, mode="w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        samples = (_speech_like(seconds) * 32767).astype(np.int16).reshape(1, -1)
+        frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+        frame.sample_rate = 48000
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+def wav_audio(seconds: float) -> bytes:
+    import wave
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes((_speech_like(seconds, SAMPLE_RATE) * 32767).astype(np.int16).tobytes())
+    return buf.getvalue()
+
+
+def png_image(width: int, height: int, noise: float) -> bytes:
+    from PIL import Image
+
+    rng = np.random.default_rng(1)
+    px = np.full((height, width, 3), 250, dtype=np.uint8)
+    mask = rng.random((height, width)) < noise
+    px[mask] = rng.integers(0, 255, (int(mask.sum()), 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(px).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def spooled(data: bytes, filename: str) -> UploadFile:
+    """What the multipart parser hands the route: the part in a SpooledTemporaryFile."""
+    f = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    f.write(data)
+    f.seek(0)
+    return UploadFile(f, size=len(data), filename=filename, headers=Headers({}))
+
+
+async def checkpoint_buffered(upload: UploadFile):
+    raw = await upload.read()
+    hashlib.sha1(raw).hexdigest()
+    out, _ = await preprocess_audio(raw)
+    return out, raw
+
+
+async def checkpoint_streaming(upload: UploadFile):
+    blob = await receive_upload(upload, MAX_AUDIO_UPLOAD_BYTES)
+    out, _ = await preprocess_audio(blob)
+    return out, None
+
+
+async def coach_png_buffered(upload: UploadFile):
+    png = await upload.read()
+    await save_file("bench", "snap.png", png)
+    board_hash(png)
+    b64 = base64.b64encode(png).decode("utf-8")
+    return f"data:image/png;base64,{b64}", (png, b64)
+
+
+async def coach_png_streaming(upload: UploadFile):
+    blob = await receive_upload(upload, MAX_IMAGE_UPLOAD_BYTES)
+    await save_blob("bench", "snap.png", blob)
+    board_hash(blob)
+    return blob.data_url("image/png"), None
+
+
+def measure(handler, data: bytes, filename: str) -> tuple[int, int]:
+    upload = spooled(data, filename)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = asyncio.run(handler(upload))
+    # Everything the handler returns stays referenced for the rest of the request (the LLM / STT call)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    upload.file.close()
+    return peak - base, held - base
+
+
+def main():
+    cases = [
+        ("webm 60 s", "audio.webm", webm_audio(60), checkpoint_buffered, checkpoint_streaming),
+        ("wav 60 s", "audio.wav", wav_audio(60), checkpoint_buffered, checkpoint_streaming),
+        ("png whiteboard", "board.png", png_image(1600, 1000, 0.02), coach_png_buffered, coach_png_streaming),
+        ("png noisy 1600x1000", "board.png", png_image(1600, 1000, 0.5), coach_png_buffered, coach_png_streaming),
+    ]
+    print(f"spool threshold {UPLOAD_SPOOL_BYTES / 1024:.0f} KiB\n")
+    print(f"{'upload':<22}{'size KiB':>10}{'peak buffered':>15}{'peak streaming':>16}{'held buffered':>15}{'held streaming':>16}")
+    for name, filename, data, buffered, streaming in cases:
+        measure(streaming, data, filename)  # warm imports and codec state
+        peak_b, held_b = measure(buffered, data, filename)
+        peak_s, held_s = measure(streaming, data, filename)
+        print(f"{name:<22}{len(data) / 1024:>10.0f}{peak_b / 1024:>12.0f} KiB{peak_s / 1024:>13.0f} KiB"
+              f"{held_b / 1024:>12.0f} KiB{held_s / 1024:>13.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
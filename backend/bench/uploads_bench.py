@@ -0,0 +1,138 @@
+"""Throughput of /uploads serving: the old StaticFiles mount vs. backend.routers.uploads.
+
+Run:  python -m backend.bench.uploads_bench --concurrency 32 --duration 10
+
+Both apps are served by uvicorn in a subprocess over the same temporary UPLOAD_DIR. The request mix
+mirrors reconnecting clients: full fetches of snapshots and hint MP3s, conditional re-fetches
+(If-None-Match) and audio seeks (Range).
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SESSION = "bench-session"
+FILES = {"snap_a.png": 180_000, "hint_a.mp3": 40_000, "audio.ogg": 1_500_000}
+
+
+def static_app():
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+    from backend.services.storage import UPLOAD_DIR
+
+    app = FastAPI()
+    app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+    return app
+
+
+def router_app():
+    from fastapi import FastAPI
+    from backend.routers import uploads
+
+    app = FastAPI()
+    app.include_router(uploads.router)
+    return app
+
+
+def _populate(upload_dir: str) -> list[str]:
+    from backend.services.storage import content_addressed_name
+
+    os.makedirs(os.path.join(upload_dir, SESSION), exist_ok=True)
+    names = []
+    for name, size in FILES.items():
+        data = os.urandom(size)
+        for n in (name, content_addressed_name(name, data)):
+            with open(os.path.join(upload_dir, SESSION, n), "wb") as f:
+                f.write(data)
+        names.append(content_addressed_name(name, data))
+    return names
+
+
+async def _worker(client: httpx.AsyncClient, names: list[str], deadline: float, rng: random.Random, out: dict):
+    etags: dict[str, str] = {}
+    while time.perf_counter() < deadline:
+        name = rng.choice(names)
+        url = f"/uploads/{SESSION}/{name}"
+        kind = rng.choices(["full", "conditional", "range"], weights=[4, 4, 2])[0]
+        headers = {}
+        if kind == "conditional" and url in etags:
+            headers["If-None-Match"] = etags[url]
+        elif kind == "range":
+            size = FILES[name.split(".")[0] + "." + name.rsplit(".", 1)[1]]
+            span = min(65536, size // 2)
+            start = rng.randrange(0, size - span)
+            headers["Range"] = f"bytes={start}-{start + span - 1}"
+        t0 = time.perf_counter()
+        resp = await client.get(url, headers=headers)
+        out["latencies"].append(time.perf_counter() - t0)
+        out["bytes"] += len(resp.content)
+        out["status"][resp.status_code] = out["status"].get(resp.status_code, 0) + 1
+        if "etag" in resp.headers:
+            etags[url] = resp.headers["etag"]
+
+
+async def _run(port: int, names: list[str], concurrency: int, duration: float) -> dict:
+    out = {"latencies": [], "bytes": 0, "status": {}}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+        for _ in range(100):
+            try:
+                await client.get(f"/uploads/{SESSION}/{names[0]}")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _worker(client, names, deadline, random.Random(i), out) for i in range(concurrency)
+        ))
+    return out
+
+
+def _serve(target: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"backend.bench.uploads_bench:{target}", "--factory",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp(prefix="s2s-uploads-")
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "UPLOAD_DIR": upload_dir}
+    os.environ["UPLOAD_DIR"] = upload_dir
+    hashed = _populate(upload_dir)
+    plain = [n.split(".")[0] + "." + n.rsplit(".", 1)[1] for n in hashed]
+
+    print(f"{'server':<22}{'req/s':>9}{'MB/s':>9}{'p50 ms':>9}{'p99 ms':>9}  status")
+    try:
+        for label, target, names in (("StaticFiles mount", "static_app", plain), ("uploads router", "router_app", hashed)):
+            proc = _serve(target, args.port, env)
+            try:
+                out = asyncio.run(_run(args.port, names, args.concurrency, args.duration))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+            lat = sorted(out["latencies"])
+            n = len(lat)
+            print(f"{label:<22}{n / args.duration:>9.0f}{out['bytes'] / args.duration / 1e6:>9.1f}"
+                  f"{lat[n // 2] * 1000:>9.2f}{lat[min(n - 1, int(n * 0.99))] * 1000:>9.2f}  {out['status']}")
+    finally:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
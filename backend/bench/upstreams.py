@@ -0,0 +1,127 @@
+"""Local stand-ins for OpenAI, ElevenLabs and LeetCode with configurable latency and error rates.
+
+Run:  python -m backend.bench.upstreams --port 9100 --openai-latency 1.5 --openai-error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+COACH_JSON = {
+    "inferred_approach": {"pattern": "Hash Map", "confidence": 0.8, "evidence": "stand-in response"},
+    "missing_pieces": ["handle duplicates"],
+    "questions": ["What do you store as the key?"],
+    "micro_hint": "Think about what you've already seen.",
+    "reveal_outline": None,
+    "generated_pseudocode": "",
+    "visual_description": "stand-in",
+    # Visualizer topology, so the same body satisfies both callers
+    "layout": "flow",
+    "nodes": [{"id": "a", "label": "loop"}, {"id": "b", "label": "lookup"}],
+    "edges": [{"from": "a", "to": "b"}],
+    # Verifier fields
+    "status": "pass",
+    "summary": "stand-in",
+    "results": [],
+    "feedback": "",
+}
+
+QUESTION = {
+    "questionFrontendId": "1",
+    "title": "Two Sum",
+    "titleSlug": "two-sum",
+    "content": "<p>Given an array of integers <code>nums</code> and an integer <code>target</code>...</p>",
+    "difficulty": "Easy",
+    "topicTags": [{"name": "Array"}, {"name": "Hash Table"}],
+    "exampleTestcaseList": ["[2,7,11,15]\n9"],
+}
+
+
+class Upstream:
+    def __init__(self, name: str, median: float, sigma: float, error_rate: float):
+        self.name, self.median, self.sigma, self.error_rate = name, median, sigma, error_rate
+        self.calls = 0
+
+    async def delay(self) -> bool:
+        """Sleep for a lognormal latency; return False if this call should fail."""
+        self.calls += 1
+        if self.median > 0:
+            await asyncio.sleep(random.lognormvariate(0, self.sigma) * self.median)
+        return random.random() >= self.error_rate
+
+
+def build_app(openai: Upstream, elevenlabs: Upstream, leetcode: Upstream) -> FastAPI:
+    app = FastAPI(title="Sketch2Solve upstream stand-ins")
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        if not await openai.delay():
+            return JSONResponse({"error": {"message": "stand-in failure", "type": "server_error"}}, status_code=500)
+        content = json.dumps(COACH_JSON)
+        return {
+            "id": f"chatcmpl-{openai.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(json.dumps(body)) + len(content)) // 4},
+        }
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcribe(request: Request):
+        await request.body()
+        if not await openai.delay():
+            return JSONResponse({"error": {"message": "stand-in failure", "type": "server_error"}}, status_code=500)
+        return {"text": "I think I can use a hash map to remember what I've seen"}
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def tts(voice_id: str, request: Request):
+        await request.body()
+        if not await elevenlabs.delay():
+            return Response(status_code=500)
+        return Response(content=b"\xff\xfb" + b"\x00" * 16_000, media_type="audio/mpeg")
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        body = await request.json()
+        if not await leetcode.delay():
+            return Response(status_code=503)
+        if "questionData" in body.get("query", ""):
+            return {"data": {"question": QUESTION}}
+        return {"data": {"problemsetQuestionList": {"questions": [QUESTION]}}}
+
+    @app.get("/stats")
+    def stats():
+        return {u.name: u.calls for u in (openai, elevenlabs, leetcode)}
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    for name, latency in (("openai", 1.5), ("elevenlabs", 0.4), ("leetcode", 0.2)):
+        parser.add_argument(f"--{name}-latency", type=float, default=latency, help="median seconds")
+        parser.add_argument(f"--{name}-sigma", type=float, default=0.5, help="lognormal sigma")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+
+
+def upstreams_from_args(args) -> tuple[Upstream, Upstream, Upstream]:
+    return tuple(
+        Upstream(name, getattr(args, f"{name}_latency"), getattr(args, f"{name}_sigma"), getattr(args, f"{name}_error_rate"))
+        for name in ("openai", "elevenlabs", "leetcode")
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(build_app(*upstreams_from_args(args)), host="127.0.0.1", port=args.port, log_level="warning")
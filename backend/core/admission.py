@@ -0,0 +1,152 @@
+"""Admission control for the coach pipeline: under upstream or CPU pressure, step down through degraded
+modes instead of letting every request queue until it times out.
+
+Pressure is the worst of four ratios (1.0 = at capacity): coach requests in flight, LLM calls waiting
+for an upstream slot, recent upstream latency against the coach hedge deadline, and event-loop lag.
+Levels rise as soon as pressure crosses their threshold and fall one step at a time after a cooldown.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from backend.core import metrics
+from backend.core.hedge import SLOS
+
+NORMAL, NO_TTS, NO_TRANSCRIPTION, SMALL_MODEL, CACHED_ONLY, REJECT_AUTO = range(6)
+MODES = ("normal", "no_tts", "no_transcription", "small_model", "cached_only", "reject_auto")
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") not in ("0", "false", "no")
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_UPSTREAM_CONCURRENCY = int(os.getenv("ADMISSION_UPSTREAM_CONCURRENCY", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_LAG_TARGET_S = float(os.getenv("ADMISSION_LAG_TARGET_S", "0.2"))
+ADMISSION_COOLDOWN_S = float(os.getenv("ADMISSION_COOLDOWN_S", "15"))
+# Pressure at which each level from NO_TTS to REJECT_AUTO kicks in
+LEVEL_THRESHOLDS = tuple(
+    float(t) for t in os.getenv("ADMISSION_THRESHOLDS", "0.6,0.75,0.9,1.0,1.25").split(",")
+)
+LATENCY_WINDOW_S = 30.0
+LAG_SAMPLES = 3
+STEP_DOWN_MARGIN = 0.8
+EVALUATE_INTERVAL_S = 1.0
+
+
+class AdmissionController:
+    def __init__(self):
+        self.level = NORMAL
+        self.in_flight = 0
+        self.queued = 0
+        self._changed_at = time.monotonic()
+        self._latencies: deque[tuple[float, float]] = deque(maxlen=256)
+        self._lags: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self._lock = threading.Lock()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._listeners: list = []
+        self.stats = {"admitted": 0, "rejected": 0, "degraded": 0, "transitions": 0}
+
+    @property
+    def mode(self) -> str:
+        return MODES[self.level]
+
+    def on_change(self, listener):
+        """`listener(level)` is called from the event loop whenever the mode changes."""
+        self._listeners.append(listener)
+
+    def _upstream_latency(self) -> float:
+        cutoff = time.monotonic() - LATENCY_WINDOW_S
+        recent = [seconds for at, seconds in self._latencies if at >= cutoff]
+        # No recent calls (e.g. while serving cached responses) reads as healthy, so levels can recover
+        return sum(recent) / len(recent) if recent else 0.0
+
+    def pressure(self) -> dict:
+        return {
+            "in_flight": self.in_flight / ADMISSION_MAX_IN_FLIGHT,
+            "queue": self.queued / ADMISSION_MAX_QUEUE,
+            "upstream_latency": self._upstream_latency() / SLOS["coach"].deadline,
+            # Sustained lag only: a single stall (warm-up, a GC pause) shouldn't degrade anyone
+            "event_loop_lag": (min(self._lags) if len(self._lags) == LAG_SAMPLES else 0.0) / ADMISSION_LAG_TARGET_S,
+        }
+
+    def evaluate(self) -> int:
+        if not ADMISSION_ENABLED:
+            return self.level
+        pressure = max(self.pressure().values())
+        target = sum(pressure >= t for t in LEVEL_THRESHOLDS)
+        now = time.monotonic()
+        with self._lock:
+            previous = self.level
+            if target > self.level:
+                self.level = target
+            elif (
+                self.level > NORMAL
+                and pressure < LEVEL_THRESHOLDS[self.level - 1] * STEP_DOWN_MARGIN
+                and now - self._changed_at >= ADMISSION_COOLDOWN_S
+            ):
+                self.level -= 1
+            if self.level == previous:
+                return self.level
+            self._changed_at = now
+            self.stats["transitions"] += 1
+        print(f"[Admission] {MODES[previous]} -> {self.mode} (pressure {pressure:.2f})")
+        for listener in self._listeners:
+            listener(self.level)
+        return self.level
+
+    def admit(self, auto: bool) -> bool:
+        """False when an automatic trigger should be turned away right now."""
+        level = self.evaluate()
+        if auto and level >= REJECT_AUTO:
+            self.stats["rejected"] += 1
+            return False
+        self.stats["admitted"] += 1
+        self.stats["degraded"] += level > NORMAL
+        return True
+
+    @contextmanager
+    def track(self):
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def upstream_slot(self):
+        """Bounds concurrent LLM calls; waiters are the queue depth, and each call's duration is recorded."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(ADMISSION_UPSTREAM_CONCURRENCY)
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+            self._latencies.append((time.monotonic(), time.perf_counter() - start))
+
+    async def monitor(self, interval: float = EVALUATE_INTERVAL_S):
+        """Re-evaluate periodically so modes also recover while no requests arrive."""
+        while True:
+            await asyncio.sleep(interval)
+            self._lags.append(metrics.last_event_loop_lag)
+            self.evaluate()
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": self.mode,
+            "level": self.level,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "upstream_latency_ms": round(self._upstream_latency() * 1000, 1),
+            "pressure": {k: round(v, 3) for k, v in self.pressure().items()},
+            **self.stats,
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,44 @@
+import aiofiles
+
+READ_CHUNK = 64 * 1024
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match: `*` or any listed entity tag, compared weakly (a `W/` prefix is ignored)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in (t.strip().removeprefix("W/") for t in header.split(","))
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Single `bytes=a-b` / `bytes=a-` / `bytes=-n` range -> inclusive (start, end), or None if absent/unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header or size == 0:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first == "":
+            n = int(last)
+            if n <= 0:
+                return None
+            return max(0, size - n), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+async def iter_file(path: str, start: int, length: int, chunk_size: int = READ_CHUNK):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = await f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
@@ -0,0 +1,23 @@
+"""Advisory file locks that also exclude other worker processes and hosts sharing the directory."""
+import fcntl
+import os
+from contextlib import contextmanager
+
+
+class LockHeld(RuntimeError):
+    """Raised by a non-blocking `file_lock` when another holder has it."""
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Exclusive flock on `path` (created if missing) for the duration of the block."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise LockHeld(path) from None
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+LATENCY_WINDOW = 1024
+
+
+@dataclass
+class Slo:
+    deadline: float  # seconds before the hedge request is fired
+    timeout: float   # hard cap for the whole call, hedge included
+
+
+SLOS: Dict[str, Slo] = {
+    "coach": Slo(
+        deadline=float(os.getenv("COACH_DEADLINE_S", "10")),
+        timeout=float(os.getenv("COACH_TIMEOUT_S", "25")),
+    ),
+    "visualize": Slo(
+        deadline=float(os.getenv("VISUALIZE_DEADLINE_S", "4")),
+        timeout=float(os.getenv("VISUALIZE_TIMEOUT_S", "10")),
+    ),
+}
+
+
+class LatencyStats:
+    """Rolling per-endpoint latency samples plus hedge counters."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _counter(self, endpoint: str) -> Dict[str, int]:
+        return self._counters.setdefault(
+            endpoint, {"requests": 0, "hedged": 0, "hedge_wins": 0, "failures": 0}
+        )
+
+    def record(self, endpoint: str, seconds: float, hedged: bool, winner: str | None):
+        self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+        c = self._counter(endpoint)
+        c["requests"] += 1
+        if hedged:
+            c["hedged"] += 1
+        if winner == "hedge":
+            c["hedge_wins"] += 1
+        if winner is None:
+            c["failures"] += 1
+
+    @staticmethod
+    def _percentile(ordered: list[float], p: float) -> float:
+        if not ordered:
+            return 0.0
+        idx = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[idx]
+
+    def snapshot(self) -> dict:
+        out = {}
+        for endpoint, c in self._counters.items():
+            ordered = sorted(self._samples.get(endpoint, ()))
+            out[endpoint] = {
+                **c,
+                "p50_ms": round(self._percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(self._percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(self._percentile(ordered, 99) * 1000, 1),
+                "hedge_win_rate": round(c["hedge_wins"] / c["hedged"], 3) if c["hedged"] else 0.0,
+            }
+        return out
+
+
+latency_stats = LatencyStats()
+
+
+async def _cancel(tasks):
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hedged_call(
+    endpoint: str,
+    primary: Callable[[], Awaitable[Any]],
+    hedge: Callable[[], Awaitable[Any]] | None = None,
+) -> tuple[Any, str]:
+    """Run `primary`; if it misses the endpoint deadline (or fails), race it against `hedge`.
+
+    Returns (result, winner) where winner is "primary" or "hedge". The losing request is
+    cancelled. Raises the last error (or asyncio.TimeoutError) if nothing succeeds in time.
+    """
+    slo = SLOS[endpoint]
+    start = time.perf_counter()
+    loop_deadline = start + slo.timeout
+    tasks: Dict[asyncio.Task, str] = {asyncio.ensure_future(primary()): "primary"}
+    hedged = False
+    last_error: BaseException | None = None
+
+    try:
+        while tasks:
+            if not hedged and hedge is not None:
+                wait_for = max(0.0, min(slo.deadline - (time.perf_counter() - start),
+                                        loop_deadline - time.perf_counter()))
+            else:
+                wait_for = max(0.0, loop_deadline - time.perf_counter())
+
+            done, _ = await asyncio.wait(tasks.keys(), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+            for t in done:
+                name = tasks.pop(t)
+                if t.exception() is None:
+                    latency_stats.record(endpoint, time.perf_counter() - start, hedged, name)
+                    return t.result(), name
+                last_error = t.exception()
+                print(f"[Hedge] {endpoint} {name} failed: {last_error}")
+
+            if time.perf_counter() >= loop_deadline:
+                break
+            # Deadline missed or primary failed early: fire the hedge once.
+            if not hedged and hedge is not None:
+                hedged = True
+                tasks[asyncio.ensure_future(hedge())] = "hedge"
+    finally:
+        await _cancel(list(tasks.keys()))
+
+    latency_stats.record(endpoint, time.perf_counter() - start, hedged, None)
+    raise last_error or asyncio.TimeoutError(f"{endpoint} exceeded {slo.timeout}s")
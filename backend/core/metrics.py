@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key: LabelKey, extra: dict | None = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help = name, help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            out.append(f"{self.name}{_fmt_labels(key)} {value:g}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, list] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            idx = bisect_left(self.buckets, value)
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                out.append(f"{self.name}_bucket{_fmt_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+            out.append(f"{self.name}_bucket{_fmt_labels(key, {'le': '+Inf'})} {series[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(key)} {series[-2]:g}")
+            out.append(f"{self.name}_count{_fmt_labels(key)} {series[-1]}")
+        return out
+
+
+stage_duration = Histogram("s2s_stage_duration_seconds", "Latency per pipeline stage (route, db, storage, openai, elevenlabs).")
+llm_tokens = Counter("s2s_llm_tokens_total", "Tokens consumed by upstream LLM calls.")
+payload_bytes = Counter("s2s_payload_bytes_total", "Bytes sent to / received from each stage.")
+stage_errors = Counter("s2s_stage_errors_total", "Spans that ended with an exception.")
+event_loop_lag = Histogram(
+    "s2s_event_loop_lag_seconds", "How late the event loop woke up a periodic probe.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+REGISTRY = [stage_duration, llm_tokens, payload_bytes, stage_errors, event_loop_lag]
+
+EVENT_LOOP_PROBE_INTERVAL = 0.25
+last_event_loop_lag = 0.0
+
+
+async def monitor_event_loop(interval: float = EVENT_LOOP_PROBE_INTERVAL):
+    """Sleep `interval` repeatedly and record how much later than requested the loop resumed us."""
+    global last_event_loop_lag
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        last_event_loop_lag = max(0.0, time.perf_counter() - start - interval)
+        event_loop_lag.observe(last_event_loop_lag)
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,16 @@
+"""The OpenAI client shared by every service that calls the API, so they share one connection pool."""
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+_client: "AsyncOpenAI | None" = None
+
+
+def get_client() -> "AsyncOpenAI":
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI  # deferred: importing openai costs ~0.4 s at startup
+        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    return _client
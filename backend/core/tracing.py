@@ -0,0 +1,140 @@
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.core.metrics import stage_duration, stage_errors, payload_bytes, llm_tokens
+
+# TRACE_EXPORT: "none" (default), "console" or "file" (JSON lines at TRACE_FILE).
+# Spans use OpenTelemetry ids and OTLP/JSON field names so files can be replayed into a collector.
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+_file_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("name", "stage", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "status")
+
+    def __init__(self, name: str, stage: str, parent: "Span | None", trace_id: str | None = None, parent_id: str | None = None):
+        self.name = name
+        self.stage = stage
+        self.trace_id = parent.trace_id if parent else (trace_id or secrets.token_hex(16))
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else parent_id
+        self.attributes: dict = {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = "ok"
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "status": {"code": "STATUS_CODE_ERROR" if self.status == "error" else "STATUS_CODE_OK"},
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()],
+        }
+
+
+def _export(sp: Span):
+    if TRACE_EXPORT == "console":
+        print(f"[Trace] {sp.name} {(sp.end_ns - sp.start_ns) / 1e6:.1f}ms {sp.attributes}", file=sys.stderr)
+    elif TRACE_EXPORT == "file":
+        line = json.dumps(sp.to_otlp())
+        with _file_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def parse_traceparent(header: str | None) -> tuple[str | None, str | None]:
+    """W3C traceparent: 00-<trace-id>-<parent-id>-<flags>."""
+    parts = (header or "").split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None, None
+
+
+def current_traceparent() -> str | None:
+    sp = _current.get()
+    return f"00-{sp.trace_id}-{sp.span_id}-01" if sp else None
+
+
+@contextmanager
+def span(name: str, stage: str | None = None, traceparent: str | None = None, **attributes):
+    """Time a block as a span and record it in the per-stage latency histogram."""
+    parent = _current.get()
+    trace_id, parent_id = parse_traceparent(traceparent) if parent is None else (None, None)
+    sp = Span(name, stage or name, parent, trace_id, parent_id)
+    sp.attributes.update(attributes)
+    token = _current.set(sp)
+    start = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status = "error"
+        sp.set("error", type(e).__name__)
+        stage_errors.inc(stage=sp.stage, error=type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        sp.end_ns = time.time_ns()
+        stage_duration.observe(time.perf_counter() - start, stage=sp.stage)
+        if TRACE_EXPORT != "none":
+            _export(sp)
+
+
+def record_span(name: str, stage: str, start_ns: int, duration_s: float, **attributes):
+    """Record an already-finished operation (e.g. from SQLAlchemy cursor events) as a child span."""
+    sp = Span(name, stage, _current.get())
+    sp.attributes.update(attributes)
+    sp.start_ns = start_ns
+    sp.end_ns = start_ns + int(duration_s * 1e9)
+    stage_duration.observe(duration_s, stage=stage)
+    if TRACE_EXPORT != "none":
+        _export(sp)
+
+
+def record_payload(sp: Span, stage: str, sent: int = 0, received: int = 0):
+    if sent:
+        sp.set("payload.sent_bytes", sent)
+        payload_bytes.inc(sent, stage=stage, direction="sent")
+    if received:
+        sp.set("payload.received_bytes", received)
+        payload_bytes.inc(received, stage=stage, direction="received")
+
+
+def record_usage(sp: Span, model: str, usage):
+    """Attach token usage from an OpenAI response (`response.usage`) to the span and counters."""
+    if usage is None:
+        return
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    sp.set("llm.model", model)
+    sp.set("llm.prompt_tokens", prompt)
+    sp.set("llm.completion_tokens", completion)
+    llm_tokens.inc(prompt, model=model, kind="prompt")
+    llm_tokens.inc(completion, model=model, kind="completion")
+
+
+def messages_size(messages: list) -> int:
+    """Approximate request payload size of a chat `messages` list without serialising it."""
+    total = 0
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                total += len(part.get("text", "")) + len((part.get("image_url") or {}).get("url", ""))
+    return total
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from backend.core.openai_client import get_client
+
+
+def _warm_imports():
+    """Pull in the heavy modules that services import lazily, off the event loop."""
+    import httpx  # noqa: F401
+    import openai  # noqa: F401
+    from backend.data.lc_slug_map import LC_SLUG_MAP  # noqa: F401
+    from backend.services import audio, classifier, problem_index, problems
+
+    audio.load_av()
+    classifier._load_model()
+    problems._load_cache()
+    problem_index.load_index()
+
+
+async def warm_up(app):
+    """Runs after the server starts accepting connections; /ready turns 200 once it finishes."""
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(_warm_imports)
+        get_client()
+    except Exception as e:
+        # A missing key or optional dependency only disables that feature; don't block readiness
+        print(f"[Startup] Warm-up incomplete: {e}")
+    app.state.ready = True
+    print(f"[Startup] Warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Without a deploy-built index, fetch the catalog after readiness: paging it takes seconds
+    from backend.services import problem_index
+
+    await asyncio.to_thread(problem_index.ensure_catalog)
+
+
+def check_database(engine) -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"[Startup] Database check failed: {e}")
+        return False
@@ -1,26 +1,49 @@
-import json
+import asyncio
 from fastapi import WebSocket
 from typing import Dict
 
+from backend.core.serialization import dumps
+
 
 class WebSocketManager:
     def __init__(self):
-        self._connections: Dict[str, WebSocket] = {}
+        self._connections: Dict[str, set[WebSocket]] = {}
 
     async def connect(self, session_id: str, ws: WebSocket):
         await ws.accept()
-        self._connections[session_id] = ws
+        self._connections.setdefault(session_id, set()).add(ws)
+
+    def disconnect(self, session_id: str, ws: WebSocket | None = None):
+        if ws is None:
+            self._connections.pop(session_id, None)
+            return
+        subscribers = self._connections.get(session_id)
+        if subscribers:
+            subscribers.discard(ws)
+            if not subscribers:
+                del self._connections[session_id]
 
-    def disconnect(self, session_id: str):
-        self._connections.pop(session_id, None)
+    async def _send(self, session_id: str, ws: WebSocket, text: str):
+        try:
+            await ws.send_text(text)
+        except Exception:
+            self.disconnect(session_id, ws)
 
     async def broadcast(self, session_id: str, message: dict):
-        ws = self._connections.get(session_id)
-        if ws:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception:
-                self.disconnect(session_id)
+        subscribers = self._connections.get(session_id)
+        if not subscribers:
+            return
+        # Encode once; every tab open on the session gets the same frame
+        text = dumps(message).decode()
+        await asyncio.gather(*(self._send(session_id, ws, text) for ws in list(subscribers)))
+
+    async def broadcast_all(self, message: dict):
+        text = dumps(message).decode()
+        await asyncio.gather(*(
+            self._send(session_id, ws, text)
+            for session_id, subscribers in list(self._connections.items())
+            for ws in list(subscribers)
+        ))
 
 
 ws_manager = WebSocketManager()
@@ -1,18 +1,55 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).resolve().parent / ".env")
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from starlette.formparsers import MultiPartParser
 
-from backend.models.db import init_db
-from backend.routers import sessions, checkpoints, coach, visualize, verify
+from backend.models.db import init_db, engine
+from backend.routers import sessions, checkpoints, coach, visualize, verify, metrics, analytics, uploads, problems
 from backend.core.ws import ws_manager
+from backend.core.tracing import span
+from backend.core.metrics import monitor_event_loop
+from backend.core.admission import admission, MODES, NORMAL
+from backend.core.warmup import warm_up, check_database
+from backend.core.serialization import dumps, FastJSONResponse, GZIP_EXCLUDED_TYPES, GZIP_LEVEL, GZIP_MIN_BYTES
+from backend.services.storage import UPLOAD_DIR, UPLOAD_SPOOL_BYTES, MAX_AUDIO_UPLOAD_BYTES, MAX_IMAGE_UPLOAD_BYTES
 
-app = FastAPI(title="LeetCode Reasoning Coach API")
+MAX_REQUEST_BYTES = int(os.getenv(
+    "MAX_REQUEST_BYTES", str(MAX_AUDIO_UPLOAD_BYTES + MAX_IMAGE_UPLOAD_BYTES + 1024 * 1024)
+))
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_BYTES
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    app.state.ready = False
+    tasks = [
+        asyncio.create_task(monitor_event_loop()),
+        asyncio.create_task(admission.monitor()),
+        # Warm clients and caches in the background so liveness doesn't wait on them
+        asyncio.create_task(warm_up(app)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+def _service_mode_event(level: int) -> dict:
+    return {"type": "service_mode", "mode": MODES[level], "level": level}
+
+
+admission.on_change(lambda level: asyncio.create_task(ws_manager.broadcast_all(_service_mode_event(level))))
+
+app = FastAPI(title="LeetCode Reasoning Coach API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,33 +58,75 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MIN_BYTES,
+    compresslevel=GZIP_LEVEL,
+    exclude_content_types=GZIP_EXCLUDED_TYPES,
+)
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    # Refuse oversized bodies before the multipart parser spools them
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_REQUEST_BYTES:
+        return JSONResponse({"error": f"Request body exceeds {MAX_REQUEST_BYTES} bytes"}, status_code=413)
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    with span(f"{request.method} {request.url.path}", stage="route",
+              traceparent=request.headers.get("traceparent")) as sp:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        # Label by route template so the histogram isn't split per session id; anything that didn't
+        # match a route (404s, 405s) shares one label so scanners can't mint new series
+        methods = getattr(route, "methods", None)
+        if route is not None and (methods is None or request.method in methods):
+            sp.stage = f"route:{request.method} {route.path}"
+        else:
+            sp.stage = "route:unmatched"
+        sp.set("http.status_code", response.status_code)
+        return response
+
 
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 app.include_router(sessions.router)
 app.include_router(checkpoints.router)
 app.include_router(coach.router)
 app.include_router(visualize.router)
 app.include_router(verify.router)
-
-
-@app.on_event("startup")
-def startup():
-    init_db()
+app.include_router(metrics.router)
+app.include_router(analytics.router)
+app.include_router(uploads.router)
+app.include_router(problems.router)
 
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await ws_manager.connect(session_id, websocket)
+    if admission.level > NORMAL:
+        await websocket.send_text(dumps(_service_mode_event(admission.level)).decode())
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        ws_manager.disconnect(session_id)
+        ws_manager.disconnect(session_id, websocket)
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    """Liveness: the process is up and serving; `mode` says how far the coach is degraded."""
+    return {"status": "ok", "mode": admission.mode, "level": admission.level}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: warm-up finished and the database answers."""
+    warmed = getattr(app.state, "ready", False)
+    db_ok = check_database(engine)
+    status = 200 if warmed and db_ok else 503
+    return JSONResponse({"ready": status == 200, "warmed": warmed, "database": db_ok}, status_code=status)
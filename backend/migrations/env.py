@@ -0,0 +1,59 @@
+import logging.config
+
+from alembic import context
+from sqlalchemy import text
+
+from backend.models.db import Base, DATABASE_URL, engine
+
+config = context.config
+# Only configure logging for the CLI; init_db() runs inside the app, which owns logging
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    logging.config.fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+# Advisory lock key so replicas starting together don't run the same migration twice
+MIGRATION_LOCK_ID = 0x5325
+
+
+def run_migrations_offline():
+    context.configure(
+        url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True,
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection):
+    is_pg = connection.dialect.name == "postgresql"
+    if is_pg:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+    try:
+        context.configure(
+            connection=connection, target_metadata=target_metadata,
+            # SQLite can't ALTER most things in place; batch mode rebuilds the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        if is_pg:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+
+
+def run_migrations_online():
+    # Callers that own a connection (the test suite) pass it in instead of using the app engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.connect() as connection:
+        _run(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
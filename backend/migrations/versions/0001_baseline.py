@@ -0,0 +1,77 @@
+"""Baseline: the schema previously created by Base.metadata.create_all()
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+JSONType = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def upgrade():
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("lc_id", sa.String(), nullable=True),
+        sa.Column("problem_json", JSONType, nullable=True),
+        sa.Column("full_transcript", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "checkpoints",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("session_id", sa.String(), sa.ForeignKey("sessions.id"), nullable=False),
+        sa.Column("sequence_num", sa.Integer(), nullable=False),
+        sa.Column("pseudocode", sa.Text(), nullable=True),
+        sa.Column("whiteboard_json", sa.Text(), nullable=True),
+        sa.Column("labels", JSONType, nullable=True),
+        sa.Column("audio_url", sa.String(), nullable=True),
+        sa.Column("transcript_delta", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "analyses",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("session_id", sa.String(), sa.ForeignKey("sessions.id"), nullable=False),
+        sa.Column("checkpoint_id", sa.String(), sa.ForeignKey("checkpoints.id"), nullable=True),
+        sa.Column("trigger_type", sa.String(), nullable=False),
+        sa.Column("inferred_pattern", sa.String(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.Column("evidence", sa.Text(), nullable=True),
+        sa.Column("visual_description", sa.Text(), nullable=True),
+        sa.Column("snapshot_url", sa.String(), nullable=True),
+        sa.Column("missing_pieces", JSONType, nullable=True),
+        sa.Column("questions", JSONType, nullable=True),
+        sa.Column("micro_hint", sa.Text(), nullable=True),
+        sa.Column("reveal_outline", sa.Text(), nullable=True),
+        sa.Column("raw_llm_response", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "mental_model_cards",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("session_id", sa.String(), sa.ForeignKey("sessions.id"), nullable=False, unique=True),
+        sa.Column("final_pattern", sa.String(), nullable=True),
+        sa.Column("key_invariants", JSONType, nullable=True),
+        sa.Column("approach_evolution", JSONType, nullable=True),
+        sa.Column("unanswered_questions", JSONType, nullable=True),
+        sa.Column("full_transcript", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("mental_model_cards")
+    op.drop_table("analyses")
+    op.drop_table("checkpoints")
+    op.drop_table("sessions")
@@ -0,0 +1,22 @@
+"""Composite indexes for the per-session checkpoint and analysis scans (hydration, coach)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_checkpoints_session_seq", "checkpoints", ["session_id", "sequence_num"])
+    op.create_index("ix_analyses_session_created", "analyses", ["session_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_analyses_session_created", table_name="analyses")
+    op.drop_index("ix_checkpoints_session_seq", table_name="checkpoints")
@@ -0,0 +1,162 @@
+"""Convert stored LeetCode HTML in sessions.problem_json to compact text with extracted constraints/examples
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+import re
+from html.parser import HTMLParser
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+JSONType = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+sessions = sa.table("sessions", sa.column("id", sa.String()), sa.column("problem_json", JSONType))
+
+# Frozen copy of backend.services.problem_text as of this revision: the migration must keep producing
+# the same rows however the live preprocessing changes later.
+
+_HTML_RE = re.compile(r"<(p|div|pre|code|strong|em|ul|ol|li|br|sup|img)\b", re.I)
+_EXAMPLE_RE = re.compile(r"^Example\s*\d*\s*:?\s*$", re.I)
+_CONSTRAINTS_RE = re.compile(r"^Constraints\s*:\s*$", re.I)
+_FOLLOW_UP_RE = re.compile(r"^Follow[\s-]*up\s*:?\s*", re.I)
+_IO_RE = re.compile(r"Input\s*:\s*(.*?)\s*Output\s*:\s*(.*?)(?:\s*Explanation\s*:\s*(.*))?$", re.S | re.I)
+_BLOCK_TAGS = {"p", "div", "ul", "ol", "pre", "table", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._pre = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BLOCK_TAGS or tag == "br":
+            self.parts.append("\n")
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag == "sup":
+            self.parts.append("^")
+        elif tag == "sub":
+            self.parts.append("_")
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            self.parts.append(f"[image: {alt}]" if alt else "[image]")
+        if tag == "pre":
+            self._pre += 1
+
+    def handle_endtag(self, tag):
+        if tag == "pre":
+            self._pre = max(0, self._pre - 1)
+        if tag in _BLOCK_TAGS or tag == "li":
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        self.parts.append(data if self._pre else re.sub(r"\s+", " ", data))
+
+
+def _looks_like_html(text: str) -> bool:
+    return bool(_HTML_RE.search(text or ""))
+
+
+def _html_to_text(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    text = "".join(parser.parts).replace("\xa0", " ")
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _parse_example(lines: list[str]) -> dict | None:
+    match = _IO_RE.search("\n".join(lines))
+    if not match:
+        return None
+    example = {"input": " ".join(match.group(1).split()), "output": " ".join(match.group(2).split())}
+    if match.group(3):
+        example["explanation"] = " ".join(match.group(3).split())
+    return example
+
+
+def _split_sections(text: str) -> tuple[str, list[dict], list[str]]:
+    """(statement incl. follow-up, examples, constraints) from LeetCode-formatted text."""
+    statement, follow_up, constraints = [], [], []
+    examples: list[list[str]] = []
+    section = "statement"
+    for line in text.splitlines():
+        if _EXAMPLE_RE.match(line):
+            section = "example"
+            examples.append([])
+        elif _CONSTRAINTS_RE.match(line):
+            section = "constraints"
+        elif _FOLLOW_UP_RE.match(line):
+            section = "follow_up"
+            rest = _FOLLOW_UP_RE.sub("", line).strip()
+            if rest:
+                follow_up.append(rest)
+        elif section == "example":
+            examples[-1].append(line)
+        elif section == "constraints":
+            constraints.append(line[2:] if line.startswith("- ") else line)
+        elif section == "follow_up":
+            follow_up.append(line)
+        else:
+            statement.append(line)
+
+    if follow_up:
+        statement.append("Follow-up: " + " ".join(follow_up))
+    parsed = [ex for ex in (_parse_example(block) for block in examples) if ex]
+    return "\n".join(statement), parsed, constraints
+
+
+def _preprocess_problem(problem: dict | None) -> dict | None:
+    """Idempotent: problems that were already preprocessed (or have no recognisable sections) pass through."""
+    if not problem or "description_html" in problem:
+        return problem
+    description = problem.get("description") or ""
+    is_html = _looks_like_html(description)
+    text = _html_to_text(description) if is_html else description.strip()
+    statement, examples, constraints = _split_sections(text)
+    if not is_html and not examples and not constraints:
+        return problem
+
+    result = dict(problem)
+    result["description"] = statement or text
+    if is_html:
+        result["description_html"] = description
+    if examples:
+        result["examples"] = examples
+    if constraints and not problem.get("constraints"):
+        result["constraints"] = constraints
+    return result
+
+
+def _rewrite(convert):
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(sessions.c.id, sessions.c.problem_json).where(sessions.c.problem_json.isnot(None))).all()
+    for session_id, problem in rows:
+        converted = convert(problem) if isinstance(problem, dict) else problem
+        if converted is not problem:
+            conn.execute(sessions.update().where(sessions.c.id == session_id).values(problem_json=converted))
+
+
+def _restore(problem: dict) -> dict:
+    if "description_html" not in problem:
+        return problem
+    restored = dict(problem)
+    restored["description"] = restored.pop("description_html")
+    return restored
+
+
+def upgrade():
+    _rewrite(_preprocess_problem)
+
+
+def downgrade():
+    _rewrite(_restore)
@@ -0,0 +1,23 @@
+"""sessions.archived_at marks stub rows whose data moved to a cold archive bundle
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("sessions") as batch:
+        batch.add_column(sa.Column("archived_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("sessions") as batch:
+        batch.drop_column("archived_at")
@@ -1,12 +1,22 @@
+import os
 import uuid
 from datetime import datetime, timezone
+import time
+from pathlib import Path
 from sqlalchemy import (
-    Column, String, Text, Float, Integer, JSON, Enum, ForeignKey, DateTime, create_engine
+    Column, String, Text, Float, Integer, JSON, Enum, ForeignKey, DateTime, Index, create_engine, event, inspect
 )
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 
+from backend.core.tracing import record_span
+
 Base = declarative_base()
 
+# JSONB on PostgreSQL (binary, indexable), plain JSON text elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 def generate_uuid() -> str:
     return str(uuid.uuid4())
@@ -21,11 +31,13 @@ class Session(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     lc_id = Column(String, nullable=True)
-    problem_json = Column(JSON, nullable=True)
+    problem_json = Column(JSONType, nullable=True)
     full_transcript = Column(Text, default="")
     status = Column(String, default="active")  # active | completed
     created_at = Column(DateTime, default=utcnow)
     updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    # Set while the session's rows and uploads live in a cold archive bundle (services/archive.py)
+    archived_at = Column(DateTime, nullable=True)
 
     checkpoints = relationship("Checkpoint", back_populates="session", order_by="Checkpoint.sequence_num")
     analyses = relationship("Analysis", back_populates="session", order_by="Analysis.created_at")
@@ -40,13 +52,15 @@ class Checkpoint(Base):
     sequence_num = Column(Integer, nullable=False)
     pseudocode = Column(Text, default="")
     whiteboard_json = Column(Text, default="{}")
-    labels = Column(JSON, default=list)
+    labels = Column(JSONType, default=list)
     audio_url = Column(String, nullable=True)
     transcript_delta = Column(Text, nullable=True)
     created_at = Column(DateTime, default=utcnow)
 
     session = relationship("Session", back_populates="checkpoints")
 
+    __table_args__ = (Index("ix_checkpoints_session_seq", "session_id", "sequence_num"),)
+
 
 class Analysis(Base):
     __tablename__ = "analyses"
@@ -60,8 +74,8 @@ class Analysis(Base):
     evidence = Column(Text, default="")
     visual_description = Column(Text, default="")
     snapshot_url = Column(String, nullable=True)
-    missing_pieces = Column(JSON, default=list)
-    questions = Column(JSON, default=list)
+    missing_pieces = Column(JSONType, default=list)
+    questions = Column(JSONType, default=list)
     micro_hint = Column(Text, default="")
     reveal_outline = Column(Text, nullable=True)
     raw_llm_response = Column(Text, default="")
@@ -69,6 +83,8 @@ class Analysis(Base):
 
     session = relationship("Session", back_populates="analyses")
 
+    __table_args__ = (Index("ix_analyses_session_created", "session_id", "created_at", "id"),)
+
 
 class MentalModelCard(Base):
     __tablename__ = "mental_model_cards"
@@ -76,22 +92,104 @@ class MentalModelCard(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     session_id = Column(String, ForeignKey("sessions.id"), unique=True, nullable=False)
     final_pattern = Column(String, default="")
-    key_invariants = Column(JSON, default=list)
-    approach_evolution = Column(JSON, default=list)
-    unanswered_questions = Column(JSON, default=list)
+    key_invariants = Column(JSONType, default=list)
+    approach_evolution = Column(JSONType, default=list)
+    unanswered_questions = Column(JSONType, default=list)
     full_transcript = Column(Text, default="")
     created_at = Column(DateTime, default=utcnow)
+    # Bumped on every update; a commit based on a stale read raises StaleDataError instead of overwriting
+    version = Column(Integer, nullable=False, server_default="1")
 
     session = relationship("Session", back_populates="mental_model_card")
 
+    __mapper_args__ = {"version_id_col": version}
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+# psycopg prepares a statement server-side after this many executions; "none" disables (PgBouncer transaction mode)
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "5")
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") not in ("0", "false", "no")
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+BASELINE_REVISION = "0001"
+
+
+def normalize_url(url: str) -> str:
+    """Heroku-style postgres:// URLs and bare postgresql:// default to the psycopg (v3) driver."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg://" + url[len("postgresql://"):]
+    return url
+
+
+def engine_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    prepare = None if DB_PREPARE_THRESHOLD.lower() == "none" else int(DB_PREPARE_THRESHOLD)
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+        "pool_pre_ping": True,
+        "query_cache_size": 1200,
+        "connect_args": {"prepare_threshold": prepare, "application_name": "sketch2solve"},
+    }
+
+
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./sketch2solve.db"))
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, record):
+        # WAL lets readers proceed while the single writer commits
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = (time.time_ns(), time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    start_ns, start = context._query_start
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "query"
+    record_span(f"db {verb}", f"db:{verb}", start_ns, time.perf_counter() - start, **{"db.statement": statement[:200]})
+
 
-DATABASE_URL = "sqlite:///./sketch2solve.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def alembic_config():
+    from alembic.config import Config
+
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Bring the schema to the latest migration. Databases created by the old create_all() are
+    stamped at the baseline first so their existing tables aren't re-created."""
+    if not DB_AUTO_MIGRATE:
+        return
+    from alembic import command
+
+    cfg = alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "sessions" in tables and "alembic_version" not in tables:
+        command.stamp(cfg, BASELINE_REVISION)
+    command.upgrade(cfg, "head")
 
 
 def get_db():
@@ -36,10 +36,11 @@ def build_text_context(
     transcript: str,
     trigger_type: str,
     reveal_mode: bool,
+    board_description: str = "",
 ) -> str:
     title = problem.get("title", "Unknown")
     desc = problem.get("description", "(no description)")
-    constraints = ", ".join(problem.get("constraints", []))
+    constraints = "; ".join(problem.get("constraints", []))
     topic_tags = ", ".join(problem.get("topicTags", [])) or "(none)"
     examples = ""
     for i, ex in enumerate(problem.get("examples", []), 1):
@@ -65,8 +66,51 @@ User's pseudocode:
 Whiteboard labels:
 {labels_str}
 
+Whiteboard structure (parsed from the canvas):
+{board_description or "(not available)"}
+
 User's spoken reasoning:
 {transcript or "(none)"}
 
 Trigger: {trigger_type}
 Reveal mode: {str(reveal_mode).lower()}"""
+
+
+COACH_FOLLOWUP_NOTE = """
+
+This is a FOLLOW-UP. You already analyzed this user's work earlier; your previous analysis is included.
+You will NOT receive the whiteboard image — instead you get a structured list of what changed on the board since then.
+Update your analysis based only on the changes, and respond with the same JSON schema."""
+
+
+def build_followup_context(
+    problem: dict,
+    previous: dict,
+    board_changes: str,
+    pseudocode: str | None,
+    new_transcript: str,
+    trigger_type: str,
+) -> str:
+    topic_tags = ", ".join(problem.get("topicTags", [])) or "(none)"
+    missing = "\n".join(f"  - {m}" for m in previous.get("missing_pieces", [])) or "  (none)"
+    pseudocode_str = pseudocode if pseudocode is not None else "(unchanged since previous analysis)"
+
+    return f"""Problem: {problem.get("title", "Unknown")}
+Topic Tags: {topic_tags}
+
+Previous analysis:
+  Pattern: {previous.get("pattern", "")} (confidence {previous.get("confidence", 0.0)})
+  Missing pieces:
+{missing}
+
+Whiteboard changes since previous analysis:
+{board_changes}
+
+User's pseudocode:
+{pseudocode_str or "(empty)"}
+
+New spoken reasoning since previous analysis:
+{new_transcript or "(none)"}
+
+Trigger: {trigger_type}
+Reveal mode: false"""
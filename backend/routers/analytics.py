@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from typing import Optional
+
+from backend.models.db import SessionLocal
+from backend.services import analytics
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+def _export():
+    db = SessionLocal()
+    try:
+        return analytics.export(db)
+    finally:
+        db.close()
+
+
+@router.post("/export")
+async def run_export():
+    try:
+        return {"exported": await run_in_threadpool(_export)}
+    except analytics.LockHeld:
+        return JSONResponse({"error": "An analytics export is already running"}, status_code=409)
+
+
+@router.get("/aggregates/{name}")
+async def get_aggregate(name: str, lc_id: Optional[str] = None, limit: int = Query(500, ge=1, le=10000)):
+    rows = await run_in_threadpool(analytics.read_aggregate, name, lc_id, limit)
+    if rows is None:
+        return JSONResponse({"error": f"Unknown or not yet exported aggregate: {name}"}, status_code=404)
+    return {"name": name, "rows": rows}
+
+
+@router.get("/analyses")
+async def get_analyses(
+    lc_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    pattern: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=10000),
+):
+    rows = await run_in_threadpool(analytics.query_analyses, lc_id, since, until, pattern, limit)
+    return {"rows": rows}
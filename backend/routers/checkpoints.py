@@ -1,12 +1,19 @@
 import asyncio
 import json
 from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session as DBSessionType
 
 from backend.models.db import get_db, Checkpoint, SessionLocal
-from backend.services.storage import save_file
+from backend.services import audio_log
 from backend.services.stt import transcribe_audio
+from backend.services.audio import preprocess_audio, chunk_deduper
+from backend.services.storage import receive_upload, UploadTooLarge, MAX_AUDIO_UPLOAD_BYTES
+from backend.services.hydration import hydration_cache
+from backend.services.cadence import cadence_tracker, content_hash, min_interval
+from backend.services.speculation import speculation
 from backend.core.ws import ws_manager
 
 router = APIRouter(prefix="/checkpoints", tags=["checkpoints"])
@@ -28,11 +35,36 @@ async def create_checkpoint(
     except (json.JSONDecodeError, TypeError):
         pass
 
+    try:
+        audio = await receive_upload(audio_blob, MAX_AUDIO_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+
     audio_url = None
     audio_bytes = None
-    if audio_blob and audio_blob.size and audio_blob.size > 0:
-        audio_bytes = await audio_blob.read()
-        audio_url = await save_file(session_id, f"audio_{sequence_num}.webm", audio_bytes)
+    audio_name = f"audio_{sequence_num}.webm"
+    if audio:
+        duplicate, audio_url = chunk_deduper.seen(session_id, audio.sha256)
+        if not duplicate:
+            # Decoded straight from the upload's spool file; only the trimmed speech is held in memory
+            audio_bytes, audio_name = await preprocess_audio(audio, audio_name)
+            if audio_bytes:
+                audio_url = await audio_log.append(session_id, sequence_num, audio_bytes, audio_name)
+            chunk_deduper.remember(session_id, audio.sha256, audio_url)
+
+    digest = content_hash(pseudocode, whiteboard_json, json.dumps(parsed_labels))
+    last_hash = None if cadence_tracker.known(session_id) else _latest_hash(db, session_id)
+    changed, next_interval = cadence_tracker.observe(session_id, digest, bool(audio_bytes), last_hash)
+    if not changed:
+        # Nothing new on the board and no speech: acknowledge without writing anything
+        return {
+            "checkpoint_id": None,
+            "audio_url": None,
+            "transcript_delta": None,
+            "noop": True,
+            "next_interval_s": next_interval,
+            "min_interval_s": min_interval(),
+        }
 
     cp = Checkpoint(
         session_id=session_id,
@@ -45,10 +77,12 @@ async def create_checkpoint(
     db.add(cp)
     db.commit()
     db.refresh(cp)
+    hydration_cache.invalidate(session_id)
+    speculation.consider(session_id, cp.id, pseudocode, whiteboard_json)
 
     if audio_bytes:
         bg_db = SessionLocal()
-        asyncio.create_task(_run_stt(audio_bytes, session_id, bg_db, cp.id))
+        asyncio.create_task(_run_stt(audio_bytes, audio_name, session_id, bg_db, cp.id))
 
     await ws_manager.broadcast(session_id, {
         "type": "checkpoint_saved",
@@ -59,11 +93,26 @@ async def create_checkpoint(
         "checkpoint_id": cp.id,
         "audio_url": audio_url,
         "transcript_delta": None,
+        "noop": False,
+        "next_interval_s": next_interval,
+        "min_interval_s": min_interval(),
     }
 
 
-async def _run_stt(audio_bytes: bytes, session_id: str, db, checkpoint_id: str):
+def _latest_hash(db: DBSessionType, session_id: str) -> str | None:
+    row = db.execute(
+        select(Checkpoint.pseudocode, Checkpoint.whiteboard_json, Checkpoint.labels)
+        .where(Checkpoint.session_id == session_id)
+        .order_by(Checkpoint.sequence_num.desc())
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    return content_hash(row.pseudocode or "", row.whiteboard_json or "{}", json.dumps(row.labels or []))
+
+
+async def _run_stt(audio_bytes: bytes, filename: str, session_id: str, db, checkpoint_id: str):
     try:
-        await transcribe_audio(audio_bytes, session_id, db, checkpoint_id)
+        await transcribe_audio(audio_bytes, session_id, db, checkpoint_id, filename=filename)
     finally:
         db.close()
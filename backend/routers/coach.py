@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from typing import Optional
 from sqlalchemy.orm import Session as DBSessionType
 
 from backend.models.db import get_db
-from backend.services.coach import run_coach
+from backend.core.admission import admission, ADMISSION_COOLDOWN_S
+from backend.services.storage import receive_upload, UploadTooLarge, MAX_AUDIO_UPLOAD_BYTES, MAX_IMAGE_UPLOAD_BYTES
+from backend.services.coach import run_coach, AUTO_TRIGGERS
 
 router = APIRouter(tags=["coach"])
 
@@ -17,20 +20,27 @@ async def trigger_coach(
     whiteboard_png: Optional[UploadFile] = File(None),
     db: DBSessionType = Depends(get_db),
 ):
-    audio_bytes = None
-    if audio_blob and audio_blob.size and audio_blob.size > 0:
-        audio_bytes = await audio_blob.read()
+    if not admission.admit(auto=trigger_type in AUTO_TRIGGERS):
+        return JSONResponse(
+            {"error": "Overloaded: automatic coaching is paused", "service_mode": admission.mode},
+            status_code=503,
+            headers={"Retry-After": str(int(ADMISSION_COOLDOWN_S))},
+        )
 
-    png_bytes = None
-    if whiteboard_png and whiteboard_png.size and whiteboard_png.size > 0:
-        png_bytes = await whiteboard_png.read()
+    # Both stay in their spool files; run_coach reads them back in chunks
+    try:
+        audio = await receive_upload(audio_blob, MAX_AUDIO_UPLOAD_BYTES)
+        png = await receive_upload(whiteboard_png, MAX_IMAGE_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
 
-    result = await run_coach(
-        session_id=session_id,
-        trigger_type=trigger_type,
-        audio_bytes=audio_bytes,
-        png_bytes=png_bytes,
-        reveal_mode=reveal_mode,
-        db=db,
-    )
+    with admission.track():
+        result = await run_coach(
+            session_id=session_id,
+            trigger_type=trigger_type,
+            audio=audio,
+            png=png,
+            reveal_mode=reveal_mode,
+            db=db,
+        )
     return result
@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.core.admission import admission
+from backend.core.hedge import latency_stats
+from backend.core.metrics import render_prometheus
+from backend.services.semantic_cache import semantic_cache
+from backend.services.pseudo_parser import parser_snapshot
+from backend.services.hydration import hydration_cache
+from backend.services.audio import audio_stats
+from backend.services.cadence import cadence_tracker
+from backend.services.speculation import speculation
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/latency")
+def get_latency():
+    return latency_stats.snapshot()
+
+
+@router.get("/semantic-cache")
+def get_semantic_cache():
+    return semantic_cache.snapshot()
+
+
+@router.get("/visualizer")
+def get_visualizer():
+    return parser_snapshot()
+
+
+@router.get("/hydration")
+def get_hydration():
+    return hydration_cache.snapshot()
+
+
+@router.get("/audio")
+def get_audio():
+    return audio_stats.snapshot()
+
+
+@router.get("/cadence")
+def get_cadence():
+    return cadence_tracker.snapshot()
+
+
+@router.get("/admission")
+def get_admission():
+    return admission.snapshot()
+
+
+@router.get("/speculation")
+def get_speculation():
+    return speculation.snapshot()
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from backend.services.problem_index import load_index
+
+router = APIRouter(prefix="/problems", tags=["problems"])
+
+
+@router.get("/search")
+async def search_problems(
+    q: str = "",
+    tags: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Autocomplete by number, title or slug fragment (typo-tolerant); `tags` is comma-separated."""
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
+    # Sub-millisecond, so it runs on the event loop rather than a worker thread
+    index = load_index()
+    results = index.search(q, limit=limit, tags=tag_list, difficulty=difficulty)
+    return {
+        "results": [
+            {"lc_id": str(p["id"]), "title": p["title"], "slug": p["slug"], "difficulty": p["difficulty"],
+             "topicTags": p["tags"], "paid_only": p["paid_only"]}
+            for p in results
+        ],
+        # False until the full catalog has been fetched: only locally known problems are searched
+        "complete": index.complete,
+    }
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends
+import os
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import Session as DBSessionType
 
-from backend.models.db import get_db, Session as DBSession, MentalModelCard, generate_uuid
+from backend.models.db import get_db, Session as DBSession, Checkpoint, Analysis, MentalModelCard, generate_uuid
 from backend.services.problems import resolve_problem
+from backend.services.hydration import build_hydration, hydration_cache
+from backend.services.mental_model import CARD_UPDATE_ATTEMPTS, rebuild_card
+from backend.services import audio_log
+from backend.services.archive import ensure_restored, restore_if_archived
+from backend.services.cadence import cadence_tracker
+from backend.services.speculation import speculation
+from backend.core.byte_range import etag_matches, parse_range, iter_file
+from backend.core.serialization import FastJSONResponse
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -45,76 +59,172 @@ async def create_session(body: CreateSessionRequest, db: DBSessionType = Depends
 async def set_problem(session_id: str, body: SetProblemRequest, db: DBSessionType = Depends(get_db)):
     session = db.query(DBSession).filter_by(id=session_id).first()
     if not session:
-        return {"error": "Session not found"}, 404
+        return JSONResponse({"error": "Session not found"}, status_code=404)
 
     problem = await resolve_problem(body.lc_id, body.problem_text)
     if problem:
         session.problem_json = problem
         session.lc_id = body.lc_id
         db.commit()
+        hydration_cache.invalidate(session_id)
         return {"problem": problem, "needs_manual_input": False}
     return {"problem": None, "needs_manual_input": True}
 
 
+def _restored(db, session_id: str) -> tuple[DBSession | None, JSONResponse | None]:
+    """(session, None) once it's readable; else (None, 404) for unknown ids or (None, 503) when an
+    archived session's bundle couldn't be restored."""
+    session = ensure_restored(db, session_id)
+    if session is None:
+        return None, JSONResponse({"error": "Session not found"}, status_code=404)
+    if session.archived_at is not None:
+        return None, JSONResponse(
+            {"error": "Session is archived and could not be restored"}, status_code=503, headers={"Retry-After": "30"},
+        )
+    return session, None
+
+
 @router.get("/{session_id}")
 def get_session(session_id: str, db: DBSessionType = Depends(get_db)):
-    session = db.query(DBSession).filter_by(id=session_id).first()
-    if not session:
-        return {"error": "Session not found"}, 404
-    return {
+    session, error = _restored(db, session_id)
+    if error:
+        return error
+    return FastJSONResponse({
         "session_id": session.id,
         "problem": session.problem_json,
         "status": session.status,
         "full_transcript": session.full_transcript,
-        "checkpoint_count": len(session.checkpoints),
-        "analysis_count": len(session.analyses),
-    }
+        "checkpoint_count": db.scalar(select(func.count(Checkpoint.id)).where(Checkpoint.session_id == session_id)),
+        "analysis_count": db.scalar(select(func.count(Analysis.id)).where(Analysis.session_id == session_id)),
+    })
+
+
+@router.get("/{session_id}/hydrate")
+def hydrate_session(
+    session_id: str,
+    request: Request,
+    analyses_limit: int = Query(20, ge=1, le=100),
+    analyses_before: Optional[str] = None,
+    transcript_limit: int = Query(50, ge=1, le=500),
+    transcript_before: Optional[int] = None,
+    db: DBSessionType = Depends(get_db),
+):
+    """Restore a session after a reload: problem, latest checkpoint, and paginated analyses/transcript."""
+    params = (analyses_limit, analyses_before, transcript_limit, transcript_before)
+    cached = hydration_cache.get(session_id, params)
+    if cached is None:
+        _, error = _restored(db, session_id)
+        if error:
+            return error
+        generation = hydration_cache.generation(session_id)
+        body = build_hydration(db, session_id, *params)
+        if body is None:
+            return JSONResponse({"error": "Session not found"}, status_code=404)
+        cached = hydration_cache.put(session_id, params, body, generation)
+
+    etag, encoded = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(encoded, media_type="application/json", headers=headers)
 
 
 @router.post("/{session_id}/complete")
-def complete_session(session_id: str, db: DBSessionType = Depends(get_db)):
+def complete_session(session_id: str, background_tasks: BackgroundTasks, db: DBSessionType = Depends(get_db)):
     session = db.query(DBSession).filter_by(id=session_id).first()
     if not session:
-        return {"error": "Session not found"}, 404
-
-    session.status = "completed"
-
-    evolution = []
-    for a in session.analyses:
-        evolution.append({
-            "sequence_num": a.checkpoint_id,
-            "pattern": a.inferred_pattern,
-            "confidence": a.confidence,
-        })
-
-    last = session.analyses[-1] if session.analyses else None
-    card = MentalModelCard(
-        session_id=session_id,
-        final_pattern=last.inferred_pattern if last else "",
-        key_invariants=[p for p in (last.missing_pieces if last else [])],
-        approach_evolution=evolution,
-        unanswered_questions=last.questions if last else [],
-        full_transcript=session.full_transcript or "",
-    )
-    db.add(card)
-    db.commit()
-    db.refresh(card)
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+
+    # The card is kept up to date by every coach run; completing only freezes the transcript
+    for _ in range(CARD_UPDATE_ATTEMPTS):
+        card = session.mental_model_card
+        if session.status == "completed" and card:
+            return {"session_id": session_id, "mental_model_card_id": card.id}
+        if card is None:
+            card = rebuild_card(db, session_id)
+
+        card.full_transcript = session.full_transcript or ""
+        session.status = "completed"
+        try:
+            db.commit()
+            break
+        except (IntegrityError, StaleDataError):
+            # A coach run created or updated the card meanwhile; freeze its latest version instead
+            db.rollback()
+    else:
+        return JSONResponse({"error": "Session is busy"}, status_code=503, headers={"Retry-After": "1"})
+    hydration_cache.invalidate(session_id)
+    cadence_tracker.forget(session_id)
+    speculation.forget(session_id)
+    background_tasks.add_task(audio_log.compact, session_id)
 
     return {"session_id": session_id, "mental_model_card_id": card.id}
 
 
 @router.get("/{session_id}/card")
 def get_card(session_id: str, db: DBSessionType = Depends(get_db)):
+    _, error = _restored(db, session_id)
+    if error:
+        return error
     card = db.query(MentalModelCard).filter_by(session_id=session_id).first()
     if not card:
-        return {"error": "Card not found"}, 404
-    return {
+        return JSONResponse({"error": "Card not found"}, status_code=404)
+    return FastJSONResponse({
         "id": card.id,
         "session_id": card.session_id,
         "final_pattern": card.final_pattern,
         "key_invariants": card.key_invariants,
         "approach_evolution": card.approach_evolution,
         "unanswered_questions": card.unanswered_questions,
-        "full_transcript": card.full_transcript,
+        "full_transcript": card.full_transcript or card.session.full_transcript or "",
         "created_at": card.created_at.isoformat() if card.created_at else None,
-    }
+    })
+
+
+async def _iter_segments(path: str, segments: list[tuple[int, int]]):
+    for offset, length in segments:
+        async for data in iter_file(path, offset, length):
+            yield data
+
+
+@router.get("/{session_id}/audio")
+def get_audio(
+    session_id: str,
+    request: Request,
+    seq: Optional[int] = None,
+    start: Optional[float] = Query(None, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+):
+    """One chunk (`seq`), a time span in seconds (`start`/`end`), or the whole session; honours Range."""
+    found = audio_log.locate(session_id, seq, start, end)
+    if found is None and restore_if_archived(session_id):
+        found = audio_log.locate(session_id, seq, start, end)
+    if found is None:
+        return JSONResponse({"error": "Audio not found"}, status_code=404)
+    path, segments, media_type = found
+    if path is None:
+        # Several chunks of a session that isn't compacted yet: serve them as one re-encoded stream
+        data = audio_log.remux(session_id, start, end)
+        if data is None:
+            return JSONResponse({"error": "Audio not found"}, status_code=404)
+        return Response(data, media_type=media_type)
+    if len(segments) == 1 and segments[0][0] == 0 and segments[0][1] == os.path.getsize(path):
+        return FileResponse(path, media_type=media_type)
+
+    # Resolve a Range header against the virtual concatenation of the segments
+    total = sum(length for _, length in segments)
+    headers = {"Accept-Ranges": "bytes"}
+    rng = parse_range(request.headers.get("range"), total)
+    status = 200
+    if rng:
+        lo, hi = rng
+        sliced, pos = [], 0
+        for offset, length in segments:
+            a, b = max(lo, pos), min(hi + 1, pos + length)
+            if a < b:
+                sliced.append((offset + a - pos, b - a))
+            pos += length
+        segments, status = sliced, 206
+        headers["Content-Range"] = f"bytes {lo}-{hi}/{total}"
+    headers["Content-Length"] = str(sum(length for _, length in segments))
+    return StreamingResponse(_iter_segments(path, segments), status_code=status, media_type=media_type, headers=headers)
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse, Response
+
+from backend.core.byte_range import etag_matches
+from backend.services.archive import restore_if_archived
+from backend.services.storage import UPLOAD_DIR, CONTENT_HASH_RE
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+
+def _safe_part(part: str) -> bool:
+    return bool(part) and not part.startswith(".") and "/" not in part and "\\" not in part
+
+
+@router.api_route("/{session_id}/{filename}", methods=["GET", "HEAD"])
+async def serve_upload(session_id: str, filename: str, request: Request):
+    """Static uploads with strong ETags, immutable caching for content-addressed names and Range support.
+
+    FileResponse answers Range requests itself and hands the path to the server via the
+    `http.response.pathsend` extension when available (sendfile), else streams 64 KiB reads.
+    """
+    if not (_safe_part(session_id) and _safe_part(filename)):
+        return Response(status_code=404)
+    path = os.path.join(UPLOAD_DIR, session_id, filename)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        if not await asyncio.to_thread(restore_if_archived, session_id):
+            return Response(status_code=404)
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return Response(status_code=404)
+
+    hashed = CONTENT_HASH_RE.search(filename)
+    # Content-addressed names carry their own digest; otherwise size + mtime identify the version
+    etag = f'"{hashed.group(1)}"' if hashed else f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if hashed else REVALIDATE}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers, stat_result=stat)
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 
+from backend.core.serialization import FastJSONResponse
 from backend.services.visualizer import pseudocode_to_shapes
 
 router = APIRouter(tags=["visualize"])
@@ -15,4 +16,4 @@ class VisualizeRequest(BaseModel):
 @router.post("/visualize")
 async def visualize(body: VisualizeRequest):
     shapes = await pseudocode_to_shapes(body.pseudocode, body.problem_title or "")
-    return {"shapes": shapes}
+    return FastJSONResponse({"shapes": shapes})
@@ -0,0 +1,344 @@
+"""Columnar analytics export: sessions, checkpoints and analyses as Parquet, partitioned by day and lc_id.
+
+Export with:  python -m backend.services.analytics
+
+Each run appends only rows newer than the per-table watermark, then rebuilds the small aggregate
+tables under `aggregates/`. The query helpers below read Parquet only and never touch the app DB.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.core.file_lock import LockHeld, file_lock
+
+ANALYTICS_DIR = os.getenv(
+    "ANALYTICS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "analytics")
+)
+# Rows younger than this may still be updated (e.g. transcripts land after the checkpoint row)
+EXPORT_SETTLE_S = float(os.getenv("ANALYTICS_EXPORT_SETTLE_S", "120"))
+EXPORT_BATCH = 5000
+NO_PROBLEM = "custom"
+STUCK_TRIGGERS = ("stuck", "hint", "reveal")
+AGGREGATES = ("stuck_patterns", "time_to_final_pattern", "daily_patterns", "problem_sessions")
+
+
+def _pa():
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.parquet
+    return pyarrow
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _state_path() -> str:
+    return os.path.join(ANALYTICS_DIR, "_state.json")
+
+
+def _load_state() -> dict:
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _lock_path() -> str:
+    return os.path.join(ANALYTICS_DIR, "_export.lock")
+
+
+def _save_state(state: dict):
+    tmp = _state_path() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path())
+
+
+def _schemas():
+    pa = _pa()
+    ts = pa.timestamp("us", tz="UTC")
+    return {
+        "sessions": pa.schema([
+            ("session_id", pa.string()), ("lc_id", pa.string()), ("day", pa.string()),
+            ("title", pa.string()), ("difficulty", pa.string()), ("status", pa.string()),
+            ("created_at", ts), ("updated_at", ts),
+        ]),
+        "checkpoints": pa.schema([
+            ("checkpoint_id", pa.string()), ("session_id", pa.string()), ("lc_id", pa.string()), ("day", pa.string()),
+            ("sequence_num", pa.int32()), ("created_at", ts), ("pseudocode_chars", pa.int32()),
+            ("whiteboard_bytes", pa.int32()), ("label_count", pa.int16()), ("has_audio", pa.bool_()),
+            ("transcript_chars", pa.int32()),
+        ]),
+        "analyses": pa.schema([
+            ("analysis_id", pa.string()), ("session_id", pa.string()), ("lc_id", pa.string()), ("day", pa.string()),
+            ("checkpoint_id", pa.string()), ("trigger_type", pa.string()), ("created_at", ts),
+            ("session_started_at", ts), ("inferred_pattern", pa.string()), ("confidence", pa.float32()),
+            ("missing_count", pa.int16()), ("question_count", pa.int16()), ("revealed", pa.bool_()),
+        ]),
+    }
+
+
+def _session_row(s) -> dict:
+    problem = s.problem_json or {}
+    created = _utc(s.created_at)
+    return {
+        "session_id": s.id, "lc_id": s.lc_id or NO_PROBLEM, "day": created.date().isoformat() if created else "",
+        "title": problem.get("title"), "difficulty": problem.get("difficulty"), "status": s.status,
+        "created_at": created, "updated_at": _utc(s.updated_at),
+    }
+
+
+def _checkpoint_row(c, lc_id: str) -> dict:
+    created = _utc(c.created_at)
+    return {
+        "checkpoint_id": c.id, "session_id": c.session_id, "lc_id": lc_id, "day": created.date().isoformat(),
+        "sequence_num": c.sequence_num, "created_at": created, "pseudocode_chars": len(c.pseudocode or ""),
+        "whiteboard_bytes": len(c.whiteboard_json or ""), "label_count": len(c.labels or []),
+        "has_audio": bool(c.audio_url), "transcript_chars": len(c.transcript_delta or ""),
+    }
+
+
+def _analysis_row(a, lc_id: str, started: datetime | None) -> dict:
+    created = _utc(a.created_at)
+    return {
+        "analysis_id": a.id, "session_id": a.session_id, "lc_id": lc_id, "day": created.date().isoformat(),
+        "checkpoint_id": a.checkpoint_id, "trigger_type": a.trigger_type, "created_at": created,
+        "session_started_at": started, "inferred_pattern": " ".join((a.inferred_pattern or "").lower().split()),
+        "confidence": a.confidence or 0.0, "missing_count": len(a.missing_pieces or []),
+        "question_count": len(a.questions or []), "revealed": bool(a.reveal_outline),
+    }
+
+
+def _write(table: str, rows: list[dict], stamp: str):
+    pa = _pa()
+    data = pa.Table.from_pylist(rows, schema=_schemas()[table])
+    pa.parquet.write_to_dataset(
+        data, os.path.join(ANALYTICS_DIR, table), partition_cols=["day", "lc_id"],
+        basename_template=f"part-{stamp}-{{i}}.parquet",
+    )
+
+
+def export(db, settle_s: float = EXPORT_SETTLE_S) -> dict:
+    """Append rows created (or, for sessions, updated) since the last export.
+
+    Only one export runs at a time across processes: the watermark read, the Parquet writes and the
+    state save all happen under `_export.lock`, and a concurrent call raises `LockHeld` instead of
+    re-exporting the same rows.
+    """
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+    with file_lock(_lock_path(), blocking=False):
+        return _export(db, settle_s)
+
+
+def _export(db, settle_s: float) -> dict:
+    from sqlalchemy import and_, or_
+    from backend.models.db import Analysis, Checkpoint, Session as DBSession
+
+    state = _load_state()
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=settle_s)
+    stamp = str(time.time_ns())
+    sessions_meta: dict[str, tuple[str, datetime | None]] = {}
+
+    def meta(session_id: str) -> tuple[str, datetime | None]:
+        if session_id not in sessions_meta:
+            s = db.get(DBSession, session_id)
+            sessions_meta[session_id] = (s.lc_id or NO_PROBLEM, _utc(s.created_at)) if s else (NO_PROBLEM, None)
+        return sessions_meta[session_id]
+
+    exported = {}
+    for table, model, ts_col in (
+        ("sessions", DBSession, DBSession.updated_at),
+        ("checkpoints", Checkpoint, Checkpoint.created_at),
+        ("analyses", Analysis, Analysis.created_at),
+    ):
+        mark = state.get(table)
+        q = db.query(model).filter(ts_col <= cutoff)
+        if mark:
+            ts = datetime.fromisoformat(mark["ts"])
+            q = q.filter(or_(ts_col > ts, and_(ts_col == ts, model.id > mark["id"])))
+        q = q.order_by(ts_col, model.id)
+
+        rows, count, last = [], 0, None
+        for obj in q.yield_per(EXPORT_BATCH):
+            if table == "sessions":
+                rows.append(_session_row(obj))
+                sessions_meta[obj.id] = (obj.lc_id or NO_PROBLEM, _utc(obj.created_at))
+            elif table == "checkpoints":
+                rows.append(_checkpoint_row(obj, meta(obj.session_id)[0]))
+            else:
+                lc_id, started = meta(obj.session_id)
+                rows.append(_analysis_row(obj, lc_id, started))
+            last = obj
+            if len(rows) >= EXPORT_BATCH:
+                _write(table, rows, f"{stamp}-{count}")
+                count, rows = count + len(rows), []
+        if rows:
+            _write(table, rows, f"{stamp}-{count}")
+            count += len(rows)
+        if last is not None:
+            state[table] = {"ts": getattr(last, ts_col.key).isoformat(), "id": last.id}
+        exported[table] = count
+
+    _save_state(state)
+    if any(exported.values()) or not os.path.isdir(os.path.join(ANALYTICS_DIR, "aggregates")):
+        build_aggregates()
+    return exported
+
+
+def _dataset(table: str):
+    pa = _pa()
+    path = os.path.join(ANALYTICS_DIR, table)
+    if not os.path.isdir(path):
+        return None
+    partitioning = pa.dataset.partitioning(pa.schema([("day", pa.string()), ("lc_id", pa.string())]), flavor="hive")
+    return pa.dataset.dataset(path, format="parquet", partitioning=partitioning)
+
+
+def _latest_sessions(pa):
+    """Sessions are re-exported whenever they change; keep the newest row per session."""
+    ds = _dataset("sessions")
+    if ds is None:
+        return None
+    t = ds.to_table(columns=["session_id", "lc_id", "status", "updated_at"])
+    t = t.sort_by([("session_id", "ascending"), ("updated_at", "descending")])
+    ids = t.column("session_id").to_pylist()
+    keep = [i for i in range(len(ids)) if i == 0 or ids[i] != ids[i - 1]]
+    return t.take(pa.array(keep, type=pa.int64()))
+
+
+def build_aggregates() -> dict:
+    """Recompute the aggregate tables from the exported Parquet (never from the app DB)."""
+    pa = _pa()
+    import pyarrow.compute as pc
+
+    out_dir = os.path.join(ANALYTICS_DIR, "aggregates")
+    os.makedirs(out_dir, exist_ok=True)
+    ds = _dataset("analyses")
+    if ds is None:
+        return {}
+    analyses = ds.to_table(columns=[
+        "session_id", "lc_id", "day", "trigger_type", "created_at", "session_started_at", "inferred_pattern",
+    ])
+    results = {}
+
+    # Which patterns users are on when they ask for help, per problem
+    stuck = analyses.filter(pc.is_in(analyses["trigger_type"], value_set=pa.array(STUCK_TRIGGERS)))
+    results["stuck_patterns"] = (
+        stuck.group_by(["lc_id", "inferred_pattern"])
+        .aggregate([("session_id", "count"), ("session_id", "count_distinct")])
+        .rename_columns(["lc_id", "inferred_pattern", "stuck_events", "sessions"])
+        .sort_by([("lc_id", "ascending"), ("stuck_events", "descending")])
+    )
+
+    # Seconds from session start to the first analysis naming the session's final pattern
+    ordered = analyses.sort_by([("session_id", "ascending"), ("created_at", "ascending")])
+    sid = ordered["session_id"].to_pylist()
+    pattern = ordered["inferred_pattern"].to_pylist()
+    created = ordered["created_at"].to_pylist()
+    started = ordered["session_started_at"].to_pylist()
+    lc = ordered["lc_id"].to_pylist()
+    rows, i = [], 0
+    while i < len(sid):
+        j = i
+        while j + 1 < len(sid) and sid[j + 1] == sid[i]:
+            j += 1
+        final = pattern[j]
+        first = next(k for k in range(i, j + 1) if pattern[k] == final)
+        if final and started[i] is not None:
+            rows.append({"lc_id": lc[i], "session_id": sid[i], "final_pattern": final,
+                         "seconds": (created[first] - started[i]).total_seconds()})
+        i = j + 1
+    per_session = pa.Table.from_pylist(rows, schema=pa.schema([
+        ("lc_id", pa.string()), ("session_id", pa.string()), ("final_pattern", pa.string()), ("seconds", pa.float64()),
+    ]))
+    results["time_to_final_pattern"] = (
+        per_session.group_by(["lc_id", "final_pattern"])
+        .aggregate([("seconds", "approximate_median"), ("seconds", "mean"), ("session_id", "count")])
+        .rename_columns(["lc_id", "final_pattern", "median_seconds", "mean_seconds", "sessions"])
+    )
+
+    results["daily_patterns"] = (
+        analyses.group_by(["day", "inferred_pattern"])
+        .aggregate([("session_id", "count")])
+        .rename_columns(["day", "inferred_pattern", "analyses"])
+        .sort_by([("day", "ascending"), ("analyses", "descending")])
+    )
+
+    sessions = _latest_sessions(pa)
+    if sessions is not None:
+        completed = pc.equal(sessions["status"], "completed").cast(pa.int64())
+        results["problem_sessions"] = (
+            sessions.append_column("completed", completed)
+            .group_by(["lc_id"])
+            .aggregate([("session_id", "count"), ("completed", "sum")])
+            .rename_columns(["lc_id", "sessions", "completed"])
+        )
+
+    for name, table in results.items():
+        pa.parquet.write_table(table, os.path.join(out_dir, f"{name}.parquet.tmp"))
+        os.replace(os.path.join(out_dir, f"{name}.parquet.tmp"), os.path.join(out_dir, f"{name}.parquet"))
+    return {name: table.num_rows for name, table in results.items()}
+
+
+def read_aggregate(name: str, lc_id: str | None = None, limit: int = 500) -> list[dict] | None:
+    if name not in AGGREGATES:
+        return None
+    pa = _pa()
+    path = os.path.join(ANALYTICS_DIR, "aggregates", f"{name}.parquet")
+    if not os.path.exists(path):
+        return None
+    table = pa.parquet.read_table(path)
+    if lc_id is not None and "lc_id" in table.column_names:
+        import pyarrow.compute as pc
+        table = table.filter(pc.equal(table["lc_id"], lc_id))
+    return table.slice(0, limit).to_pylist()
+
+
+def query_analyses(
+    lc_id: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    pattern: str | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """Filter exported analyses; lc_id and day bounds prune whole partitions before any file is read."""
+    import pyarrow.dataset as pds
+
+    ds = _dataset("analyses")
+    if ds is None:
+        return []
+    expr = None
+    for cond in (
+        pds.field("lc_id") == lc_id if lc_id else None,
+        pds.field("day") >= since if since else None,
+        pds.field("day") <= until if until else None,
+        pds.field("inferred_pattern") == " ".join(pattern.lower().split()) if pattern else None,
+    ):
+        if cond is not None:
+            expr = cond if expr is None else expr & cond
+    table = ds.head(limit, filter=expr) if expr is not None else ds.head(limit)
+    return [
+        {**row, "created_at": _iso(row["created_at"]), "session_started_at": _iso(row["session_started_at"])}
+        for row in table.to_pylist()
+    ]
+
+
+def _iso(dt: datetime | None) -> str | None:
+    return dt.isoformat() if dt else None
+
+
+if __name__ == "__main__":
+    from backend.models.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(export(db))
+    except LockHeld:
+        raise SystemExit("[Analytics] Another export is already running")
+    finally:
+        db.close()
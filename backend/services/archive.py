@@ -0,0 +1,244 @@
+"""Cold archival of completed sessions.
+
+Archive with:  python -m backend.services.archive [--days 30] [--dry-run] [--vacuum]
+
+Sessions completed more than `ARCHIVE_AFTER_DAYS` ago move into one bundle per session,
+`<ARCHIVE_DIR>/<session_id>.tar`: `rows.jsonl.zst` (the session, its checkpoints, analyses and card,
+one JSON row per line) plus the session's uploads stored as-is, since audio and images are already
+compressed. The `sessions` row stays behind as a stub with `archived_at` set and the transcript
+cleared; the first request that needs the session restores it (`ensure_restored`).
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import tarfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from backend.models.db import Session as DBSession, Checkpoint, Analysis, MentalModelCard
+from backend.services.storage import UPLOAD_DIR
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "archive"))
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_ZSTD_LEVEL = int(os.getenv("ARCHIVE_ZSTD_LEVEL", "10"))
+ROWS_NAME = "rows.jsonl.zst"
+UPLOADS_PREFIX = "uploads/"
+BUNDLE_VERSION = 1
+
+# Child tables in insert order; deletes run in reverse (analyses reference checkpoints)
+CHILD_TABLES = (Checkpoint.__table__, Analysis.__table__, MentalModelCard.__table__)
+TABLES = {t.name: t for t in (DBSession.__table__, *CHILD_TABLES)}
+
+_restore_locks: dict[str, threading.Lock] = {}
+_restore_locks_guard = threading.Lock()
+
+
+def bundle_path(session_id: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"{session_id}.tar")
+
+
+def _zstd():
+    import zstandard
+    return zstandard
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode(table, row: dict) -> dict:
+    return {
+        name: datetime.fromisoformat(value) if value is not None and isinstance(table.c[name].type, DateTime) else value
+        for name, value in row.items()
+    }
+
+
+def _dump_rows(db, session_id: str) -> tuple[bytes, int]:
+    """(compressed JSONL, uncompressed size)"""
+    session_table = DBSession.__table__
+    lines = [json.dumps({"version": BUNDLE_VERSION})]
+    for table, where in (
+        (session_table, session_table.c.id == session_id),
+        *((t, t.c.session_id == session_id) for t in CHILD_TABLES),
+    ):
+        for row in db.execute(select(table).where(where)).mappings():
+            lines.append(json.dumps({"table": table.name, "row": {k: _encode(v) for k, v in row.items()}}))
+    raw = "\n".join(lines).encode()
+    return _zstd().ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(raw), len(raw)
+
+
+def _write_bundle(session_id: str, rows: bytes) -> int:
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = bundle_path(session_id)
+    tmp = path + ".tmp"
+    with tarfile.open(tmp, "w") as tar:
+        info = tarfile.TarInfo(ROWS_NAME)
+        info.size = len(rows)
+        tar.addfile(info, io.BytesIO(rows))
+        upload_dir = os.path.join(UPLOAD_DIR, session_id)
+        if os.path.isdir(upload_dir):
+            for name in sorted(os.listdir(upload_dir)):
+                full = os.path.join(upload_dir, name)
+                if os.path.isfile(full):
+                    tar.add(full, arcname=UPLOADS_PREFIX + name)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _dir_bytes(path: str) -> int:
+    if not os.path.isdir(path):
+        return 0
+    return sum(os.path.getsize(os.path.join(path, n)) for n in os.listdir(path) if os.path.isfile(os.path.join(path, n)))
+
+
+def archive_session(db, session_id: str) -> dict:
+    """Bundle one session, then drop its child rows and uploads. The bundle is complete on disk
+    before anything is deleted, so a crash at any point leaves the session readable."""
+    session = db.get(DBSession, session_id)
+    if session is None or session.archived_at is not None:
+        return {}
+    rows, raw_bytes = _dump_rows(db, session_id)
+    upload_bytes = _dir_bytes(os.path.join(UPLOAD_DIR, session_id))
+    size = _write_bundle(session_id, rows)
+
+    for table in reversed(CHILD_TABLES):
+        db.execute(delete(table).where(table.c.session_id == session_id))
+    session.full_transcript = ""
+    session.archived_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.commit()
+    shutil.rmtree(os.path.join(UPLOAD_DIR, session_id), ignore_errors=True)
+    return {"row_bytes": raw_bytes, "upload_bytes": upload_bytes, "bundle_bytes": size}
+
+
+def archive_completed(db, days: float = ARCHIVE_AFTER_DAYS, limit: int | None = None, dry_run: bool = False) -> dict:
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    q = (
+        select(DBSession.id)
+        .where(DBSession.status == "completed", DBSession.archived_at.is_(None), DBSession.updated_at < cutoff)
+        .order_by(DBSession.updated_at)
+    )
+    if limit:
+        q = q.limit(limit)
+    session_ids = db.scalars(q).all()
+    totals = {"sessions": 0, "row_bytes": 0, "upload_bytes": 0, "bundle_bytes": 0, "failed": 0}
+    if dry_run:
+        return {**totals, "sessions": len(session_ids)}
+    for session_id in session_ids:
+        try:
+            result = archive_session(db, session_id)
+        except Exception as e:
+            db.rollback()
+            totals["failed"] += 1
+            print(f"[Archive] Failed to archive {session_id}: {e}")
+            continue
+        totals["sessions"] += bool(result)
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+
+def _restore(db, session: DBSession):
+    with tarfile.open(bundle_path(session.id)) as tar:
+        rows = _zstd().ZstdDecompressor().decompress(tar.extractfile(ROWS_NAME).read())
+        upload_dir = os.path.join(UPLOAD_DIR, session.id)
+        os.makedirs(upload_dir, exist_ok=True)
+        for member in tar.getmembers():
+            name = member.name[len(UPLOADS_PREFIX):]
+            # Flat names only: a bundle never writes outside the session's upload directory
+            if member.isfile() and member.name.startswith(UPLOADS_PREFIX) and name and "/" not in name and not name.startswith("."):
+                with open(os.path.join(upload_dir, name), "wb") as f:
+                    shutil.copyfileobj(tar.extractfile(member), f)
+
+    by_table: dict[str, list[dict]] = {}
+    for line in rows.decode().splitlines()[1:]:
+        entry = json.loads(line)
+        by_table.setdefault(entry["table"], []).append(_decode(TABLES[entry["table"]], entry["row"]))
+    archived = (by_table.get(DBSession.__tablename__) or [{}])[0]
+    for table in CHILD_TABLES:
+        if by_table.get(table.name):
+            db.execute(insert(table), by_table[table.name])
+    session.full_transcript = archived.get("full_transcript") or ""
+    session.archived_at = None
+    db.commit()
+
+
+def ensure_restored(db, session_id: str, session: DBSession | None = None) -> DBSession | None:
+    """The session, brought back from its bundle first if it was archived."""
+    session = session or db.get(DBSession, session_id)
+    if session is None or session.archived_at is None:
+        return session
+    from backend.services.hydration import hydration_cache
+
+    with _restore_locks_guard:
+        lock = _restore_locks.setdefault(session_id, threading.Lock())
+    with lock:
+        db.refresh(session)
+        if session.archived_at is None:  # another request restored it while we waited
+            return session
+        try:
+            _restore(db, session)
+        except IntegrityError:
+            # Restored concurrently by another worker process
+            db.rollback()
+            db.refresh(session)
+            return session
+        except (OSError, tarfile.TarError, KeyError, ValueError) as e:
+            db.rollback()
+            print(f"[Archive] Failed to restore {session_id}: {e}")
+            return session
+        finally:
+            with _restore_locks_guard:
+                _restore_locks.pop(session_id, None)
+    hydration_cache.invalidate(session_id)
+    try:
+        os.remove(bundle_path(session_id))
+    except FileNotFoundError:
+        pass
+    return session
+
+
+def restore_if_archived(session_id: str) -> bool:
+    """For routes that don't otherwise touch the database: restore on a miss, if a bundle exists."""
+    if not os.path.exists(bundle_path(session_id)):
+        return False
+    from backend.models.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        session = ensure_restored(db, session_id)
+        return session is not None and session.archived_at is None
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    from sqlalchemy import text
+    from backend.models.db import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Archive sessions completed more than --days ago.")
+    parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="only count the sessions that would be archived")
+    parser.add_argument("--vacuum", action="store_true", help="SQLite: return the freed pages to the filesystem")
+    parser.add_argument("--restore", metavar="SESSION_ID", help="restore one archived session now")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.restore:
+            session = ensure_restored(db, args.restore)
+            print("restored" if session is not None and session.archived_at is None else "not restored")
+        else:
+            print(archive_completed(db, args.days, args.limit, args.dry_run))
+    finally:
+        db.close()
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+            # In WAL mode the main file only shrinks once the log is checkpointed
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
@@ -0,0 +1,241 @@
+"""Audio preprocessing before storage and Whisper: decode, 16 kHz mono, energy VAD, trim, re-encode.
+
+Needs PyAV (`av`) for decoding; without it chunks pass through unchanged.
+"""
+import asyncio
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.services.storage import Blob
+
+_av = None
+_av_loaded = False
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+VAD_MIN_DBFS = float(os.getenv("VAD_MIN_DBFS", "-45"))
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+# Fixed reference level: frames louder than this are speech however loud the rest of the clip is
+VAD_SPEECH_DBFS = float(os.getenv("VAD_SPEECH_DBFS", "-30"))
+VAD_PAD_MS = 200
+MAX_GAP_MS = 600
+OPUS_BITRATE = 24000
+WHISPER_COST_PER_MIN = 0.006
+DEDUP_MAX = 4096
+
+
+def load_av():
+    """PyAV module, or None when it isn't installed. Imported on first use (or warm-up), not at startup."""
+    global _av, _av_loaded
+    if not _av_loaded:
+        _av_loaded = True
+        try:
+            import av
+            _av = av
+        except ImportError:  # optional: decoding needs PyAV (bundles ffmpeg)
+            _av = None
+    return _av
+
+
+class AudioStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chunks = 0
+        self.silent = 0
+        self.duplicates = 0
+        self.passthrough = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+
+    def add(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def snapshot(self) -> dict:
+        saved_s = self.seconds_in - self.seconds_out
+        return {
+            "chunks": self.chunks,
+            "silent_dropped": self.silent,
+            "duplicates_dropped": self.duplicates,
+            "passthrough": self.passthrough,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "whisper_seconds_in": round(self.seconds_in, 1),
+            "whisper_seconds_out": round(self.seconds_out, 1),
+            "whisper_seconds_saved": round(saved_s, 1),
+            "estimated_cost_saved_usd": round(saved_s / 60 * WHISPER_COST_PER_MIN, 4),
+        }
+
+
+audio_stats = AudioStats()
+
+
+def decode_pcm(data) -> np.ndarray:
+    """Decode any container ffmpeg understands to float32 mono samples at SAMPLE_RATE.
+
+    `data` is bytes or a seekable binary file (an upload's spool file is decoded in place)."""
+    av = load_av()
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    parts = []
+    # Explicit mode: PyAV otherwise takes it from the file object, and spool files are opened "w+b"
+    with av.open(data if hasattr(data, "read") else io.BytesIO(data), mode="r") as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                parts.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            parts.append(out.to_ndarray().reshape(-1))
+    # Scale each int16 part into one preallocated float array: no full-length intermediate copies
+    pcm = np.empty(sum(len(p) for p in parts), dtype=np.float32)
+    pos = 0
+    for part in parts:
+        np.multiply(part, 1 / 32768.0, out=pcm[pos: pos + len(part)], casting="unsafe")
+        pos += len(part)
+    return pcm
+
+
+def speech_mask(pcm: np.ndarray) -> np.ndarray:
+    """Per-frame speech flags: RMS above the noise floor + margin, dilated by VAD_PAD_MS.
+
+    The floor is estimated from the clip's quietest frames, but the threshold never rises above
+    VAD_SPEECH_DBFS: a clip without pauses has no quiet frames, and its "floor" is the speech itself.
+    A clip whose median level is clearly above VAD_MIN_DBFS is never treated as all silence."""
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    n = len(pcm) // frame
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    frames = pcm[: n * frame].reshape(n, frame)
+    db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-12)
+    threshold = max(VAD_MIN_DBFS, min(float(np.percentile(db, 10)) + VAD_MARGIN_DB, VAD_SPEECH_DBFS))
+    mask = db > threshold
+    if mask.sum() * FRAME_MS < VAD_MIN_SPEECH_MS and float(np.median(db)) > VAD_MIN_DBFS + VAD_MARGIN_DB:
+        return np.ones(n, dtype=bool)
+    pad = VAD_PAD_MS // FRAME_MS
+    if pad and mask.any():
+        mask = np.convolve(mask.astype(int), np.ones(2 * pad + 1, dtype=int), mode="same") > 0
+    return mask
+
+
+def trim_silence(pcm: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Drop leading/trailing silence and shorten internal pauses to MAX_GAP_MS."""
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    max_gap = MAX_GAP_MS // FRAME_MS
+    keep = mask.copy()
+    gap_start = None
+    for i, speech in enumerate(mask):
+        if not speech and gap_start is None:
+            gap_start = i
+        elif speech and gap_start is not None:
+            if gap_start > 0:  # internal gap: keep its first max_gap frames
+                keep[gap_start: gap_start + min(max_gap, i - gap_start)] = True
+            gap_start = None
+    idx = np.flatnonzero(keep)
+    if len(idx) == 0:
+        return pcm[:0]
+    return np.concatenate([pcm[i * frame: (i + 1) * frame] for i in idx])
+
+
+def encode_opus(pcm: np.ndarray) -> bytes:
+    av = load_av()
+    buf = io.BytesIO()
+    with av.open(buf, mode="w", format="ogg") as container:
+        stream = container.add_stream("libopus", rate=SAMPLE_RATE)
+        stream.layout = "mono"
+        stream.bit_rate = OPUS_BITRATE
+        # One second per frame, so the int16 copy never spans the whole clip
+        for start in range(0, len(pcm), SAMPLE_RATE):
+            scaled = np.clip(pcm[start: start + SAMPLE_RATE], -1, 1)
+            scaled *= 32767
+            frame = av.AudioFrame.from_ndarray(scaled.astype(np.int16).reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = start
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+def _raw(data: bytes | Blob) -> bytes:
+    return data.read() if isinstance(data, Blob) else data
+
+
+def _process(data: bytes | Blob, filename: str) -> tuple[bytes | None, str]:
+    try:
+        pcm = decode_pcm(data.open() if isinstance(data, Blob) else data)
+    except Exception as e:
+        print(f"[Audio] Decode failed, passing through: {e}")
+        audio_stats.add(chunks=1, passthrough=1, bytes_in=len(data), bytes_out=len(data))
+        return _raw(data), filename
+
+    seconds_in = len(pcm) / SAMPLE_RATE
+    mask = speech_mask(pcm)
+    if mask.sum() * FRAME_MS < VAD_MIN_SPEECH_MS:
+        audio_stats.add(chunks=1, silent=1, bytes_in=len(data), seconds_in=seconds_in)
+        return None, filename
+
+    trimmed = trim_silence(pcm, mask)
+    del pcm  # only the trimmed copy is needed from here on
+    try:
+        out = encode_opus(trimmed)
+    except Exception as e:
+        print(f"[Audio] Encode failed, passing through: {e}")
+        audio_stats.add(chunks=1, passthrough=1, bytes_in=len(data), bytes_out=len(data))
+        return _raw(data), filename
+    audio_stats.add(
+        chunks=1, bytes_in=len(data), bytes_out=len(out),
+        seconds_in=seconds_in, seconds_out=len(trimmed) / SAMPLE_RATE,
+    )
+    return out, os.path.splitext(filename)[0] + ".ogg"
+
+
+async def preprocess_audio(data: bytes | Blob | None, filename: str = "audio.webm") -> tuple[bytes | None, str]:
+    """Returns (audio, filename) ready for storage/Whisper, or (None, filename) when there's no speech.
+
+    Only the (much smaller) re-encoded speech is returned as bytes; an uploaded Blob is decoded from its file."""
+    if not data:
+        return None, filename
+    if load_av() is None:
+        audio_stats.add(chunks=1, passthrough=1, bytes_in=len(data), bytes_out=len(data))
+        return await asyncio.to_thread(_raw, data), filename
+    return await asyncio.to_thread(_process, data, filename)
+
+
+class ChunkDeduper:
+    """Remembers recent (session, content hash) pairs so re-sent chunks skip storage and STT."""
+
+    def __init__(self, max_entries: int = DEDUP_MAX):
+        self.max_entries = max_entries
+        self._seen: OrderedDict[tuple[str, str], str | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, session_id: str, digest: str) -> tuple[bool, str | None]:
+        """(duplicate?, previously stored url) for a chunk's content digest."""
+        key = (session_id, digest)
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                audio_stats.add(duplicates=1)
+                return True, self._seen[key]
+            return False, None
+
+    def remember(self, session_id: str, digest: str, url: str | None):
+        """Record a chunk once it has been handled (url None: silent), so a retry after a failure isn't
+        mistaken for a duplicate."""
+        key = (session_id, digest)
+        with self._lock:
+            self._seen[key] = url
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+
+
+chunk_deduper = ChunkDeduper()
@@ -0,0 +1,318 @@
+"""Per-session append-only audio log.
+
+Chunks are appended to `uploads/<session>/audio.log` with one JSON line per chunk in `audio.idx`
+(sequence_num, byte offset/length, start time and duration on the session timeline). Once the
+session completes, `compact` re-encodes everything into a single Opus stream (`audio.ogg`) plus an
+Ogg page index so time spans can still be served without decoding. Chunks that arrive after that
+(checkpoints still in flight at completion) go to a fresh log and are merged by another compaction.
+
+Every worker process may append to the same session, so offsets come from the log file itself and
+appends and compaction hold an flock on `audio.lock`. Spans that need re-muxing before compaction are
+cached next to the log until it changes.
+"""
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import weakref
+
+import numpy as np
+
+from backend.core.file_lock import file_lock
+from backend.services.audio import load_av, decode_pcm, encode_opus, SAMPLE_RATE
+from backend.services.storage import UPLOAD_DIR
+
+LOG_NAME = "audio.log"
+INDEX_NAME = "audio.idx"
+COMPACT_NAME = "audio.ogg"
+PAGES_NAME = "audio.pages.json"
+LOCK_NAME = "audio.lock"
+REMUX_PREFIX = "audio.remux."
+REMUX_CACHE_FILES = 8
+OPUS_RATE = 48000  # Opus granule positions are always in 48 kHz samples
+
+MEDIA_TYPES = {".ogg": "audio/ogg", ".webm": "audio/webm", ".mp3": "audio/mpeg", ".wav": "audio/wav"}
+
+# Held by appends and by compaction within this process (so they don't queue threads on the flock);
+# entries disappear once no coroutine holds or waits on them
+_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _path(session_id: str, name: str) -> str:
+    return os.path.join(UPLOAD_DIR, session_id, name)
+
+
+def chunk_url(session_id: str, sequence_num: int) -> str:
+    return f"/sessions/{session_id}/audio?seq={sequence_num}"
+
+
+def ogg_pages(data: bytes) -> list[tuple[int, int]]:
+    """(byte offset, granule position) of every Ogg page."""
+    pages, pos = [], 0
+    while pos + 27 <= len(data) and data[pos:pos + 4] == b"OggS":
+        nseg = data[pos + 26]
+        size = 27 + nseg + sum(data[pos + 27: pos + 27 + nseg])
+        pages.append((pos, int.from_bytes(data[pos + 6: pos + 14], "little", signed=True)))
+        pos += size
+    return pages
+
+
+def _pre_skip(data: bytes) -> int:
+    head = data.find(b"OpusHead")
+    return int.from_bytes(data[head + 10: head + 12], "little") if head >= 0 else 0
+
+
+def chunk_duration(data: bytes) -> float:
+    """Duration from the last Ogg/Opus granule position; falls back to probing with PyAV."""
+    if data.startswith(b"OggS") and b"OpusHead" in data[:512]:
+        last = data.rfind(b"OggS")
+        granule = int.from_bytes(data[last + 6: last + 14], "little", signed=True)
+        return max(0, granule - _pre_skip(data)) / OPUS_RATE
+    if load_av() is not None:
+        try:
+            return len(decode_pcm(data)) / SAMPLE_RATE
+        except Exception:
+            pass
+    return 0.0
+
+
+def read_index(session_id: str) -> list[dict]:
+    try:
+        with open(_path(session_id, INDEX_NAME)) as f:
+            # A line without its newline is still being written by another process
+            return [json.loads(line) for line in f if line.endswith("\n") and line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _lock(session_id: str) -> asyncio.Lock:
+    lock = _locks.get(session_id)
+    if lock is None:
+        lock = _locks[session_id] = asyncio.Lock()
+    return lock
+
+
+def _timeline_end(session_id: str) -> float:
+    """End of the last indexed chunk on the session timeline, reading only the tail of the index."""
+    try:
+        with open(_path(session_id, INDEX_NAME), "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 4096))
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return 0.0
+    for line in reversed(lines):
+        try:
+            last = json.loads(line)
+        except ValueError:
+            continue
+        return last["start_s"] + last["duration_s"]
+    return 0.0
+
+
+def _append(session_id: str, sequence_num: int, data: bytes, ext: str, duration: float) -> bool:
+    """Write one chunk and its index line under the session's file lock; True when it arrived after compaction."""
+    with file_lock(_path(session_id, LOCK_NAME)):
+        with open(_path(session_id, LOG_NAME), "ab") as f:
+            # The file's own size, not a cached tail: other processes append to it too
+            offset = os.fstat(f.fileno()).st_size
+            f.write(data)
+        entry = {
+            "seq": sequence_num, "offset": offset, "length": len(data),
+            "start_s": round(_timeline_end(session_id), 3), "duration_s": round(duration, 3), "ext": ext,
+        }
+        with open(_path(session_id, INDEX_NAME), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return os.path.exists(_path(session_id, COMPACT_NAME))
+
+
+async def append(session_id: str, sequence_num: int, data: bytes, filename: str) -> str:
+    """Append one chunk to the session log and return the URL that serves it."""
+    duration = await asyncio.to_thread(chunk_duration, data)
+    ext = os.path.splitext(filename)[1] or ".webm"
+    async with _lock(session_id):
+        late = await asyncio.to_thread(_append, session_id, sequence_num, data, ext, duration)
+    if late:
+        # Landed after the session was compacted: fold it into the compacted stream too
+        asyncio.create_task(compact(session_id))
+    return chunk_url(session_id, sequence_num)
+
+
+def _log_entries(session_id: str, seq: int | None, start: float | None, end: float | None) -> list[dict]:
+    entries = read_index(session_id)
+    if seq is not None:
+        return [e for e in entries if e["seq"] == seq][-1:]
+    if start is not None or end is not None:
+        lo, hi = start or 0.0, float("inf") if end is None else end
+        return [e for e in entries if e["start_s"] < hi and e["start_s"] + e["duration_s"] > lo]
+    return entries
+
+
+def _compacted_span(path: str, meta: dict, start: float | None, end: float | None):
+    size = os.path.getsize(path)
+    if start is None and end is None:
+        return path, [(0, size)], "audio/ogg"
+    lo = (start or 0.0) * OPUS_RATE + meta["pre_skip"]
+    hi = float("inf") if end is None else end * OPUS_RATE + meta["pre_skip"]
+    pages = meta["pages"]
+    offsets = [p[0] for p in pages] + [size]
+    # Page k holds the samples between the previous page's granule position and its own
+    picked = [k for k in range(meta["header_pages"], len(pages)) if pages[k][1] >= lo and pages[k - 1][1] < hi]
+    if not picked:
+        return None
+    header_end = offsets[meta["header_pages"]]
+    first, last = picked[0], picked[-1]
+    return path, [(0, header_end), (offsets[first], offsets[last + 1] - offsets[first])], "audio/ogg"
+
+
+def locate(
+    session_id: str, seq: int | None = None, start: float | None = None, end: float | None = None,
+) -> tuple[str | None, list[tuple[int, int]], str] | None:
+    """File path, [(offset, length)] segments and media type for a chunk or a time span.
+
+    The path is None when the span covers several logged chunks: each is its own container, so their
+    bytes don't concatenate into a playable file. Serve `remux(...)` for those instead."""
+    compact_path = _path(session_id, COMPACT_NAME)
+    if os.path.exists(compact_path):
+        with open(_path(session_id, PAGES_NAME)) as f:
+            meta = json.load(f)
+        if seq is None:
+            return _compacted_span(compact_path, meta, start, end)
+        chunk = next((c for c in meta["chunks"] if c["seq"] == seq), None)
+        if chunk is not None:
+            return _compacted_span(compact_path, meta, chunk["start_s"], chunk["start_s"] + chunk["duration_s"])
+
+    # Not compacted yet, or a late chunk that the next compaction will merge
+    entries = _log_entries(session_id, seq, start, end)
+    if not entries:
+        return None
+    if len(entries) > 1:
+        return None, [], "audio/ogg"
+    entry = entries[0]
+    return _path(session_id, LOG_NAME), [(entry["offset"], entry["length"])], MEDIA_TYPES.get(entry["ext"], "application/octet-stream")
+
+
+def _decode_chunks(session_id: str, entries: list[dict], t: float = 0.0) -> tuple[list[dict], list[np.ndarray], float]:
+    """Decode logged chunks in order: (chunk timeline entries, PCM parts, timeline end)."""
+    chunks, pcm_parts = [], []
+    with open(_path(session_id, LOG_NAME), "rb") as f:
+        for e in entries:
+            f.seek(e["offset"])
+            try:
+                pcm = decode_pcm(f.read(e["length"]))
+            except Exception as ex:
+                print(f"[AudioLog] Skipping undecodable chunk {e['seq']} in {session_id}: {ex}")
+                continue
+            duration = len(pcm) / SAMPLE_RATE
+            chunks.append({"seq": e["seq"], "start_s": round(t, 3), "duration_s": round(duration, 3)})
+            pcm_parts.append(pcm)
+            t += duration
+    return chunks, pcm_parts, t
+
+
+def _remux_path(session_id: str, entries: list[dict], start: float | None, end: float | None) -> str:
+    # Keyed by the chunks it covers and the requested span: a new append changes the key
+    key = hashlib.sha1(json.dumps([[e["seq"], e["offset"]] for e in entries] + [start, end]).encode()).hexdigest()[:16]
+    return _path(session_id, f"{REMUX_PREFIX}{key}.ogg")
+
+
+def _clear_remuxes(session_id: str, keep: int = 0):
+    cached = sorted(glob.glob(_path(session_id, f"{REMUX_PREFIX}*.ogg")), key=os.path.getmtime, reverse=True)
+    for path in cached[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def remux(session_id: str, start: float | None = None, end: float | None = None) -> bytes | None:
+    """The logged chunks overlapping a span (or all of them) re-encoded as one Ogg/Opus stream.
+
+    Cached on disk until the chunks covering the span change, so replays don't re-encode the session."""
+    entries = _log_entries(session_id, None, start, end)
+    if not entries or load_av() is None:
+        return None
+    path = _remux_path(session_id, entries, start, end)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    _, pcm_parts, _ = _decode_chunks(session_id, entries)
+    if not pcm_parts:
+        return None
+    data = encode_opus(np.concatenate(pcm_parts))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _clear_remuxes(session_id, keep=REMUX_CACHE_FILES)
+    return data
+
+
+async def compact(session_id: str) -> dict | None:
+    """Re-encode the log into one Opus stream with a page index; runs after the session completes.
+
+    Holds the append locks throughout, so a chunk is either in the log this pass reads or appended
+    after it (and then merged by the compaction that append schedules)."""
+    async with _lock(session_id):
+        try:
+            return await asyncio.to_thread(_locked_compact, session_id)
+        except Exception as e:
+            print(f"[AudioLog] Compaction failed for {session_id}: {e}")
+            return None
+
+
+def _locked_compact(session_id: str) -> dict | None:
+    if not os.path.exists(_path(session_id, INDEX_NAME)):
+        return None
+    with file_lock(_path(session_id, LOCK_NAME)):
+        return _compact(session_id)
+
+
+def _compact(session_id: str) -> dict | None:
+    entries = read_index(session_id)
+    log_path = _path(session_id, LOG_NAME)
+    if not entries or load_av() is None or not os.path.exists(log_path):
+        return None
+
+    compact_path = _path(session_id, COMPACT_NAME)
+    chunks, pcm_parts, t = [], [], 0.0
+    if os.path.exists(compact_path):
+        # Merging late chunks: the compacted stream so far comes first
+        with open(_path(session_id, PAGES_NAME)) as f:
+            chunks = json.load(f)["chunks"]
+        with open(compact_path, "rb") as f:
+            pcm_parts.append(decode_pcm(f))
+        t = len(pcm_parts[0]) / SAMPLE_RATE
+    merged = len(chunks)
+    new_chunks, new_parts, t = _decode_chunks(session_id, entries, t)
+    chunks += new_chunks
+    pcm_parts += new_parts
+    if not pcm_parts:
+        return None
+
+    data = encode_opus(np.concatenate(pcm_parts))
+    pages = ogg_pages(data)
+    meta = {
+        "pre_skip": _pre_skip(data),
+        "header_pages": sum(1 for _, g in pages if g == 0),
+        "pages": pages,
+        "chunks": chunks,
+    }
+    tmp = _path(session_id, COMPACT_NAME + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    with open(_path(session_id, PAGES_NAME + ".tmp"), "w") as f:
+        json.dump(meta, f)
+    os.replace(_path(session_id, PAGES_NAME + ".tmp"), _path(session_id, PAGES_NAME))
+    os.replace(tmp, compact_path)
+    os.remove(log_path)
+    os.remove(_path(session_id, INDEX_NAME))
+    _clear_remuxes(session_id)
+
+    log_bytes = sum(e["length"] for e in entries)
+    print(f"[AudioLog] Compacted {session_id}: {len(new_chunks)} chunks"
+          f"{f' merged into {merged}' if merged else ''}, {log_bytes} -> {len(data)} bytes")
+    return {"chunks": len(chunks), "bytes_before": log_bytes, "bytes_after": len(data), "seconds": round(t, 1)}
@@ -0,0 +1,370 @@
+import json
+
+AI_SHAPE_MARKER = "ai_viz_"
+BOARD_DIFF_MAX_CHANGES = 6  # above this a follow-up prompt is no cheaper than a full one
+
+
+def _records(whiteboard_json: str) -> dict:
+    try:
+        data = json.loads(whiteboard_json or "{}")
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if isinstance(data.get("document"), dict):  # tldraw getSnapshot(store) format
+        data = data["document"]
+    store = data.get("store", data)
+    return store if isinstance(store, dict) else {}
+
+
+def parse_shapes(whiteboard_json: str, include_ai: bool = False) -> dict[str, dict]:
+    """Flatten a tldraw store snapshot into {shape_id: {kind, label, x, y, w, h, start, end}}."""
+    records = _records(whiteboard_json)
+    shapes: dict[str, dict] = {}
+    bindings = []
+
+    for rec in records.values():
+        if not isinstance(rec, dict):
+            continue
+        if rec.get("typeName") == "binding" and rec.get("type") == "arrow":
+            bindings.append(rec)
+            continue
+        if rec.get("typeName") != "shape":
+            continue
+        shape_id = rec.get("id", "")
+        if not include_ai and AI_SHAPE_MARKER in shape_id:
+            continue
+        props = rec.get("props") or {}
+        kind = props.get("geo") if rec.get("type") == "geo" else rec.get("type", "")
+        shape = {
+            "id": shape_id,
+            "kind": kind or "shape",
+            "label": (props.get("text") or props.get("label") or "").strip(),
+            "x": float(rec.get("x") or 0),
+            "y": float(rec.get("y") or 0),
+            "w": float(props.get("w") or 0),
+            "h": float(props.get("h") or 0),
+            "start": None,
+            "end": None,
+        }
+        if rec.get("type") == "arrow":
+            # tldraw < 2.2 kept bindings inline on the arrow terminals
+            for terminal in ("start", "end"):
+                t = props.get(terminal) or {}
+                if t.get("type") == "binding":
+                    shape[terminal] = t.get("boundShapeId")
+        if rec.get("type") == "draw":
+            shape["segments"] = props.get("segments") or []
+        shapes[shape_id] = shape
+
+    for b in bindings:
+        arrow = shapes.get(b.get("fromId"))
+        terminal = (b.get("props") or {}).get("terminal")
+        if arrow and terminal in ("start", "end"):
+            arrow[terminal] = b.get("toId")
+
+    return shapes
+
+
+def describe_shape(shape: dict, shapes: dict[str, dict]) -> str:
+    text = shape["kind"]
+    if shape["label"]:
+        text += f" '{shape['label']}'"
+    if shape["kind"] == "arrow" and (shape["start"] or shape["end"]):
+        def name(sid):
+            target = shapes.get(sid)
+            if not target:
+                return "?"
+            return f"'{target['label']}'" if target["label"] else target["kind"]
+        text += f" from {name(shape['start'])} to {name(shape['end'])}"
+    return text
+
+
+def diff_boards(before_json: str, after_json: str) -> dict:
+    """Structural diff between two whiteboard snapshots. Moves/resizes are ignored, except a pointer
+    label (i/j, lo/hi, slow/fast...) moving to another array cell: that is the user's reasoning step."""
+    before = parse_shapes(before_json)
+    after = parse_shapes(after_json)
+
+    added = [describe_shape(after[i], after) for i in after.keys() - before.keys()]
+    removed = [describe_shape(before[i], before) for i in before.keys() - after.keys()]
+    relabelled = []
+    rewired = []
+    for sid in before.keys() & after.keys():
+        old, new = before[sid], after[sid]
+        if old["label"] != new["label"]:
+            relabelled.append({"shape": new["kind"], "before": old["label"], "after": new["label"]})
+        if (old["start"], old["end"]) != (new["start"], new["end"]):
+            rewired.append(describe_shape(new, after))
+
+    return {
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "relabelled": relabelled,
+        "rewired": sorted(rewired),
+        "repointed": _moved_pointers(before_json, after_json),
+    }
+
+
+def _pointer_cells(whiteboard_json: str) -> dict[str, list[tuple[int, int]]]:
+    cells: dict[str, list[tuple[int, int]]] = {}
+    for p in build_graph(whiteboard_json)["pointers"]:
+        cells.setdefault(p["name"], []).append((p["array"], p["index"]))
+    return {name: sorted(at) for name, at in cells.items()}
+
+
+def _moved_pointers(before_json: str, after_json: str) -> list[dict]:
+    before, after = _pointer_cells(before_json), _pointer_cells(after_json)
+    return [
+        {"pointer": name, "before": before.get(name, []), "after": after.get(name, [])}
+        for name in sorted(before.keys() | after.keys())
+        if before.get(name) != after.get(name)
+    ]
+
+
+def diff_size(diff: dict) -> int:
+    return sum(len(v) for v in diff.values())
+
+
+def summarize_diff(diff: dict) -> str:
+    lines = []
+    if diff["added"]:
+        lines.append("Added: " + "; ".join(diff["added"]))
+    if diff["removed"]:
+        lines.append("Removed: " + "; ".join(diff["removed"]))
+    for r in diff["relabelled"]:
+        lines.append(f"Relabelled {r['shape']}: '{r['before']}' -> '{r['after']}'")
+    if diff["rewired"]:
+        lines.append("Reconnected: " + "; ".join(diff["rewired"]))
+    for m in diff["repointed"]:
+        lines.append(f"Moved pointer '{m['pointer']}': {_cells(m['before'])} -> {_cells(m['after'])}")
+    return "\n".join(lines) or "(no whiteboard changes)"
+
+
+def _cells(at: list[tuple[int, int]]) -> str:
+    return ", ".join(f"index {i} of array {a + 1}" for a, i in at) or "no cell"
+
+
+# --- Graph model -----------------------------------------------------------
+
+POINTER_NAMES = {
+    "i", "j", "k", "l", "r", "lo", "hi", "mid", "left", "right", "slow", "fast",
+    "start", "end", "ptr", "p", "p1", "p2", "head", "tail", "top", "^", "↑", "↓",
+}
+NODE_KINDS = {
+    "rectangle", "ellipse", "oval", "diamond", "triangle", "hexagon", "octagon", "pentagon",
+    "rhombus", "rhombus-2", "trapezoid", "star", "cloud", "heart", "x-box", "check-box", "note", "frame",
+}
+HIT_MARGIN = 24.0
+
+
+def _bounds(shape: dict) -> tuple[float, float, float, float]:
+    return shape["x"], shape["y"], shape["x"] + shape["w"], shape["y"] + shape["h"]
+
+
+def _hit(shapes: list[dict], x: float, y: float) -> dict | None:
+    """Closest shape to (x, y) within HIT_MARGIN; containment wins, then the smaller shape."""
+    best, best_key = None, None
+    for s in shapes:
+        x0, y0, x1, y1 = _bounds(s)
+        dist = max(x0 - x, 0, x - x1) + max(y0 - y, 0, y - y1)
+        if dist <= HIT_MARGIN:
+            key = (dist, s["w"] * s["h"])
+            if best is None or key < best_key:
+                best, best_key = s, key
+    return best
+
+
+def _stroke_points(shape: dict) -> list[tuple[float, float]]:
+    pts = []
+    for seg in shape.get("segments") or []:
+        for p in seg.get("points") or []:
+            pts.append((shape["x"] + float(p.get("x", 0)), shape["y"] + float(p.get("y", 0))))
+    return pts
+
+
+def _classify_stroke(shape: dict) -> str:
+    """Rough reading of a freehand stroke: closed loop -> node, near-straight line -> edge."""
+    pts = _stroke_points(shape)
+    if len(pts) < 2:
+        return "unknown"
+    xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+    diag = ((max(xs) - min(xs)) ** 2 + (max(ys) - min(ys)) ** 2) ** 0.5
+    if diag < 4:
+        return "unknown"
+    length = sum(((pts[i + 1][0] - pts[i][0]) ** 2 + (pts[i + 1][1] - pts[i][1]) ** 2) ** 0.5 for i in range(len(pts) - 1))
+    gap = ((pts[-1][0] - pts[0][0]) ** 2 + (pts[-1][1] - pts[0][1]) ** 2) ** 0.5
+    if gap < 0.2 * diag and length > 1.5 * diag:
+        return "node"
+    if length and gap / length > 0.9:
+        return "line"
+    return "unknown"
+
+
+def _detect_arrays(rects: list[dict]) -> list[list[dict]]:
+    """Group rectangles that sit in a row with similar height and small gaps."""
+    arrays, used = [], set()
+    rects = sorted(rects, key=lambda s: s["x"])
+    for r in rects:
+        if r["id"] in used or not r["w"] or not r["h"]:
+            continue
+        row = [r]
+        while True:
+            last = row[-1]
+            nxt = next((
+                s for s in rects
+                if s["id"] not in used and s not in row
+                and abs(s["y"] - last["y"]) < 0.25 * last["h"]
+                and abs(s["h"] - last["h"]) < 0.25 * last["h"]
+                and -0.1 * last["w"] <= s["x"] - (last["x"] + last["w"]) < 0.3 * last["w"]
+            ), None)
+            if nxt is None:
+                break
+            row.append(nxt)
+        if len(row) >= 2:
+            arrays.append(row)
+            used.update(s["id"] for s in row)
+    return arrays
+
+
+def build_graph(whiteboard_json: str) -> dict:
+    """Turn a whiteboard snapshot into nodes, directed edges, arrays, pointers and free text."""
+    shapes = parse_shapes(whiteboard_json)
+    records = _records(whiteboard_json)
+
+    rects = [s for s in shapes.values() if s["kind"] == "rectangle"]
+    arrays = _detect_arrays(rects)
+    in_array = {c["id"]: (ai, ci) for ai, row in enumerate(arrays) for ci, c in enumerate(row)}
+
+    texts = [s for s in shapes.values() if s["kind"] == "text"]
+    pointer_texts = [t for t in texts if t["label"].lower().rstrip(":") in POINTER_NAMES]
+    notes = [t for t in texts if t not in pointer_texts]
+
+    unclassified = []
+    nodes = [s for s in shapes.values() if s["kind"] in NODE_KINDS and s["id"] not in in_array]
+    lines = []
+    for s in shapes.values():
+        if s["kind"] != "draw":
+            continue
+        kind = _classify_stroke(s)
+        if kind == "node":
+            pts = _stroke_points(s)
+            xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+            nodes.append({**s, "kind": "freehand loop", "x": min(xs), "y": min(ys),
+                          "w": max(xs) - min(xs), "h": max(ys) - min(ys)})
+        elif kind == "line":
+            lines.append(s)
+        else:
+            unclassified.append(s["id"])
+
+    targets = nodes + [c for row in arrays for c in row] + pointer_texts
+    by_id = {s["id"]: s for s in targets}
+
+    edges, pointers = [], []
+    for s in shapes.values():
+        if s["kind"] != "arrow":
+            continue
+        props = (records.get(s["id"]) or {}).get("props") or {}
+        src, dst = by_id.get(s["start"]), by_id.get(s["end"])
+        if src is None or dst is None:
+            # Unbound terminals: hit-test the arrow's end points against known shapes
+            for terminal in ("start", "end"):
+                t = props.get(terminal) or {}
+                if "x" in t and "y" in t:
+                    hit = _hit(targets, s["x"] + float(t["x"]), s["y"] + float(t["y"]))
+                    if terminal == "start" and src is None:
+                        src = hit
+                    elif terminal == "end" and dst is None:
+                        dst = hit
+        if src is None or dst is None or src is dst:
+            continue
+        head_start = props.get("arrowheadStart", "none") != "none"
+        head_end = props.get("arrowheadEnd", "arrow") != "none"
+        if head_start and not head_end:
+            src, dst = dst, src
+        if src in pointer_texts and dst["id"] in in_array:
+            pointers.append({"name": src["label"], "array": in_array[dst["id"]][0], "index": in_array[dst["id"]][1]})
+            continue
+        edges.append({
+            "from": src["id"], "to": dst["id"], "label": s["label"],
+            "directed": head_start != head_end,
+        })
+
+    for s in lines:
+        pts = _stroke_points(s)
+        a, b = _hit(nodes, *pts[0]), _hit(nodes, *pts[-1])
+        if a and b and a is not b:
+            edges.append({"from": a["id"], "to": b["id"], "label": "", "directed": False})
+        else:
+            unclassified.append(s["id"])
+
+    # Pointer labels sitting just above/below an array cell
+    for t in pointer_texts:
+        if any(p["name"] == t["label"] for p in pointers):
+            continue
+        cx = t["x"] + t["w"] / 2
+        for ai, row in enumerate(arrays):
+            for ci, c in enumerate(row):
+                near_y = c["y"] - 1.5 * c["h"] <= t["y"] <= c["y"] + 2.5 * c["h"]
+                if c["x"] <= cx <= c["x"] + c["w"] and near_y:
+                    pointers.append({"name": t["label"], "array": ai, "index": ci})
+                    break
+
+    return {
+        "nodes": [{"id": n["id"], "kind": n["kind"], "label": n["label"]} for n in nodes],
+        "edges": edges,
+        "arrays": [[c["label"] for c in row] for row in arrays],
+        "pointers": pointers,
+        "notes": [t["label"] for t in notes] + [p["label"] for p in pointer_texts if not any(q["name"] == p["label"] for q in pointers)],
+        "unclassified": unclassified,
+    }
+
+
+def _structure_name(graph: dict) -> str:
+    nodes, edges = graph["nodes"], graph["edges"]
+    if not edges:
+        return "shapes"
+    directed = all(e["directed"] for e in edges)
+    indeg: dict[str, int] = {}
+    outdeg: dict[str, int] = {}
+    for e in edges:
+        indeg[e["to"]] = indeg.get(e["to"], 0) + 1
+        outdeg[e["from"]] = outdeg.get(e["from"], 0) + 1
+    if directed and len(edges) == len(nodes) - 1 and all(v <= 1 for v in indeg.values()):
+        if all(v <= 1 for v in outdeg.values()):
+            return "chain (linked-list like)"
+        return "tree"
+    return "directed graph" if directed else "graph"
+
+
+def describe_board(whiteboard_json: str) -> dict:
+    """Deterministic replacement for the vision pre-pass. Returns {visual_description, graph}."""
+    graph = build_graph(whiteboard_json)
+    names = {n["id"]: (n["label"] or n["kind"]) for n in graph["nodes"]}
+    sentences = []
+
+    for i, cells in enumerate(graph["arrays"]):
+        sentences.append(f"Array {i + 1} with {len(cells)} cells: [{', '.join(c or '_' for c in cells)}].")
+    if graph["pointers"]:
+        sentences.append("Pointer annotations: " + "; ".join(
+            f"'{p['name']}' at index {p['index']} of array {p['array'] + 1}" for p in graph["pointers"]
+        ) + ".")
+    if graph["nodes"]:
+        structure = _structure_name(graph)
+        labels = ", ".join(f"'{names[n['id']]}'" for n in graph["nodes"][:15])
+        sentences.append(f"{structure.capitalize()} with {len(graph['nodes'])} nodes ({labels}) and {len(graph['edges'])} edges.")
+    if graph["edges"]:
+        def fmt(e):
+            arrow = "->" if e["directed"] else "--"
+            label = f" [{e['label']}]" if e["label"] else ""
+            return f"{names.get(e['from'], '?')} {arrow} {names.get(e['to'], '?')}{label}"
+        sentences.append("Edges: " + ", ".join(fmt(e) for e in graph["edges"][:20]) + ".")
+    if graph["notes"]:
+        sentences.append("Text written on the board: " + "; ".join(f"'{t}'" for t in graph["notes"][:10]) + ".")
+    if graph["unclassified"]:
+        sentences.append(f"{len(graph['unclassified'])} freehand strokes could not be interpreted.")
+
+    return {
+        "visual_description": " ".join(sentences) or "The whiteboard is empty.",
+        "graph": graph,
+    }
@@ -0,0 +1,107 @@
+"""Server-driven checkpoint cadence: skip unchanged checkpoints and tell the client when to send the next one.
+
+`next_interval_s` is an upper bound for an idle client; a client whose content changes, or whose mic
+records speech, sends right away, but no sooner than `min_interval()` after its previous checkpoint."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from backend.core import metrics
+
+CHECKPOINT_MIN_INTERVAL_S = float(os.getenv("CHECKPOINT_MIN_INTERVAL_S", "5"))
+CHECKPOINT_BASE_INTERVAL_S = float(os.getenv("CHECKPOINT_BASE_INTERVAL_S", "10"))
+CHECKPOINT_MAX_INTERVAL_S = float(os.getenv("CHECKPOINT_MAX_INTERVAL_S", "60"))
+# Event-loop lag at which intervals double (capped at LOAD_MAX_FACTOR)
+CADENCE_LAG_TARGET_S = float(os.getenv("CADENCE_LAG_TARGET_S", "0.1"))
+LOAD_MAX_FACTOR = 3.0
+RATE_ALPHA = 0.3
+MAX_SESSIONS = 4096
+
+
+def content_hash(pseudocode: str, whiteboard_json: str, labels: str) -> str:
+    h = hashlib.sha1()
+    for part in (pseudocode, whiteboard_json, labels):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_factor() -> float:
+    return min(LOAD_MAX_FACTOR, 1.0 + metrics.last_event_loop_lag / CADENCE_LAG_TARGET_S)
+
+
+def min_interval() -> float:
+    """Shortest gap between two checkpoints from one client, stretched under load."""
+    return round(min(CHECKPOINT_MAX_INTERVAL_S, CHECKPOINT_MIN_INTERVAL_S * load_factor()), 1)
+
+
+class _SessionCadence:
+    __slots__ = ("hash", "rate", "idle_streak")
+
+    def __init__(self, last_hash: str | None):
+        self.hash = last_hash
+        self.rate = 0.5  # EWMA of "this checkpoint changed something"
+        self.idle_streak = 0
+
+
+class CadenceTracker:
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionCadence] = OrderedDict()
+        self._lock = threading.Lock()
+        self.checkpoints = 0
+        self.noops = 0
+        self.hint_total_s = 0.0
+
+    def known(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def observe(self, session_id: str, digest: str, has_audio: bool, last_hash: str | None = None) -> tuple[bool, float]:
+        """Record one checkpoint attempt -> (changed?, seconds until the client should send the next).
+
+        `last_hash` seeds sessions this process hasn't seen yet (restart, eviction)."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = _SessionCadence(last_hash)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+
+            changed = digest != state.hash or has_audio
+            state.rate = RATE_ALPHA * changed + (1 - RATE_ALPHA) * state.rate
+            state.idle_streak = 0 if changed else state.idle_streak + 1
+            state.hash = digest
+
+            # Busy boards approach the minimum; each idle checkpoint doubles the wait
+            interval = CHECKPOINT_MIN_INTERVAL_S + (CHECKPOINT_BASE_INTERVAL_S - CHECKPOINT_MIN_INTERVAL_S) * (1 - state.rate)
+            if state.idle_streak:
+                interval = CHECKPOINT_BASE_INTERVAL_S * 2 ** min(state.idle_streak, 6)
+            interval = min(CHECKPOINT_MAX_INTERVAL_S, max(CHECKPOINT_MIN_INTERVAL_S, interval * load_factor()))
+            if has_audio:
+                # Speech is only captured per checkpoint; keep transcripts fine-grained even under load
+                interval = min(interval, CHECKPOINT_BASE_INTERVAL_S)
+
+            self.checkpoints += 1
+            self.noops += not changed
+            self.hint_total_s += interval
+        return changed, round(interval, 1)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "checkpoints": self.checkpoints,
+            "noops": self.noops,
+            "noop_rate": round(self.noops / self.checkpoints, 3) if self.checkpoints else 0.0,
+            "mean_next_interval_s": round(self.hint_total_s / self.checkpoints, 1) if self.checkpoints else 0.0,
+            "load_factor": round(load_factor(), 2),
+            "min_interval_s": min_interval(),
+        }
+
+
+cadence_tracker = CadenceTracker()
@@ -0,0 +1,121 @@
+"""Local pattern classifier trained offline from the `analyses` table.
+
+Train with:  python -m backend.services.classifier
+"""
+import os
+import pickle
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "pattern_classifier.pkl")
+TRAIN_MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_TRAIN_MIN_CONFIDENCE", "0.6"))
+TRAIN_MIN_SAMPLES = 20
+SOURCE_TAG = "classifier"
+
+_model = None
+_model_loaded = False
+
+
+def build_document(pseudocode: str, labels: list, transcript: str, topic_tags: list) -> str:
+    label_text = " ".join(l.get("label", "") if isinstance(l, dict) else str(l) for l in labels or [])
+    tag_text = " ".join(f"tag_{t.lower().replace(' ', '_')}" for t in topic_tags or [])
+    return "\n".join([tag_text, pseudocode or "", label_text, (transcript or "")[-1500:]])
+
+
+def normalize_pattern(pattern: str) -> str:
+    return " ".join((pattern or "").strip().lower().split())
+
+
+def _load_model():
+    global _model, _model_loaded
+    if _model_loaded:
+        return _model
+    _model_loaded = True
+    try:
+        with open(MODEL_PATH, "rb") as f:
+            _model = pickle.load(f)
+    except FileNotFoundError:
+        _model = None
+    except Exception as e:
+        print(f"[Classifier] Failed to load model: {e}")
+        _model = None
+    return _model
+
+
+def classify_pattern(pseudocode: str, labels: list, transcript: str, topic_tags: list) -> tuple[str, float] | None:
+    """Return (pattern, probability) for the most likely pattern, or None if no model is trained."""
+    model = _load_model()
+    if model is None:
+        return None
+    if not (pseudocode or "").strip() and not labels and not (transcript or "").strip():
+        return None
+    try:
+        probs = model.predict_proba([build_document(pseudocode, labels, transcript, topic_tags)])[0]
+        best = int(probs.argmax())
+        return str(model.classes_[best]), float(probs[best])
+    except Exception as e:
+        print(f"[Classifier] Prediction error: {e}")
+        return None
+
+
+def load_training_rows(db) -> tuple[list[str], list[str]]:
+    from backend.models.db import Analysis, Checkpoint, Session as DBSession
+
+    rows = (
+        db.query(Analysis, Checkpoint, DBSession)
+        .join(Checkpoint, Analysis.checkpoint_id == Checkpoint.id)
+        .join(DBSession, Analysis.session_id == DBSession.id)
+        .filter(Analysis.confidence >= TRAIN_MIN_CONFIDENCE)
+        .all()
+    )
+    # Rebuild each checkpoint's transcript as it stood then (same "\n" joins as stt); the session's
+    # full_transcript also holds speech from after the checkpoint, which the live classifier never sees.
+    deltas: dict[str, list[tuple[int, str]]] = {}
+    for session_id, seq, delta in (
+        db.query(Checkpoint.session_id, Checkpoint.sequence_num, Checkpoint.transcript_delta)
+        .filter(Checkpoint.session_id.in_({session.id for _, _, session in rows}))
+        .order_by(Checkpoint.session_id, Checkpoint.sequence_num)
+    ):
+        if delta:
+            deltas.setdefault(session_id, []).append((seq, delta))
+
+    docs, targets = [], []
+    for analysis, cp, session in rows:
+        pattern = normalize_pattern(analysis.inferred_pattern)
+        if not pattern or pattern == "unknown" or f'"source": "{SOURCE_TAG}"' in (analysis.raw_llm_response or ""):
+            continue
+        problem = session.problem_json or {}
+        transcript = "\n".join(d for seq, d in deltas.get(session.id, []) if seq <= cp.sequence_num)
+        docs.append(build_document(cp.pseudocode, cp.labels, transcript, problem.get("topicTags", [])))
+        targets.append(pattern)
+    return docs, targets
+
+
+def train(db) -> dict:
+    """Fit TF-IDF + logistic regression over past analyses and persist it to MODEL_PATH."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    global _model, _model_loaded
+    docs, targets = load_training_rows(db)
+    if len(docs) < TRAIN_MIN_SAMPLES or len(set(targets)) < 2:
+        return {"trained": False, "samples": len(docs), "classes": len(set(targets))}
+
+    model = make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=2, max_features=50_000),
+        LogisticRegression(max_iter=1000, C=4.0),
+    )
+    model.fit(docs, targets)
+    with open(MODEL_PATH, "wb") as f:
+        pickle.dump(model, f)
+    _model, _model_loaded = model, True
+    return {"trained": True, "samples": len(docs), "classes": len(model.classes_)}
+
+
+if __name__ == "__main__":
+    from backend.models.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(train(db))
+    finally:
+        db.close()
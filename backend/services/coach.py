@@ -1,22 +1,34 @@
-import base64
+import asyncio
 import io
 import json
 import os
-from openai import AsyncOpenAI
-from backend.services.storage import save_file
+from backend.services.storage import Blob, save_blob, save_file
 from backend.services.tts import synthesize_hint
-from backend.prompts.coach_brain import COACH_SYSTEM_PROMPT, build_text_context
+from backend.prompts.coach_brain import (
+    COACH_SYSTEM_PROMPT, COACH_FOLLOWUP_NOTE, build_text_context, build_followup_context,
+)
 from backend.core.ws import ws_manager
+from backend.core.hedge import hedged_call
+from backend.core.admission import admission, MODES, NO_TTS, NO_TRANSCRIPTION, SMALL_MODEL, CACHED_ONLY
+from backend.core.openai_client import get_client
+from backend.core.tracing import span, record_payload, record_usage, messages_size
+from backend.services.classifier import classify_pattern, normalize_pattern, SOURCE_TAG
+from backend.services.semantic_cache import semantic_cache, embed, board_hash
+from backend.services.hydration import hydration_cache
+from backend.services.mental_model import update_card
+from backend.services.audio import preprocess_audio
+from backend.services.speculation import speculation
+from backend.services.board import (
+    diff_boards, diff_size, summarize_diff, describe_board, BOARD_DIFF_MAX_CHANGES,
+)
 from backend.models.db import Session as DBSession, Checkpoint, Analysis, generate_uuid
 
-_client: AsyncOpenAI | None = None
 
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    return _client
+COACH_MODEL = os.getenv("COACH_MODEL", "gpt-4o")
+COACH_HEDGE_MODEL = os.getenv("COACH_HEDGE_MODEL", "gpt-4o-mini")
+CLASSIFIER_SKIP_CONFIDENCE = float(os.getenv("CLASSIFIER_SKIP_CONFIDENCE", "0.85"))
+AUTO_TRIGGERS = {"pause", "stuck"}
+DEGRADED_TAG = "degraded"
 
 FALLBACK_RESPONSE = {
     "inferred_approach": {"pattern": "Unknown", "confidence": 0.0, "evidence": "Analysis unavailable"},
@@ -27,35 +39,187 @@ FALLBACK_RESPONSE = {
 }
 
 
-async def run_coach(
-    session_id: str,
-    trigger_type: str,
+async def _complete(model: str, messages: list) -> str:
+    with span("openai.chat coach", stage="openai:chat", model=model) as sp:
+        record_payload(sp, "openai", sent=messages_size(messages))
+        response = await get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+        )
+        content = response.choices[0].message.content or "{}"
+        record_usage(sp, model, response.usage)
+        record_payload(sp, "openai", received=len(content))
+        return content
+
+
+async def _analyze(
+    text_context: str,
     audio_bytes: bytes | None,
-    png_bytes: bytes | None,
-    reveal_mode: bool,
-    db,
-):
-    session = db.query(DBSession).filter_by(id=session_id).first()
-    if not session:
-        return FALLBACK_RESPONSE
+    png: Blob | None,
+    system_prompt: str = COACH_SYSTEM_PROMPT,
+    audio_name: str = "audio.webm",
+    hedge: bool = True,
+    model: str = COACH_MODEL,
+) -> tuple[dict, str]:
+    # Transcribe audio if present
+    if audio_bytes and len(audio_bytes) > 1000:
+        try:
+            audio_file = io.BytesIO(audio_bytes)
+            audio_file.name = audio_name
+            async with admission.upstream_slot():
+                with span("openai.whisper coach", stage="openai:whisper") as sp:
+                    record_payload(sp, "openai", sent=len(audio_bytes))
+                    whisper_resp = await get_client().audio.transcriptions.create(
+                        model="whisper-1",
+                        file=audio_file,
+                    )
+            audio_transcript = whisper_resp.text or ""
+            if audio_transcript:
+                text_context += f"\n\nUser just said: {audio_transcript}"
+        except Exception as e:
+            print(f"[Coach] Whisper transcription error: {e}")
 
-    analysis_id = generate_uuid()
-    snapshot_url = None
-    if png_bytes:
-        snapshot_url = await save_file(session_id, f"snap_{analysis_id}.png", png_bytes)
+    # Build message: text + image (just like pasting into a chat app)
+    user_content = [{"type": "text", "text": text_context}]
+    if png:
+        user_content.append({
+            "type": "image_url",
+            "image_url": {"url": await asyncio.to_thread(png.data_url, "image/png")},
+        })
 
-    # Gather context from DB
-    latest_cp = (
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content},
+    ]
+
+    try:
+        async with admission.upstream_slot():
+            if hedge:
+                raw, _ = await hedged_call(
+                    "coach",
+                    primary=lambda: _complete(model, messages),
+                    hedge=lambda: _complete(COACH_HEDGE_MODEL, messages),
+                )
+            else:
+                raw = await _complete(model, messages)
+        return json.loads(raw), raw
+    except Exception as e:
+        print(f"[Coach] LLM error: {e}")
+        return FALLBACK_RESPONSE, json.dumps(FALLBACK_RESPONSE)
+
+
+def _classifier_result(db, session_id: str, guess: tuple[str, float]) -> tuple[dict, str]:
+    """Build a coach response from a confident local guess, reusing the last matching LLM hints."""
+    pattern, confidence = guess
+    previous = next(
+        (
+            a for a in db.query(Analysis)
+            .filter_by(session_id=session_id)
+            .order_by(Analysis.created_at.desc())
+            .limit(20)
+            if normalize_pattern(a.inferred_pattern) == pattern
+        ),
+        None,
+    )
+    result = {
+        "source": SOURCE_TAG,
+        "inferred_approach": {
+            "pattern": previous.inferred_pattern if previous else pattern,
+            "confidence": round(confidence, 3),
+            "evidence": "Local classifier match on pseudocode, labels and transcript.",
+        },
+        "missing_pieces": previous.missing_pieces if previous else [],
+        "questions": (previous.questions if previous else None) or ["What invariant does your current approach maintain?"],
+        "micro_hint": previous.micro_hint if previous else "",
+        "reveal_outline": None,
+    }
+    return result, json.dumps(result)
+
+
+def _degraded_result(db, session_id: str, guess: tuple[str, float] | None) -> tuple[dict, str]:
+    """No LLM call: the local classifier's guess, else the session's last analysis, else a generic nudge."""
+    if guess:
+        return _classifier_result(db, session_id, guess)
+    previous = (
+        db.query(Analysis)
+        .filter(Analysis.session_id == session_id, Analysis.raw_llm_response.isnot(None))
+        .order_by(Analysis.created_at.desc())
+        .first()
+    )
+    if previous and previous.confidence > 0:
+        return json.loads(previous.raw_llm_response), previous.raw_llm_response
+    result = {**FALLBACK_RESPONSE, "source": DEGRADED_TAG}
+    return result, json.dumps(result)
+
+
+def _board_followup(db, session_id: str, latest_cp, problem: dict, audio_bytes: bytes | None, trigger_type: str):
+    """Compare the latest checkpoint with the one the previous analysis saw.
+
+    Returns ("unchanged", previous_raw) when nothing relevant changed and the previous analysis answered
+    the same trigger, ("followup", context) when a small diff can be sent instead of the full context,
+    or (None, None).
+    """
+    previous = (
+        db.query(Analysis)
+        .filter(Analysis.session_id == session_id, Analysis.checkpoint_id.isnot(None))
+        .order_by(Analysis.created_at.desc())
+        .first()
+    )
+    if not previous or not previous.raw_llm_response or previous.confidence <= 0:
+        return None, None
+    prev_cp = db.query(Checkpoint).filter_by(id=previous.checkpoint_id).first()
+    if not prev_cp:
+        return None, None
+
+    diff = diff_boards(prev_cp.whiteboard_json, latest_cp.whiteboard_json)
+    pseudocode_changed = (prev_cp.pseudocode or "") != (latest_cp.pseudocode or "")
+    new_transcript = "\n".join(
+        cp.transcript_delta for cp in (
+            db.query(Checkpoint)
+            .filter(Checkpoint.session_id == session_id, Checkpoint.sequence_num > prev_cp.sequence_num)
+            .order_by(Checkpoint.sequence_num)
+        ) if cp.transcript_delta
+    )
+    has_speech = bool(audio_bytes and len(audio_bytes) > 1000)
+
+    unchanged = diff_size(diff) == 0 and not pseudocode_changed and not new_transcript and not has_speech
+    if unchanged and previous.trigger_type == trigger_type:
+        return "unchanged", previous.raw_llm_response
+    if diff_size(diff) > BOARD_DIFF_MAX_CHANGES:
+        return None, None
+
+    context = build_followup_context(
+        problem=problem,
+        previous={
+            "pattern": previous.inferred_pattern,
+            "confidence": previous.confidence,
+            "missing_pieces": previous.missing_pieces or [],
+        },
+        board_changes=summarize_diff(diff),
+        pseudocode=latest_cp.pseudocode if pseudocode_changed else None,
+        new_transcript=new_transcript,
+        trigger_type=trigger_type,
+    )
+    return "followup", context
+
+
+def latest_checkpoint(db, session_id: str) -> Checkpoint | None:
+    return (
         db.query(Checkpoint)
         .filter_by(session_id=session_id)
         .order_by(Checkpoint.sequence_num.desc())
         .first()
     )
 
+
+def gather_context(session, latest_cp, trigger_type: str, reveal_mode: bool):
+    """(pseudocode, labels, transcript, problem, board_description, text_context) for one coach call."""
     pseudocode = latest_cp.pseudocode if latest_cp else ""
     labels = latest_cp.labels if latest_cp else []
     transcript = session.full_transcript or ""
     problem = session.problem_json or {}
+    board_description = describe_board(latest_cp.whiteboard_json)["visual_description"] if latest_cp else ""
 
     text_context = build_text_context(
         problem=problem,
@@ -64,50 +228,110 @@ async def run_coach(
         transcript=transcript,
         trigger_type=trigger_type,
         reveal_mode=reveal_mode,
+        board_description=board_description,
     )
+    return pseudocode, labels, transcript, problem, board_description, text_context
 
-    # Transcribe audio if present
-    if audio_bytes and len(audio_bytes) > 1000:
-        try:
-            audio_file = io.BytesIO(audio_bytes)
-            audio_file.name = "audio.webm"
-            whisper_resp = await _get_client().audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-            )
-            audio_transcript = whisper_resp.text or ""
-            if audio_transcript:
-                text_context += f"\n\nUser just said: {audio_transcript}"
-        except Exception as e:
-            print(f"[Coach] Whisper transcription error: {e}")
 
-    # Build message: text + image (just like pasting into a chat app)
-    user_content = [{"type": "text", "text": text_context}]
-    if png_bytes:
-        b64 = base64.b64encode(png_bytes).decode("utf-8")
-        user_content.append({
-            "type": "image_url",
-            "image_url": {"url": f"data:image/png;base64,{b64}"},
+async def run_coach(
+    session_id: str,
+    trigger_type: str,
+    audio: Blob | None,
+    png: Blob | None,
+    reveal_mode: bool,
+    db,
+):
+    session = db.query(DBSession).filter_by(id=session_id).first()
+    if not session:
+        return FALLBACK_RESPONSE
+
+    # Read once so a mode change mid-request can't mix behaviours
+    level = admission.level
+    if level >= NO_TRANSCRIPTION:
+        # Speech still reaches the transcript through checkpoints; skip the extra Whisper call
+        audio = None
+
+    # Silent clips are dropped here so they count as "no speech" everywhere below
+    audio_bytes, audio_name = await preprocess_audio(audio)
+
+    analysis_id = generate_uuid()
+    snapshot_url = None
+    if png:
+        snapshot_url = await save_blob(session_id, f"snap_{analysis_id}.png", png)
+
+    # Gather context from DB
+    latest_cp = latest_checkpoint(db, session_id)
+    pseudocode, labels, transcript, problem, board_description, text_context = gather_context(
+        session, latest_cp, trigger_type, reveal_mode,
+    )
+
+    result = None
+    guess = classify_pattern(pseudocode, labels, transcript, problem.get("topicTags", []))
+    if guess:
+        await ws_manager.broadcast(session_id, {
+            "type": "pattern_guess",
+            "pattern": guess[0],
+            "confidence": guess[1],
         })
+        if trigger_type in AUTO_TRIGGERS and not reveal_mode and guess[1] >= CLASSIFIER_SKIP_CONFIDENCE:
+            result, raw = _classifier_result(db, session_id, guess)
 
-    try:
-        response = await _get_client().chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": COACH_SYSTEM_PROMPT},
-                {"role": "user", "content": user_content},
-            ],
-            response_format={"type": "json_object"},
+    followup_context = None
+    if result is None and latest_cp and not reveal_mode:
+        mode, payload = _board_followup(db, session_id, latest_cp, problem, audio_bytes, trigger_type)
+        if mode == "unchanged":
+            raw = payload
+            result = json.loads(raw)
+        elif mode == "followup":
+            followup_context = payload
+
+    # Semantic cache: the problem and trigger are fixed per index, so only the user's own context is embedded.
+    # New speech isn't part of that context (it's transcribed in the call), so it always goes to the model.
+    cache_vector = cache_board = None
+    if result is None and session.lc_id and not reveal_mode and not audio_bytes:
+        cache_vector = embed(build_text_context(
+            problem={},
+            pseudocode=pseudocode,
+            labels=labels,
+            transcript=transcript[-2000:],
+            trigger_type="",
+            reveal_mode=False,
+        ))
+        cache_board = await asyncio.to_thread(board_hash, png)
+        cached_id = semantic_cache.lookup(session.lc_id, trigger_type, cache_vector, cache_board)
+        cached = db.query(Analysis).filter_by(id=cached_id).first() if cached_id else None
+        if cached and cached.raw_llm_response:
+            raw = cached.raw_llm_response
+            result = json.loads(raw)
+        elif cached_id:
+            semantic_cache.invalidate(cached_id)
+
+    # A background analysis of exactly this context may already be waiting
+    if result is None and latest_cp and not reveal_mode and not audio_bytes:
+        speculated = speculation.claim(session_id, latest_cp.id, trigger_type, len(transcript))
+        if speculated:
+            result, raw = speculated
+            if cache_vector is not None:
+                semantic_cache.add(session.lc_id, trigger_type, cache_vector, cache_board, analysis_id)
+
+    if result is None and level >= CACHED_ONLY:
+        result, raw = _degraded_result(db, session_id, guess)
+
+    # The hedge model becomes the only model under pressure; hedging would just double the load
+    model_options = {"model": COACH_HEDGE_MODEL, "hedge": False} if level >= SMALL_MODEL else {}
+    if result is None and followup_context:
+        result, raw = await _analyze(
+            followup_context, audio_bytes, None,
+            system_prompt=COACH_SYSTEM_PROMPT + COACH_FOLLOWUP_NOTE, audio_name=audio_name, **model_options,
         )
-        raw = response.choices[0].message.content or "{}"
-        result = json.loads(raw)
-    except Exception as e:
-        print(f"[Coach] LLM error: {e}")
-        result = FALLBACK_RESPONSE
-        raw = json.dumps(FALLBACK_RESPONSE)
+    elif result is None:
+        result, raw = await _analyze(text_context, audio_bytes, png, audio_name=audio_name, **model_options)
+        # Small-model answers would outlive the overload and be replayed at full service
+        if cache_vector is not None and result is not FALLBACK_RESPONSE and level < SMALL_MODEL:
+            semantic_cache.add(session.lc_id, trigger_type, cache_vector, cache_board, analysis_id)
 
     approach = result.get("inferred_approach", {})
-    visual_description = approach.get("evidence", "")
+    visual_description = board_description or approach.get("evidence", "")
 
     analysis = Analysis(
         id=analysis_id,
@@ -127,11 +351,13 @@ async def run_coach(
     )
     db.add(analysis)
     db.commit()
+    update_card(db, session_id, analysis)
+    hydration_cache.invalidate(session_id)
 
     # Optional TTS for the micro-hint
     hint_audio_url = None
     micro_hint = result.get("micro_hint", "")
-    if micro_hint:
+    if micro_hint and level < NO_TTS:
         tts_bytes = await synthesize_hint(micro_hint)
         if tts_bytes:
             hint_audio_url = await save_file(session_id, f"hint_{analysis_id}.mp3", tts_bytes)
@@ -146,6 +372,7 @@ async def run_coach(
         "micro_hint": micro_hint,
         "reveal_outline": result.get("reveal_outline"),
         "hint_audio_url": hint_audio_url,
+        "service_mode": MODES[level],
     }
 
     await ws_manager.broadcast(session_id, {
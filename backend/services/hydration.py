@@ -0,0 +1,194 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import load_only, selectinload
+
+from backend.core.serialization import dumps
+from backend.models.db import Analysis, Checkpoint, Session as DBSession
+
+HYDRATE_CACHE_SESSIONS = int(os.getenv("HYDRATE_CACHE_SESSIONS", "256"))
+
+
+def _iso(dt: datetime | None) -> str | None:
+    return dt.isoformat() if dt else None
+
+
+def encode_cursor(a: Analysis) -> str:
+    return f"{_iso(a.created_at)}|{a.id}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, str] | None:
+    if not cursor or "|" not in cursor:
+        return None
+    ts, _, analysis_id = cursor.partition("|")
+    try:
+        return datetime.fromisoformat(ts), analysis_id
+    except ValueError:
+        return None
+
+
+def analysis_dict(a: Analysis) -> dict:
+    """Same shape as the `coach_response` WS payload so the frontend can render it directly."""
+    return {
+        "analysis_id": a.id,
+        "trigger_type": a.trigger_type,
+        "checkpoint_id": a.checkpoint_id,
+        "inferred_approach": {"pattern": a.inferred_pattern, "confidence": a.confidence, "evidence": a.evidence},
+        "visual_description": a.visual_description,
+        "missing_pieces": a.missing_pieces or [],
+        "questions": a.questions or [],
+        "micro_hint": a.micro_hint,
+        "reveal_outline": a.reveal_outline,
+        "created_at": _iso(a.created_at),
+    }
+
+
+def build_hydration(
+    db,
+    session_id: str,
+    analyses_limit: int = 20,
+    analyses_before: str | None = None,
+    transcript_limit: int = 50,
+    transcript_before: int | None = None,
+) -> dict | None:
+    """Everything a reloaded session page needs, in a fixed number of bounded queries.
+
+    Analyses come newest first, keyset-paginated on (created_at, id); transcript segments come
+    newest first, keyset-paginated on sequence_num. Each page carries the cursor for the next one.
+    """
+    session = (
+        db.query(DBSession)
+        .options(selectinload(DBSession.mental_model_card))
+        .filter_by(id=session_id)
+        .first()
+    )
+    if not session:
+        return None
+
+    checkpoint_count, analysis_count = db.execute(select(
+        select(func.count(Checkpoint.id)).where(Checkpoint.session_id == session_id).scalar_subquery(),
+        select(func.count(Analysis.id)).where(Analysis.session_id == session_id).scalar_subquery(),
+    )).one()
+
+    latest = (
+        db.query(Checkpoint)
+        .filter_by(session_id=session_id)
+        .order_by(Checkpoint.sequence_num.desc())
+        .first()
+    )
+
+    q = db.query(Analysis).filter(Analysis.session_id == session_id)
+    cursor = decode_cursor(analyses_before)
+    if cursor:
+        ts, analysis_id = cursor
+        q = q.filter(or_(Analysis.created_at < ts, and_(Analysis.created_at == ts, Analysis.id < analysis_id)))
+    rows = q.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(analyses_limit + 1).all()
+    analyses, more_analyses = rows[:analyses_limit], len(rows) > analyses_limit
+
+    q = (
+        db.query(Checkpoint)
+        .options(load_only(Checkpoint.id, Checkpoint.sequence_num, Checkpoint.transcript_delta, Checkpoint.created_at))
+        .filter(Checkpoint.session_id == session_id, Checkpoint.transcript_delta.isnot(None))
+    )
+    if transcript_before is not None:
+        q = q.filter(Checkpoint.sequence_num < transcript_before)
+    rows = q.order_by(Checkpoint.sequence_num.desc()).limit(transcript_limit + 1).all()
+    segments, more_segments = rows[:transcript_limit], len(rows) > transcript_limit
+
+    card = session.mental_model_card
+    return {
+        "session_id": session.id,
+        "lc_id": session.lc_id,
+        "problem": session.problem_json,
+        "status": session.status,
+        "created_at": _iso(session.created_at),
+        "checkpoint_count": checkpoint_count,
+        "analysis_count": analysis_count,
+        "latest_checkpoint": {
+            "checkpoint_id": latest.id,
+            "sequence_num": latest.sequence_num,
+            "pseudocode": latest.pseudocode,
+            "whiteboard_json": latest.whiteboard_json,
+            "labels": latest.labels or [],
+            "audio_url": latest.audio_url,
+            "created_at": _iso(latest.created_at),
+        } if latest else None,
+        "analyses": {
+            "items": [analysis_dict(a) for a in analyses],
+            "next_cursor": encode_cursor(analyses[-1]) if more_analyses else None,
+        },
+        "transcript": {
+            "items": [
+                {"sequence_num": c.sequence_num, "text": c.transcript_delta, "created_at": _iso(c.created_at)}
+                for c in segments
+            ],
+            "next_cursor": segments[-1].sequence_num if more_segments else None,
+        },
+        "mental_model_card_id": card.id if card else None,
+    }
+
+
+def etag_for(encoded: bytes) -> str:
+    return f'"{hashlib.sha1(encoded).hexdigest()}"'
+
+
+class HydrationCache:
+    """Per-session cache of encoded response bodies (LRU over sessions); dropped whenever the session gains data."""
+
+    def __init__(self, max_sessions: int = HYDRATE_CACHE_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, dict[tuple, tuple[str, bytes]]] = OrderedDict()
+        self._generation: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, session_id: str, params: tuple) -> tuple[str, bytes] | None:
+        with self._lock:
+            entry = self._sessions.get(session_id, {}).get(params)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return entry
+
+    def generation(self, session_id: str) -> int:
+        return self._generation.get(session_id, 0)
+
+    def put(self, session_id: str, params: tuple, body: dict, generation: int) -> tuple[str, bytes]:
+        """Encode once and store unless the session was invalidated while `body` was being built."""
+        encoded = dumps(body)
+        entry = (etag_for(encoded), encoded)
+        with self._lock:
+            if self._generation.get(session_id, 0) != generation:
+                return entry
+            self._sessions.setdefault(session_id, {})[params] = entry
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return entry
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._generation[session_id] = self._generation.get(session_id, 0) + 1
+            if self._sessions.pop(session_id, None) is not None:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+hydration_cache = HydrationCache()
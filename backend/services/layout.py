@@ -0,0 +1,208 @@
+import math
+
+import numpy as np
+
+BOX_W, BOX_H = 140, 50
+H_SPACING, V_SPACING = 160, 90
+COLORS = {"violet", "green", "red", "yellow"}
+LAYOUTS = {"tree", "flow", "array", "stack", "queue", "hashmap", "graph"}
+FORCE_ITERATIONS = 150
+
+
+def _layers(ids: list[str], edges: list[tuple[str, str]]) -> dict[str, int]:
+    """Longest-path layering after dropping back edges found by DFS (cycle removal)."""
+    children: dict[str, list[str]] = {i: [] for i in ids}
+    for a, b in edges:
+        children[a].append(b)
+
+    state: dict[str, int] = {}
+    dag: dict[str, list[str]] = {i: [] for i in ids}
+    for root in ids:
+        if root in state:
+            continue
+        stack = [(root, iter(children[root]))]
+        state[root] = 1
+        while stack:
+            node, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                continue  # back edge
+            else:
+                dag[node].append(nxt)
+                if nxt not in state:
+                    state[nxt] = 1
+                    stack.append((nxt, iter(children[nxt])))
+
+    indeg = {i: 0 for i in ids}
+    for a in ids:
+        for b in dag[a]:
+            indeg[b] += 1
+    layer = {i: 0 for i in ids}
+    queue = [i for i in ids if indeg[i] == 0]
+    while queue:
+        node = queue.pop(0)
+        for b in dag[node]:
+            layer[b] = max(layer[b], layer[node] + 1)
+            indeg[b] -= 1
+            if indeg[b] == 0:
+                queue.append(b)
+    return layer
+
+
+def layered_positions(ids: list[str], edges: list[tuple[str, str]], sweeps: int = 4) -> dict[str, tuple[float, float]]:
+    """Sugiyama-style layout: layering, barycenter crossing reduction, then grid coordinates."""
+    layer = _layers(ids, edges)
+    depth = max(layer.values(), default=0)
+    rows: list[list[str]] = [[] for _ in range(depth + 1)]
+    for i in ids:
+        rows[layer[i]].append(i)
+
+    parents: dict[str, list[str]] = {i: [] for i in ids}
+    kids: dict[str, list[str]] = {i: [] for i in ids}
+    for a, b in edges:
+        parents[b].append(a)
+        kids[a].append(b)
+
+    order = {i: idx for row in rows for idx, i in enumerate(row)}
+    for sweep in range(sweeps):
+        down = sweep % 2 == 0
+        seq = range(1, len(rows)) if down else range(len(rows) - 2, -1, -1)
+        for r in seq:
+            nbrs = parents if down else kids
+
+            def bary(n):
+                ns = [order[m] for m in nbrs[n]]
+                return sum(ns) / len(ns) if ns else order[n]
+            rows[r].sort(key=bary)
+            for idx, n in enumerate(rows[r]):
+                order[n] = idx
+
+    width = max((len(r) for r in rows), default=1)
+    pos = {}
+    for r, row in enumerate(rows):
+        offset = (width - len(row)) * H_SPACING / 2
+        for idx, n in enumerate(row):
+            pos[n] = (offset + idx * H_SPACING, r * V_SPACING)
+    return pos
+
+
+def force_positions(ids: list[str], edges: list[tuple[str, str]], iterations: int | None = None) -> dict[str, tuple[float, float]]:
+    """Fruchterman-Reingold with a deterministic circular start, vectorised with NumPy."""
+    n = len(ids)
+    if iterations is None:
+        # Each step is O(n^2); big graphs settle with fewer, larger steps
+        iterations = FORCE_ITERATIONS if n <= 100 else max(40, FORCE_ITERATIONS * 100 // n)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {ids[0]: (0.0, 0.0)}
+    index = {i: k for k, i in enumerate(ids)}
+    angles = np.linspace(0, 2 * math.pi, n, endpoint=False)
+    p = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    e = np.array([(index[a], index[b]) for a, b in edges if a != b], dtype=int).reshape(-1, 2)
+
+    k = math.sqrt(1.0 / n)
+    temp = 0.1
+    for _ in range(iterations):
+        delta = p[:, None, :] - p[None, :, :]
+        dist2 = np.einsum("ijk,ijk->ij", delta, delta)
+        np.fill_diagonal(dist2, 1.0)
+        np.maximum(dist2, 1e-6, out=dist2)
+        # Repulsion k^2/d along the unit vector == delta * k^2 / d^2
+        disp = np.einsum("ijk,ij->ik", delta, (k * k) / dist2)
+        if len(e):
+            d = p[e[:, 0]] - p[e[:, 1]]
+            f = d * (np.linalg.norm(d, axis=1) / k)[:, None]  # attraction d^2/k along the edge
+            for axis in (0, 1):
+                disp[:, axis] -= np.bincount(e[:, 0], weights=f[:, axis], minlength=n)
+                disp[:, axis] += np.bincount(e[:, 1], weights=f[:, axis], minlength=n)
+        length = np.maximum(np.linalg.norm(disp, axis=1), 1e-9)
+        p += disp * (np.minimum(length, temp) / length)[:, None]
+        temp *= 0.97
+
+    # Scale so the closest pair of nodes is at least one box apart, then move to the origin
+    dist = np.linalg.norm(p[:, None, :] - p[None, :, :], axis=2)
+    np.fill_diagonal(dist, np.inf)
+    scale = H_SPACING / max(dist.min(), 1e-3)
+    p = (p - p.min(axis=0)) * scale
+    return {i: (float(p[index[i], 0]), float(p[index[i], 1])) for i in ids}
+
+
+def grid_positions(ids: list[str], layout: str) -> dict[str, tuple[float, float]]:
+    if layout == "stack":
+        return {i: (0.0, k * (BOX_H + 10)) for k, i in enumerate(ids)}
+    step = BOX_W + 10 if layout == "array" else H_SPACING
+    return {i: (k * step, 0.0) for k, i in enumerate(ids)}
+
+
+def hashmap_positions(ids: list[str], edges: list[tuple[str, str]]) -> dict[str, tuple[float, float]]:
+    """Keys in the left column, each value to the right of its key."""
+    value_of = {a: b for a, b in edges}
+    values = set(value_of.values())
+    pos, row = {}, 0
+    for i in ids:
+        if i in values:
+            continue
+        pos[i] = (0.0, row * V_SPACING)
+        if i in value_of and value_of[i] not in pos:
+            pos[value_of[i]] = (H_SPACING * 1.5, row * V_SPACING)
+        row += 1
+    for i in ids:
+        if i not in pos:
+            pos[i] = (H_SPACING * 1.5, row * V_SPACING)
+            row += 1
+    return pos
+
+
+def layout_diagram(diagram: dict) -> list[dict]:
+    """Turn {"layout", "nodes", "edges", "notes"} topology into the visualizer's shape schema."""
+    nodes = [n for n in diagram.get("nodes", []) if isinstance(n, dict) and n.get("id")]
+    seen, unique = set(), []
+    for n in nodes:
+        nid = str(n["id"])
+        if nid not in seen:
+            seen.add(nid)
+            unique.append({**n, "id": nid})
+    ids = [n["id"] for n in unique]
+    edges = [
+        (str(e["from"]), str(e["to"]), str(e.get("label") or ""))
+        for e in diagram.get("edges", [])
+        if isinstance(e, dict) and str(e.get("from")) in seen and str(e.get("to")) in seen
+    ]
+    pairs = [(a, b) for a, b, _ in edges]
+
+    layout = diagram.get("layout") if diagram.get("layout") in LAYOUTS else ("flow" if edges else "array")
+    if layout in ("array", "stack", "queue"):
+        pos = grid_positions(ids, layout)
+    elif layout == "hashmap":
+        pos = hashmap_positions(ids, pairs)
+    elif layout == "graph":
+        pos = force_positions(ids, pairs)
+    else:
+        pos = layered_positions(ids, pairs)
+
+    y_offset = 0
+    title = diagram.get("title")
+    shapes: list[dict] = []
+    if title:
+        shapes.append({"type": "text", "id": "_title", "x": 0, "y": 0, "label": str(title)[:60]})
+        y_offset = 60
+
+    for n in unique:
+        x, y = pos[n["id"]]
+        color = n.get("color") if n.get("color") in COLORS else "violet"
+        shapes.append({
+            "type": "box", "id": n["id"],
+            "x": round(x), "y": round(y) + y_offset, "w": BOX_W, "h": BOX_H,
+            "label": str(n.get("label", ""))[:30], "color": color,
+        })
+    for k, (a, b, label) in enumerate(edges):
+        shapes.append({"type": "arrow", "id": f"_edge{k}", "from": a, "to": b, "label": label[:30]})
+
+    bottom = max((s["y"] + BOX_H for s in shapes if s["type"] == "box"), default=y_offset)
+    for k, note in enumerate(diagram.get("notes", []) or []):
+        shapes.append({"type": "text", "id": f"_note{k}", "x": 0, "y": bottom + 40 + k * 30, "label": str(note)[:60]})
+    return shapes
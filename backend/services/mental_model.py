@@ -0,0 +1,63 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend.models.db import Analysis, MentalModelCard, Session as DBSession
+
+CARD_UPDATE_ATTEMPTS = 3
+
+
+def fold_evolution(evolution: list[dict], analysis: Analysis) -> list[dict]:
+    """Append a step, or extend the last one when the pattern didn't change (run-length compression)."""
+    pattern = analysis.inferred_pattern or ""
+    if evolution and evolution[-1].get("pattern") == pattern:
+        last = dict(evolution[-1])
+        last["confidence"] = analysis.confidence
+        last["count"] = last.get("count", 1) + 1
+        return evolution[:-1] + [last]
+    return evolution + [{
+        "sequence_num": analysis.checkpoint_id,
+        "pattern": pattern,
+        "confidence": analysis.confidence,
+        "count": 1,
+    }]
+
+
+def _apply(card: MentalModelCard, analysis: Analysis):
+    card.final_pattern = analysis.inferred_pattern or ""
+    card.key_invariants = list(analysis.missing_pieces or [])
+    card.unanswered_questions = list(analysis.questions or [])
+    # Reassign rather than mutate: plain JSON columns don't track in-place changes
+    card.approach_evolution = fold_evolution(card.approach_evolution or [], analysis)
+
+
+def update_card(db, session_id: str, analysis: Analysis) -> MentalModelCard | None:
+    """Upsert the session's running card with one new analysis; O(1) regardless of session length.
+
+    Concurrent coach runs are serialised on the card row: locked on PostgreSQL, and on any backend a
+    commit based on a stale read fails its version check and is re-applied to the fresh row. Once the
+    session is completed its card is final and is left alone."""
+    for _ in range(CARD_UPDATE_ATTEMPTS):
+        if db.query(DBSession.status).filter_by(id=session_id).scalar() == "completed":
+            return None
+        card = db.query(MentalModelCard).filter_by(session_id=session_id).with_for_update().first()
+        if card is None:
+            card = MentalModelCard(session_id=session_id, approach_evolution=[])
+            db.add(card)
+        _apply(card, analysis)
+        try:
+            db.commit()
+            return card
+        except (IntegrityError, StaleDataError):
+            # A concurrent coach run created or updated the card first; fold into that version
+            db.rollback()
+    print(f"[Card] Could not upsert card for session {session_id}")
+    return None
+
+
+def rebuild_card(db, session_id: str) -> MentalModelCard:
+    """Fold every analysis into a fresh card (sessions that predate incremental cards)."""
+    card = MentalModelCard(session_id=session_id, approach_evolution=[])
+    for a in db.query(Analysis).filter_by(session_id=session_id).order_by(Analysis.created_at).yield_per(200):
+        _apply(card, a)
+    db.add(card)
+    return card
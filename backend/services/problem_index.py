@@ -0,0 +1,295 @@
+"""Local problem search: trigram inverted index over titles and slugs, with tag/difficulty filters.
+
+Build the catalog file at deploy time with:  python -m backend.services.problem_index
+
+The file (`problem_index.json.gz`) holds the catalog only, stored column-wise; postings are rebuilt
+on load, which for ~3500 problems is cheaper than decoding them from JSON. It isn't checked in: when
+it's missing, warm-up fetches the catalog from LeetCode and writes it, and until then search covers
+only the problems known locally (LC_SLUG_MAP and the problem cache), flagged as incomplete.
+"""
+import argparse
+import bisect
+import gzip
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+INDEX_PATH = os.getenv(
+    "PROBLEM_INDEX_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "problem_index.json.gz")
+)
+LEETCODE_GRAPHQL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+MIN_SCORE = 0.45
+PAGE_SIZE = 100
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def grams(word: str) -> list[str]:
+    """Trigrams of a word padded on the left, so a typed prefix's grams are a subset of the word's."""
+    padded = f"  {word}"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class ProblemIndex:
+    def __init__(self, problems: list[dict], complete: bool = True):
+        # False for indexes built from the local fallback rather than the LeetCode catalog
+        self.complete = complete
+        self.problems = sorted(problems, key=lambda p: p["id"])
+        self.by_id = {p["id"]: i for i, p in enumerate(self.problems)}
+        self.by_slug = {p["slug"]: i for i, p in enumerate(self.problems)}
+        # Two levels: trigrams -> vocabulary words -> problems. Fuzzy matching only ever scans the
+        # (small) vocabulary; problems are touched once per matched word.
+        self._titles = [normalize(p["title"]) for p in self.problems]
+        word_docs: dict[str, set[int]] = defaultdict(set)
+        tags: dict[str, set[int]] = defaultdict(set)
+        for doc, p in enumerate(self.problems):
+            # The number is indexed as a word too, so "15" also completes to 150-159, 1500...
+            for word in set(self._titles[doc].split()) | set(p["slug"].split("-")) | {str(p["id"])}:
+                word_docs[word].add(doc)
+            for tag in p["tags"]:
+                tags[tag.lower()].add(doc)
+            if p["difficulty"]:
+                tags[f"difficulty:{p['difficulty'].lower()}"].add(doc)
+        self._vocab = sorted(word_docs)
+        self._word_docs = [sorted(word_docs[w]) for w in self._vocab]
+        self._numbers = [w for w in self._vocab if w.isdigit()]
+        self._number_words = [i for i, w in enumerate(self._vocab) if w.isdigit()]
+        gram_words: dict[str, list[int]] = defaultdict(list)
+        for i, word in enumerate(self._vocab):
+            if word.isdigit():
+                continue
+            for g in set(grams(word)):
+                gram_words[g].append(i)
+        self._gram_words = dict(gram_words)
+        self._tags = dict(tags)
+
+    def __len__(self) -> int:
+        return len(self.problems)
+
+    def get(self, lc_id: int) -> dict | None:
+        i = self.by_id.get(lc_id)
+        return self.problems[i] if i is not None else None
+
+    def slug_for(self, lc_id: int) -> str | None:
+        p = self.get(lc_id)
+        return p["slug"] if p else None
+
+    def _allowed(self, tags: list[str] | None, difficulty: str | None) -> set[int] | None:
+        keys = [tag.lower() for tag in tags or []] + ([f"difficulty:{difficulty.lower()}"] if difficulty else [])
+        allowed = None
+        for key in keys:
+            docs = self._tags.get(key, set())
+            allowed = docs if allowed is None else allowed & docs
+        return allowed
+
+    def _match_word(self, word: str, partial: bool) -> list[tuple[float, int]]:
+        """(similarity, vocabulary index) for words close to `word`, best first.
+
+        A `partial` word (the one still being typed) also matches anything it is a prefix of."""
+        if word.isdigit():
+            # Numbers complete by prefix only; "15" is not a typo of "51"
+            lo = bisect.bisect_left(self._numbers, word)
+            hi = bisect.bisect_left(self._numbers, word + ":") if partial else lo + 1
+            return [(1.2 if self._numbers[k] == word else 1.1, self._number_words[k]) for k in range(lo, hi)]
+        word_grams = set(grams(word))
+        counts: dict[int, int] = defaultdict(int)
+        for g in word_grams:
+            for i in self._gram_words.get(g, ()):
+                counts[i] += 1
+        matches = []
+        for i, count in counts.items():
+            candidate = self._vocab[i]
+            if candidate == word:
+                sim = 1.2
+            elif partial and candidate.startswith(word):
+                sim = 1.1
+            else:
+                # Dice coefficient; a word has as many distinct grams as characters, near enough
+                sim = count / len(word_grams) if partial else 2 * count / (len(word_grams) + len(candidate))
+            if sim >= MIN_SCORE:
+                matches.append((sim, i))
+        matches.sort(reverse=True)
+        return matches
+
+    def search(self, q: str, limit: int = 10, tags: list[str] | None = None, difficulty: str | None = None) -> list[dict]:
+        allowed = self._allowed(tags, difficulty)
+        query = normalize(q.lstrip("#"))
+        if not query:
+            docs = sorted(allowed) if allowed is not None else range(len(self.problems))
+            return [self.problems[i] for i in list(docs)[:limit]]
+
+        words = query.split()
+        scores: dict[int, float] = defaultdict(float)
+        for n, word in enumerate(words):
+            seen: set[int] = set()
+            for sim, i in self._match_word(word, partial=n == len(words) - 1):
+                # Each query word counts once per problem, with its best match
+                for doc in self._word_docs[i]:
+                    if doc not in seen:
+                        seen.add(doc)
+                        scores[doc] += sim
+        exact = self.by_id.get(int(query)) if query.isdigit() else None
+        ranked = []
+        for doc, score in scores.items():
+            if allowed is not None and doc not in allowed:
+                continue
+            score /= len(words)
+            if score < MIN_SCORE:
+                continue
+            if len(words) > 1 and query in self._titles[doc]:
+                # Typed as a phrase; best of all when the title starts with it
+                score += 0.2 if self._titles[doc].startswith(query) else 0.1
+            ranked.append((doc != exact, -score, self.problems[doc]["id"], doc))
+        ranked.sort()
+        return [self.problems[doc] for *_, doc in ranked[:limit]]
+
+    def to_file(self, path: str):
+        tag_names = sorted({t for p in self.problems for t in p["tags"]})
+        tag_ids = {t: i for i, t in enumerate(tag_names)}
+        data = {
+            "version": 1,
+            "complete": self.complete,
+            "tags": tag_names,
+            "id": [p["id"] for p in self.problems],
+            "title": [p["title"] for p in self.problems],
+            "slug": [p["slug"] for p in self.problems],
+            "difficulty": [DIFFICULTIES.index(p["difficulty"]) if p["difficulty"] in DIFFICULTIES else -1 for p in self.problems],
+            "tag_ids": [[tag_ids[t] for t in p["tags"]] for p in self.problems],
+            "paid": [int(p.get("paid_only", False)) for p in self.problems],
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Every worker may build it on first start; readers only ever see a whole file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ProblemIndex":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        tags = data["tags"]
+        return cls([
+            {
+                "id": lc_id, "title": title, "slug": slug,
+                "difficulty": DIFFICULTIES[d] if d >= 0 else "",
+                "tags": [tags[t] for t in tag_ids], "paid_only": bool(paid),
+            }
+            for lc_id, title, slug, d, tag_ids, paid in zip(
+                data["id"], data["title"], data["slug"], data["difficulty"], data["tag_ids"], data["paid"],
+            )
+        ], complete=data.get("complete", True))
+
+
+_index: ProblemIndex | None = None
+_index_lock = threading.Lock()
+
+
+def load_index() -> ProblemIndex:
+    """The catalog index, read on first use (or warm-up). Until the file has been built, an incomplete
+    index over the locally known problems."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = ProblemIndex.from_file(INDEX_PATH)
+                except (FileNotFoundError, OSError, ValueError, KeyError) as e:
+                    print(f"[Problems] Search index unavailable ({e}); searching locally known problems only")
+                    _index = ProblemIndex(local_catalog(), complete=False)
+    return _index
+
+
+def ensure_catalog() -> bool:
+    """Fetch the full catalog and write the index file when no deploy step did; True once complete."""
+    global _index
+    if load_index().complete:
+        return True
+    try:
+        index = ProblemIndex(fetch_catalog())
+        index.to_file(INDEX_PATH)
+    except Exception as e:
+        print(f"[Problems] Catalog fetch failed: {e}")
+        return False
+    _index = index
+    print(f"[Problems] Built search index: {len(index)} problems -> {INDEX_PATH}")
+    return True
+
+
+CATALOG_QUERY = """
+query problemsetQuestionList($skip: Int, $limit: Int) {
+  problemsetQuestionList: questionList(categorySlug: "", limit: $limit, skip: $skip, filters: {}) {
+    total: totalNum
+    questions: data {
+      frontendQuestionId: questionFrontendId
+      title
+      titleSlug
+      difficulty
+      paidOnly: isPaidOnly
+      topicTags { name }
+    }
+  }
+}"""
+
+
+def fetch_catalog() -> list[dict]:
+    import httpx
+
+    problems, skip, total = [], 0, None
+    headers = {"Content-Type": "application/json", "Referer": "https://leetcode.com", "User-Agent": "Mozilla/5.0"}
+    with httpx.Client(timeout=20.0, headers=headers) as http:
+        while total is None or skip < total:
+            resp = http.post(LEETCODE_GRAPHQL, json={"query": CATALOG_QUERY, "variables": {"skip": skip, "limit": PAGE_SIZE}})
+            resp.raise_for_status()
+            page = resp.json()["data"]["problemsetQuestionList"]
+            total = page["total"]
+            if not page["questions"]:
+                break
+            for q in page["questions"]:
+                if not str(q["frontendQuestionId"]).isdigit():
+                    continue
+                problems.append({
+                    "id": int(q["frontendQuestionId"]), "title": q["title"], "slug": q["titleSlug"],
+                    "difficulty": q["difficulty"], "tags": [t["name"] for t in q.get("topicTags") or []],
+                    "paid_only": bool(q.get("paidOnly")),
+                })
+            skip += PAGE_SIZE
+    return problems
+
+
+def local_catalog() -> list[dict]:
+    """Offline fallback: the numbers in LC_SLUG_MAP, enriched from the problem cache."""
+    from backend.data.lc_slug_map import LC_SLUG_MAP
+    from backend.services.problems import _load_cache
+
+    cache = _load_cache()
+    problems = []
+    for lc_id, slug in LC_SLUG_MAP.items():
+        cached = cache.get(str(lc_id)) or {}
+        problems.append({
+            "id": lc_id, "slug": slug,
+            "title": cached.get("title") or slug.replace("-", " ").title(),
+            "difficulty": cached.get("difficulty", ""), "tags": cached.get("topicTags", []), "paid_only": False,
+        })
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the problem search index file.")
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="index only LC_SLUG_MAP and the local cache (marked incomplete; for development without network)",
+    )
+    parser.add_argument("--out", default=INDEX_PATH)
+    args = parser.parse_args()
+
+    catalog = local_catalog() if args.offline else fetch_catalog()
+    ProblemIndex(catalog, complete=not args.offline).to_file(args.out)
+    print(f"{len(catalog)} problems -> {args.out} ({os.path.getsize(args.out)} bytes)")
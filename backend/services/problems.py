@@ -1,12 +1,13 @@
 import json
 import os
-import httpx
 
-from backend.data.lc_slug_map import LC_SLUG_MAP
+from backend.services.problem_text import preprocess_problem
 
-CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "problems_cache.json")
-LEETCODE_GRAPHQL = "https://leetcode.com/graphql"
-ALFA_API = "https://alfa-leetcode-api.onrender.com"
+CACHE_PATH = os.getenv(
+    "PROBLEMS_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "problems_cache.json"),
+)
+LEETCODE_GRAPHQL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+ALFA_API = os.getenv("ALFA_API_URL", "https://alfa-leetcode-api.onrender.com")
 
 _cache: dict | None = None
 
@@ -17,7 +18,9 @@ def _load_cache() -> dict:
         return _cache
     try:
         with open(CACHE_PATH, "r", encoding="utf-8") as f:
-            _cache = json.load(f)
+            raw = json.load(f)
+        # Older entries hold LeetCode HTML; convert once per process rather than per prompt
+        _cache = {k: preprocess_problem(v if "title" in v else _normalize(v)) for k, v in raw.items()}
     except (FileNotFoundError, json.JSONDecodeError):
         _cache = {}
     return _cache
@@ -33,15 +36,26 @@ def _save_to_cache(lc_num: str, data: dict):
         pass
 
 
+def _slug_for(lc_num: str) -> str | None:
+    if not lc_num.isdigit():
+        return None
+    from backend.services.problem_index import load_index
+    slug = load_index().slug_for(int(lc_num))
+    if slug:
+        return slug
+    from backend.data.lc_slug_map import LC_SLUG_MAP  # large literal; loaded on first lookup / warm-up
+    return LC_SLUG_MAP.get(int(lc_num))
+
+
 def _normalize(raw: dict) -> dict:
-    return {
+    return preprocess_problem({
         "title": raw.get("questionTitle") or raw.get("title", ""),
         "description": raw.get("content") or raw.get("description", ""),
         "difficulty": raw.get("difficulty", ""),
         "constraints": raw.get("constraints", []),
         "examples": raw.get("examples", raw.get("exampleTestcases", [])),
         "topicTags": [t.get("name", t) if isinstance(t, dict) else t for t in raw.get("topicTags", [])],
-    }
+    })
 
 
 FIND_SLUG_QUERY = """
@@ -78,10 +92,12 @@ async def _fetch_via_graphql(lc_num: str) -> dict | None:
         "Referer": "https://leetcode.com",
         "User-Agent": "Mozilla/5.0",
     }
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=8.0) as http:
             # Step A: find the slug for this problem number
-            slug = LC_SLUG_MAP.get(int(lc_num)) if lc_num.isdigit() else None
+            slug = _slug_for(lc_num)
 
             if not slug:
                 resp = await http.post(LEETCODE_GRAPHQL, headers=headers, json={
@@ -109,14 +125,14 @@ async def _fetch_via_graphql(lc_num: str) -> dict | None:
             if resp.status_code == 200:
                 q = resp.json().get("data", {}).get("question")
                 if q and q.get("content"):
-                    result = {
+                    result = preprocess_problem({
                         "title": q.get("title", ""),
                         "description": q.get("content", ""),
                         "difficulty": q.get("difficulty", ""),
                         "constraints": [],
                         "examples": q.get("exampleTestcaseList", []),
                         "topicTags": [t["name"] for t in q.get("topicTags", []) if isinstance(t, dict)],
-                    }
+                    })
                     _save_to_cache(lc_num, result)
                     return result
     except Exception as e:
@@ -126,6 +142,8 @@ async def _fetch_via_graphql(lc_num: str) -> dict | None:
 
 async def _fetch_via_alfa(slug: str) -> dict | None:
     """Tier 2: Use alfa-leetcode-api as a fallback."""
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=5.0) as http:
             resp = await http.get(f"{ALFA_API}/select", params={"titleSlug": slug})
@@ -141,7 +159,9 @@ async def _fetch_via_alfa(slug: str) -> dict | None:
 async def resolve_problem(lc_id: str | None, problem_text: str | None) -> dict | None:
     """Resolve a LC problem. Works with any problem number (1–3000+)."""
     if problem_text:
-        return {"title": "Custom Problem", "description": problem_text, "constraints": [], "examples": [], "topicTags": []}
+        return preprocess_problem(
+            {"title": "Custom Problem", "description": problem_text, "constraints": [], "examples": [], "topicTags": []}
+        )
 
     if not lc_id:
         return None
@@ -156,7 +176,7 @@ async def resolve_problem(lc_id: str | None, problem_text: str | None) -> dict |
         return result
 
     # Tier 2: alfa-leetcode-api (if we have a slug)
-    slug = LC_SLUG_MAP.get(int(lc_num)) if lc_num.isdigit() else None
+    slug = _slug_for(lc_num)
     if slug:
         result = await _fetch_via_alfa(slug)
         if result:
@@ -167,6 +187,6 @@ async def resolve_problem(lc_id: str | None, problem_text: str | None) -> dict |
     cache = _load_cache()
     cached = cache.get(lc_num) or cache.get(str(lc_num))
     if cached:
-        return cached if "title" in cached else _normalize(cached)
+        return cached
 
     return None
@@ -0,0 +1,253 @@
+import re
+
+from backend.services.layout import layout_diagram, BOX_W, BOX_H, V_SPACING
+
+ARRAY_CELLS = 5
+LABEL_MAX = 30
+
+parser_stats = {"requests": 0, "hits": 0, "patterns": {}}
+
+_POINTER_PAIRS = [("left", "right"), ("lo", "hi"), ("low", "high"), ("l", "r"), ("start", "end"), ("i", "j"), ("slow", "fast")]
+
+
+def _lines(pseudocode: str) -> list[str]:
+    return [ln.strip() for ln in pseudocode.splitlines() if ln.strip() and not ln.strip().startswith(("#", "//"))]
+
+
+def _clip(text: str) -> str:
+    text = " ".join(text.split()).rstrip(":{")
+    return text if len(text) <= LABEL_MAX else text[: LABEL_MAX - 1] + "…"
+
+
+def _find_line(lines: list[str], pattern: str) -> str | None:
+    rx = re.compile(pattern, re.IGNORECASE)
+    return next((ln for ln in lines if rx.search(ln)), None)
+
+
+def _array_name(text: str, default: str = "nums") -> str:
+    m = re.search(r"\bfor\s+\w+\s+in\s+(?:range\(\s*len\(\s*)?([A-Za-z_]\w*)", text)
+    if m and m.group(1) not in ("range", "len"):
+        return m.group(1)
+    m = re.search(r"\b([A-Za-z_]\w*)\s*\[\s*(?:left|right|lo|hi|low|high|l|r|i|j|mid)\s*\]", text)
+    return m.group(1) if m else default
+
+
+def _array_with_pointers(name: str, pointers: dict[int, str], title: str, steps: list[str]) -> list[dict]:
+    """A row of cells with pointer boxes above them and the key loop steps underneath."""
+    shapes: list[dict] = [{"type": "text", "id": "_title", "x": 0, "y": 0, "label": title}]
+    cell_w, top = BOX_W // 2 + 10, 60
+    row_y = top + V_SPACING
+    for idx in range(ARRAY_CELLS):
+        label = f"{name}[{idx}]" if idx < ARRAY_CELLS - 1 else f"{name}[n-1]"
+        shapes.append({"type": "box", "id": f"cell{idx}", "x": idx * cell_w, "y": row_y, "w": cell_w - 10, "h": BOX_H,
+                       "label": label, "color": "violet"})
+    for idx, ptr in pointers.items():
+        shapes.append({"type": "box", "id": f"ptr_{ptr}", "x": idx * cell_w, "y": top, "w": cell_w - 10, "h": BOX_H - 10,
+                       "label": ptr, "color": "green"})
+        shapes.append({"type": "arrow", "id": f"_ptr_{ptr}", "from": f"ptr_{ptr}", "to": f"cell{idx}", "label": ""})
+    prev = None
+    for k, step in enumerate(steps):
+        sid = f"step{k}"
+        color = "yellow" if re.match(r"(while|if|elif|else)\b", step, re.IGNORECASE) else "violet"
+        if re.match(r"return\b", step, re.IGNORECASE):
+            color = "red"
+        shapes.append({"type": "box", "id": sid, "x": 0, "y": row_y + (k + 1) * V_SPACING, "w": BOX_W * 2, "h": BOX_H,
+                       "label": _clip(step), "color": color})
+        if prev:
+            shapes.append({"type": "arrow", "id": f"_{prev}_{sid}", "from": prev, "to": sid, "label": ""})
+        prev = sid
+    return shapes
+
+
+def _flow(title: str, layout: str, steps: list[tuple[str, str, str]], edges: list[tuple[str, str, str]], notes=()) -> list[dict]:
+    nodes = [{"id": sid, "label": _clip(label), "color": color} for sid, label, color in steps]
+    return layout_diagram({
+        "layout": layout,
+        "title": title,
+        "nodes": nodes,
+        "edges": [{"from": a, "to": b, "label": lab} for a, b, lab in edges],
+        "notes": list(notes),
+    })
+
+
+def _bfs(text: str, lines: list[str]) -> list[dict] | None:
+    if not (re.search(r"\b(queue|deque|q)\b", text) and re.search(r"\b(popleft|dequeue|pop\s*\(\s*0\s*\)|pop_front)\b", text)):
+        return None
+    start = _find_line(lines, r"\b(queue|deque|q)\b.*(=|\()") or "queue = [start]"
+    neigh = _find_line(lines, r"\bfor\b.*\b(neighbor|neighbour|nei|adj|dir|children|next)") or "for each neighbor"
+    check = _find_line(lines, r"^if\b.*\b(visited|seen)\b") or _find_line(lines, r"\b(visited|seen)\b") or "if not visited"
+    ret = _find_line(lines, r"^return\b")
+    steps = [
+        ("init", start, "green"),
+        ("pop", _find_line(lines, r"(popleft|dequeue|pop)") or "node = queue.popleft()", "violet"),
+        ("nbrs", neigh, "violet"),
+        ("check", check, "yellow"),
+        ("push", _find_line(lines, r"\b(append|enqueue|push)\b") or "queue.append(neighbor)", "violet"),
+    ]
+    edges = [("init", "pop", ""), ("pop", "nbrs", ""), ("nbrs", "check", ""), ("check", "push", "new"), ("push", "pop", "loop")]
+    if ret:
+        steps.append(("ret", ret, "red"))
+        edges.append(("pop", "ret", "empty"))
+    return _flow("BFS with a queue", "flow", steps, edges)
+
+
+# A table filled from its own earlier cells: `t[i] = ... t[i-1]`, `t[i][j] += t[i][j-2]`
+_RECURRENCE = re.compile(
+    r"\b([a-z_]\w*)\s*\[[^\]]*\](?:\s*\[[^\]]*\])?\s*[-+*]?=(?!=).*\b\1\s*(?:\[[^\]]*\]\s*)?\[\s*[a-z_]\w*\s*[-+]\s*\d+\s*\]"
+)
+
+
+def _dp(text: str, lines: list[str]) -> list[dict] | None:
+    # Only dp/memo names or a self-referencing recurrence; `table[key] = ...` alone is a hash map
+    m = re.search(r"\b(dp|memo)\s*\[", text) or _RECURRENCE.search(text)
+    if not m:
+        return None
+    name = m.group(1)
+    two_d = re.search(rf"\b{name}\s*\[[^\]]+\]\s*\[", text) is not None
+    recur = _find_line(lines, rf"\b{name}\s*\[[^\]]*\]\s*(\[[^\]]*\])?\s*[-+*]?=\s*.*\b{name}\s*\[") or f"{name}[i] = f({name}[i-1])"
+    base = _find_line(lines, rf"\b{name}\s*\[\s*0\s*\]") or f"{name}[0] = base"
+    ret = _find_line(lines, r"^return\b")
+
+    shapes: list[dict] = [{"type": "text", "id": "_title", "x": 0, "y": 0, "label": "Dynamic programming table"}]
+    cell_w = BOX_W // 2 + 10
+    rows = 3 if two_d else 1
+    for r in range(rows):
+        for c in range(ARRAY_CELLS):
+            label = f"{name}[{r}][{c}]" if two_d else f"{name}[{c}]"
+            color = "green" if (r == 0 or c == 0) and (two_d or c == 0) else "violet"
+            shapes.append({"type": "box", "id": f"cell{r}_{c}", "x": c * cell_w, "y": 60 + r * (BOX_H + 10),
+                           "w": cell_w - 10, "h": BOX_H, "label": label, "color": color})
+    target = f"cell{rows - 1}_{ARRAY_CELLS - 1}"
+    deps = [f"cell{rows - 1}_{ARRAY_CELLS - 2}"] + ([f"cell{rows - 2}_{ARRAY_CELLS - 1}"] if two_d else [])
+    for k, d in enumerate(deps):
+        shapes.append({"type": "arrow", "id": f"_dep{k}", "from": d, "to": target, "label": ""})
+    y = 60 + rows * (BOX_H + 10) + 40
+    for k, (label, color) in enumerate([(base, "green"), (recur, "violet")] + ([(ret, "red")] if ret else [])):
+        shapes.append({"type": "text", "id": f"_note{k}", "x": 0, "y": y + k * 30, "label": _clip(label)})
+    return shapes
+
+
+def _binary_search(text: str, lines: list[str]) -> list[dict] | None:
+    if not re.search(r"\bmid\b\s*=", text) or not re.search(r"\b(lo|low|left|l)\b", text):
+        return None
+    lo, hi = next(((a, b) for a, b in _POINTER_PAIRS if re.search(rf"\b{a}\b", text) and re.search(rf"\b{b}\b", text)), ("lo", "hi"))
+    steps = [s for s in (
+        _find_line(lines, r"^while\b"),
+        _find_line(lines, r"\bmid\s*="),
+        _find_line(lines, r"^if\b"),
+        _find_line(lines, r"^return\b"),
+    ) if s]
+    shapes = _array_with_pointers(_array_name("\n".join(lines)), {0: lo, ARRAY_CELLS // 2: "mid", ARRAY_CELLS - 1: hi}, "Binary search", steps)
+    return shapes
+
+
+def _two_pointers(text: str, lines: list[str]) -> list[dict] | None:
+    for a, b in _POINTER_PAIRS:
+        loop = _find_line(lines, rf"^while\b.*\b{a}\b\s*(<|<=|!=)\s*\b{b}\b")
+        if loop or (a, b) == ("slow", "fast") and re.search(r"\bslow\b", text) and re.search(r"\bfast\b", text):
+            window = re.search(r"\b(window|max_len|maxlen|best)\b", text) and (a, b) in (("left", "right"), ("l", "r"), ("i", "j"))
+            title = "Sliding window" if window and not loop else "Two pointers"
+            steps = [s for s in (
+                loop or _find_line(lines, r"^(while|for)\b"),
+                _find_line(lines, r"^if\b"),
+                _find_line(lines, rf"\b{a}\s*(\+=|=\s*{a}\s*\+)"),
+                _find_line(lines, rf"\b{b}\s*(-=|\+=|=\s*{b}\s*[-+])"),
+                _find_line(lines, r"^return\b"),
+            ) if s]
+            pointers = {0: a, 1: b} if (a, b) == ("slow", "fast") else {0: a, ARRAY_CELLS - 1: b}
+            return _array_with_pointers(_array_name("\n".join(lines)), pointers, title, steps)
+    if re.search(r"\bfor\b.*\bright\b.*\bin\b", text) and re.search(r"\bleft\b", text):
+        steps = [s for s in (
+            _find_line(lines, r"^for\b.*\bright\b"),
+            _find_line(lines, r"^while\b"),
+            _find_line(lines, r"\bleft\s*(\+=|=)"),
+            _find_line(lines, r"^return\b"),
+        ) if s]
+        return _array_with_pointers(_array_name("\n".join(lines)), {0: "left", 2: "right"}, "Sliding window", steps)
+    return None
+
+
+def _stack(text: str, lines: list[str]) -> list[dict] | None:
+    if not (re.search(r"\bstack\b", text) and re.search(r"\b(push|append)\b", text) and re.search(r"\bpop\b", text)):
+        return None
+    steps = [
+        ("loop", _find_line(lines, r"^(for|while)\b") or "for each item", "green"),
+        ("check", _find_line(lines, r"^(if|while)\b.*\bstack\b") or "if stack top matches", "yellow"),
+        ("pop", _find_line(lines, r"\bpop\b") or "stack.pop()", "violet"),
+        ("push", _find_line(lines, r"\b(push|append)\b") or "stack.push(item)", "violet"),
+    ]
+    edges = [("loop", "check", ""), ("check", "pop", "yes"), ("check", "push", "no"), ("pop", "check", ""), ("push", "loop", "next")]
+    ret = _find_line(lines, r"^return\b")
+    if ret:
+        steps.append(("ret", ret, "red"))
+        edges.append(("loop", "ret", "done"))
+    flow = _flow("Stack", "flow", steps, edges)
+
+    # Draw the stack itself to the right of the flow
+    right = max(s["x"] for s in flow if s["type"] == "box") + BOX_W + 80
+    for k, label in enumerate(("top", "…", "bottom")):
+        flow.append({"type": "box", "id": f"stack{k}", "x": right, "y": 60 + k * (BOX_H + 10), "w": BOX_W, "h": BOX_H,
+                     "label": label, "color": "violet"})
+    return flow
+
+
+def _hashmap(text: str, lines: list[str]) -> list[dict] | None:
+    m = re.search(r"\b([A-Za-z_]\w*)\s*=\s*(\{\}|dict\(\)|new\s+map|map\(\)|hashmap\(\)|counter\(|defaultdict\()", text)
+    name = m.group(1) if m else None
+    if not name:
+        hm = re.search(r"\b(seen|map|hashmap|counts?|freq|index|lookup)\b", text)
+        name = hm.group(1) if hm else None
+    if not name or not re.search(rf"\bin\s+{name}\b|\b{name}\s*\[|\b{name}\.(get|contains|has)", text):
+        return None
+    steps = [
+        ("loop", _find_line(lines, r"^for\b") or "for each element", "green"),
+        ("check", _find_line(lines, rf"^if\b.*\b{name}\b") or f"if key in {name}", "yellow"),
+        ("store", _find_line(lines, rf"\b{name}\s*\[[^\]]*\]\s*(=|\+=)") or f"{name}[key] = value", "violet"),
+    ]
+    edges = [("loop", "check", ""), ("check", "store", "no"), ("store", "loop", "next")]
+    ret = _find_line(lines, r"^return\b")
+    if ret:
+        steps.append(("ret", ret, "red"))
+        edges.append(("check", "ret", "yes"))
+    flow = _flow(f"Hash map '{name}'", "flow", steps, edges)
+
+    right = max(s["x"] for s in flow if s["type"] == "box") + BOX_W + 80
+    for k in range(2):
+        flow.append({"type": "box", "id": f"key{k}", "x": right, "y": 60 + k * V_SPACING, "w": BOX_W // 2 + 20, "h": BOX_H,
+                     "label": f"key {k + 1}", "color": "violet"})
+        flow.append({"type": "box", "id": f"val{k}", "x": right + BOX_W, "y": 60 + k * V_SPACING, "w": BOX_W // 2 + 20,
+                     "h": BOX_H, "label": f"value {k + 1}", "color": "violet"})
+        flow.append({"type": "arrow", "id": f"_kv{k}", "from": f"key{k}", "to": f"val{k}", "label": ""})
+    return flow
+
+
+PATTERNS = [
+    ("bfs", _bfs),
+    ("dp", _dp),
+    ("binary_search", _binary_search),
+    ("two_pointers", _two_pointers),
+    ("stack", _stack),
+    ("hashmap", _hashmap),
+]
+
+
+def parse_pseudocode(pseudocode: str) -> tuple[str, list[dict]] | None:
+    """Recognise stock algorithm shapes locally. Returns (pattern, shapes) or None to defer to the LLM."""
+    parser_stats["requests"] += 1
+    lines = _lines(pseudocode)
+    text = "\n".join(lines).lower()
+    for name, builder in PATTERNS:
+        shapes = builder(text, lines)
+        if shapes:
+            parser_stats["hits"] += 1
+            parser_stats["patterns"][name] = parser_stats["patterns"].get(name, 0) + 1
+            return name, shapes
+    return None
+
+
+def parser_snapshot() -> dict:
+    requests = parser_stats["requests"]
+    return {
+        **parser_stats,
+        "hit_ratio": round(parser_stats["hits"] / requests, 3) if requests else 0.0,
+    }
@@ -0,0 +1,147 @@
+import io
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from backend.services.storage import Blob
+
+try:
+    from PIL import Image
+except ImportError:  # board hashing is optional; text similarity still works without it
+    Image = None
+
+EMBED_DIM = 1024
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+BOARD_HASH_MAX_DISTANCE = int(os.getenv("SEMANTIC_CACHE_BOARD_DISTANCE", "10"))
+MAX_ENTRIES_PER_PROBLEM = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+ENTRY_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", str(7 * 24 * 3600)))
+COST_PER_CALL_USD = float(os.getenv("SEMANTIC_CACHE_COST_PER_CALL", "0.012"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def embed(text: str) -> np.ndarray:
+    """Hashed bag of words + character trigrams, L2-normalised. Deterministic and CPU-only."""
+    vec = np.zeros(EMBED_DIM, dtype=np.float32)
+    for word in _TOKEN_RE.findall(text.lower()):
+        features = [word]
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feat in features:
+            h = zlib.crc32(feat.encode("utf-8"))
+            vec[h % EMBED_DIM] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def board_hash(png: bytes | Blob | None) -> int | None:
+    """64-bit difference hash of the whiteboard PNG, or None if unavailable."""
+    if not png or Image is None:
+        return None
+    try:
+        img = Image.open(png.open() if isinstance(png, Blob) else io.BytesIO(png)).convert("L").resize((9, 8))
+        px = np.asarray(img, dtype=np.int16)
+        bits = (px[:, 1:] > px[:, :-1]).flatten()
+        return int("".join("1" if b else "0" for b in bits), 2)
+    except Exception as e:
+        print(f"[SemanticCache] Board hash error: {e}")
+        return None
+
+
+def _boards_match(a: int | None, b: int | None) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return bin(a ^ b).count("1") <= BOARD_HASH_MAX_DISTANCE
+
+
+@dataclass
+class _ProblemIndex:
+    vectors: np.ndarray = field(default_factory=lambda: np.empty((0, EMBED_DIM), dtype=np.float32))
+    analysis_ids: List[str] = field(default_factory=list)
+    board_hashes: List[int | None] = field(default_factory=list)
+    created_at: List[float] = field(default_factory=list)
+    last_used: List[float] = field(default_factory=list)
+
+    def drop(self, keep: np.ndarray):
+        self.vectors = self.vectors[keep]
+        idx = np.flatnonzero(keep)
+        self.analysis_ids = [self.analysis_ids[i] for i in idx]
+        self.board_hashes = [self.board_hashes[i] for i in idx]
+        self.created_at = [self.created_at[i] for i in idx]
+        self.last_used = [self.last_used[i] for i in idx]
+
+
+class SemanticCache:
+    """Nearest-neighbour index of prior coach analyses, one per (problem, trigger type): a hint and a
+    stuck check on the same board are answered differently, so they never share entries."""
+
+    def __init__(self):
+        self._indexes: Dict[tuple[str, str], _ProblemIndex] = {}
+        self.stats = {"lookups": 0, "hits": 0, "inserts": 0, "evictions": 0}
+
+    def _expire(self, index: _ProblemIndex, now: float):
+        keep = np.array([now - t < ENTRY_TTL_S for t in index.created_at], dtype=bool)
+        if keep.size and not keep.all():
+            self.stats["evictions"] += int((~keep).sum())
+            index.drop(keep)
+
+    def lookup(self, lc_id: str, trigger_type: str, vector: np.ndarray, board: int | None) -> str | None:
+        self.stats["lookups"] += 1
+        index = self._indexes.get((lc_id, trigger_type))
+        if index is None:
+            return None
+        now = time.time()
+        self._expire(index, now)
+        if not index.analysis_ids:
+            return None
+
+        sims = index.vectors @ vector
+        for i in np.argsort(-sims):
+            if sims[i] < SIMILARITY_THRESHOLD:
+                break
+            if _boards_match(index.board_hashes[i], board):
+                index.last_used[i] = now
+                self.stats["hits"] += 1
+                return index.analysis_ids[i]
+        return None
+
+    def add(self, lc_id: str, trigger_type: str, vector: np.ndarray, board: int | None, analysis_id: str):
+        index = self._indexes.setdefault((lc_id, trigger_type), _ProblemIndex())
+        now = time.time()
+        if len(index.analysis_ids) >= MAX_ENTRIES_PER_PROBLEM:
+            # Evict the least recently used entry
+            keep = np.ones(len(index.analysis_ids), dtype=bool)
+            keep[int(np.argmin(index.last_used))] = False
+            index.drop(keep)
+            self.stats["evictions"] += 1
+        index.vectors = np.vstack([index.vectors, vector[None, :]])
+        index.analysis_ids.append(analysis_id)
+        index.board_hashes.append(board)
+        index.created_at.append(now)
+        index.last_used.append(now)
+        self.stats["inserts"] += 1
+
+    def invalidate(self, analysis_id: str):
+        for index in self._indexes.values():
+            if analysis_id in index.analysis_ids:
+                keep = np.array([a != analysis_id for a in index.analysis_ids], dtype=bool)
+                index.drop(keep)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": sum(len(i.analysis_ids) for i in self._indexes.values()),
+            "problems": len({lc_id for lc_id, _ in self._indexes}),
+            "threshold": SIMILARITY_THRESHOLD,
+            "estimated_cost_saved_usd": round(self.stats["hits"] * COST_PER_CALL_USD, 4),
+        }
+
+
+semantic_cache = SemanticCache()
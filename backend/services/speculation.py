@@ -0,0 +1,200 @@
+"""Speculative coach analysis: after a significant board/pseudocode change, analyse the new checkpoint in
+the background so a manual trigger on the same context can be answered without waiting for the LLM."""
+import asyncio
+import difflib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.core import metrics
+from backend.core.admission import admission, NORMAL
+from backend.core.tracing import span
+from backend.services.board import diff_boards, diff_size
+
+SPECULATE_ENABLED = os.getenv("SPECULATE_ENABLED", "1") not in ("0", "false", "no")
+SPECULATE_TRIGGER = os.getenv("SPECULATE_TRIGGER", "hint")
+SPECULATE_MAX_PER_SESSION = int(os.getenv("SPECULATE_MAX_PER_SESSION", "6"))
+SPECULATE_DELAY_S = float(os.getenv("SPECULATE_DELAY_S", "4"))
+SPECULATE_MAX_LAG_S = float(os.getenv("SPECULATE_MAX_LAG_S", "0.05"))
+SPECULATE_CONCURRENCY = int(os.getenv("SPECULATE_CONCURRENCY", "2"))
+SPECULATE_TTL_S = float(os.getenv("SPECULATE_TTL_S", "600"))
+SPECULATE_COST_PER_CALL = float(os.getenv("SPECULATE_COST_PER_CALL", "0.012"))
+MIN_BOARD_CHANGES = 3
+MIN_CODE_LINES = 2
+MAX_SESSIONS = 1024
+
+
+def code_lines_changed(before: str, after: str) -> int:
+    matcher = difflib.SequenceMatcher(None, before.splitlines(), after.splitlines(), autojunk=False)
+    return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal")
+
+
+class _Pending:
+    """A finished speculative analysis, not yet persisted as an Analysis row."""
+
+    __slots__ = ("checkpoint_id", "trigger_type", "transcript_len", "result", "raw", "created")
+
+    def __init__(self, checkpoint_id: str, trigger_type: str, transcript_len: int, result: dict, raw: str):
+        self.checkpoint_id = checkpoint_id
+        self.trigger_type = trigger_type
+        self.transcript_len = transcript_len
+        self.result = result
+        self.raw = raw
+        self.created = time.monotonic()
+
+
+class _SessionSpeculation:
+    __slots__ = ("pseudocode", "whiteboard_json", "launched", "task", "in_flight", "pending")
+
+    def __init__(self):
+        self.pseudocode = ""
+        self.whiteboard_json = "{}"
+        self.launched = 0
+        self.task: asyncio.Task | None = None
+        self.in_flight = False
+        self.pending: _Pending | None = None
+
+
+class Speculator:
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionSpeculation] = OrderedDict()
+        self._lock = threading.Lock()
+        self._semaphore: asyncio.Semaphore | None = None
+        self.stats = {
+            "scheduled": 0, "superseded": 0, "skipped_cap": 0, "skipped_load": 0,
+            "launched": 0, "failed": 0, "hits": 0, "stale": 0, "wasted": 0,
+        }
+
+    def _state(self, session_id: str) -> _SessionSpeculation:
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = _SessionSpeculation()
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                self._discard(evicted)
+        self._sessions.move_to_end(session_id)
+        return state
+
+    def _discard(self, state: _SessionSpeculation):
+        if state.task and not state.task.done():
+            state.task.cancel()
+            self.stats["wasted"] += state.in_flight
+        self._discard_pending(state)
+
+    def _discard_pending(self, state: _SessionSpeculation):
+        if state.pending is not None:
+            self.stats["wasted"] += 1
+            state.pending = None
+
+    def consider(self, session_id: str, checkpoint_id: str, pseudocode: str, whiteboard_json: str):
+        """Called on checkpoint ingest; schedules a speculation when the change since the last one is significant."""
+        if not SPECULATE_ENABLED:
+            return
+        with self._lock:
+            state = self._state(session_id)
+            significant = (
+                diff_size(diff_boards(state.whiteboard_json, whiteboard_json)) >= MIN_BOARD_CHANGES
+                or code_lines_changed(state.pseudocode, pseudocode) >= MIN_CODE_LINES
+            )
+            if not significant:
+                return
+            if state.launched >= SPECULATE_MAX_PER_SESSION:
+                self.stats["skipped_cap"] += 1
+                return
+            state.pseudocode, state.whiteboard_json = pseudocode, whiteboard_json
+            if state.task and not state.task.done() and not state.in_flight:
+                # Still debouncing: the newer checkpoint wins before anything is spent
+                state.task.cancel()
+                self.stats["superseded"] += 1
+            self.stats["scheduled"] += 1
+            state.task = asyncio.create_task(self._run(session_id, checkpoint_id))
+
+    async def _run(self, session_id: str, checkpoint_id: str):
+        await asyncio.sleep(SPECULATE_DELAY_S)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(SPECULATE_CONCURRENCY)
+        # Low priority: never queue behind user-facing work, nor spend while the coach is degraded
+        if metrics.last_event_loop_lag > SPECULATE_MAX_LAG_S or self._semaphore.locked() or admission.level > NORMAL:
+            self.stats["skipped_load"] += 1
+            return
+
+        from backend.models.db import SessionLocal, Session as DBSession
+        from backend.services import coach
+
+        async with self._semaphore:
+            db = SessionLocal()
+            try:
+                session = db.get(DBSession, session_id)
+                latest_cp = coach.latest_checkpoint(db, session_id)
+                if session is None or session.status != "active" or latest_cp is None or latest_cp.id != checkpoint_id:
+                    return
+                *_, transcript, _, _, text_context = coach.gather_context(session, latest_cp, SPECULATE_TRIGGER, False)
+            finally:
+                db.close()
+
+            with self._lock:
+                state = self._sessions.get(session_id)
+                if state is None:
+                    return
+                if state.launched >= SPECULATE_MAX_PER_SESSION:
+                    self.stats["skipped_cap"] += 1
+                    return
+                state.launched += 1
+                state.in_flight = True
+                self.stats["launched"] += 1
+            try:
+                with span("coach.speculate", stage="speculation"):
+                    result, raw = await coach._analyze(text_context, None, None, hedge=False)
+            finally:
+                state.in_flight = False
+
+        if result is coach.FALLBACK_RESPONSE:
+            self.stats["failed"] += 1
+            return
+        with self._lock:
+            if self._sessions.get(session_id) is not state:  # completed or evicted meanwhile
+                self.stats["wasted"] += 1
+                return
+            self._discard_pending(state)
+            state.pending = _Pending(checkpoint_id, SPECULATE_TRIGGER, len(transcript), result, raw)
+
+    def claim(self, session_id: str, checkpoint_id: str, trigger_type: str, transcript_len: int) -> tuple[dict, str] | None:
+        """(result, raw) when the latest speculation saw exactly this checkpoint, trigger and transcript."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            pending = state.pending if state else None
+            if pending is None:
+                return None
+            if (
+                pending.checkpoint_id != checkpoint_id
+                or pending.trigger_type != trigger_type
+                or pending.transcript_len != transcript_len
+                or time.monotonic() - pending.created > SPECULATE_TTL_S
+            ):
+                self.stats["stale"] += 1
+                return None
+            state.pending = None
+            self.stats["hits"] += 1
+            return pending.result, pending.raw
+
+    def forget(self, session_id: str):
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self._discard(state)
+
+    def snapshot(self) -> dict:
+        launched = self.stats["launched"]
+        return {
+            **self.stats,
+            "sessions": len(self._sessions),
+            "pending": sum(1 for s in self._sessions.values() if s.pending is not None),
+            "hit_rate": round(self.stats["hits"] / launched, 3) if launched else 0.0,
+            "estimated_spend_usd": round(launched * SPECULATE_COST_PER_CALL, 4),
+            "estimated_wasted_usd": round(self.stats["wasted"] * SPECULATE_COST_PER_CALL, 4),
+        }
+
+
+speculation = Speculator()
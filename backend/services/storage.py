@@ -1,13 +1,116 @@
+import asyncio
+import base64
+import hashlib
 import os
+import re
+import shutil
+from typing import BinaryIO, Iterator
+
 import aiofiles
+from backend.core.tracing import span, record_payload
 
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads"))
+# Whisper rejects files over 25 MB anyway
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Multipart file parts larger than this are spooled to disk by the parser instead of kept in memory
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+B64_CHUNK_BYTES = 48 * 1024  # a multiple of 3, so chunks encode without padding in between
 
 
-async def save_file(session_id: str, filename: str, data: bytes) -> str:
+# `name.<16 hex>.ext`: the digest is part of the URL, so the file can be cached forever
+CONTENT_HASH_RE = re.compile(r"\.([0-9a-f]{16})\.[A-Za-z0-9]+$")
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class Blob:
+    """An upload left in the parser's spool file. Size and digest are taken in one streaming pass;
+    consumers then read it back in chunks or take the file object instead of a full copy of the bytes."""
+
+    __slots__ = ("file", "size", "sha256")
+
+    def __init__(self, file: BinaryIO, size: int, sha256: str):
+        self.file, self.size, self.sha256 = file, size, sha256
+
+    def __len__(self) -> int:
+        return self.size
+
+    def open(self) -> BinaryIO:
+        self.file.seek(0)
+        return self.file
+
+    def chunks(self, size: int = UPLOAD_CHUNK_BYTES) -> Iterator[memoryview]:
+        f = self.open()
+        while chunk := f.read(size):
+            yield memoryview(chunk)
+
+    def read(self) -> bytes:
+        return self.open().read()
+
+    def data_url(self, media_type: str) -> str:
+        """`data:` URL built in one buffer, so only the final string outlives the call. Blocking: reads
+        the spool file and encodes it, so async callers run it in a worker thread."""
+        out = bytearray(f"data:{media_type};base64,".encode())
+        for chunk in self.chunks(B64_CHUNK_BYTES):
+            out += base64.b64encode(chunk)
+        return out.decode("ascii")
+
+
+async def receive_upload(upload, limit: int) -> Blob | None:
+    """Stream a parsed multipart file once to size and hash it; None when it is missing or empty."""
+    if upload is None or not upload.size:
+        return None
+    if upload.size > limit:
+        raise UploadTooLarge(f"{upload.filename or 'upload'} is {upload.size} bytes; the limit is {limit}")
+    digest, size = hashlib.sha256(), 0
+    await upload.seek(0)
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLarge(f"{upload.filename or 'upload'} exceeds {limit} bytes")
+        digest.update(chunk)
+    return Blob(upload.file, size, digest.hexdigest())
+
+
+def _addressed(filename: str, sha256: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{sha256[:16]}{ext}"
+
+
+def content_addressed_name(filename: str, data: bytes) -> str:
+    return _addressed(filename, hashlib.sha256(data).hexdigest())
+
+
+async def _write(session_id: str, filename: str, size: int, write) -> str:
     session_dir = os.path.join(UPLOAD_DIR, session_id)
     os.makedirs(session_dir, exist_ok=True)
     filepath = os.path.join(session_dir, filename)
-    async with aiofiles.open(filepath, "wb") as f:
-        await f.write(data)
+    with span("save_file", stage="storage", filename=filename) as sp:
+        record_payload(sp, "storage", sent=size)
+        await write(filepath)
     return f"/uploads/{session_id}/{filename}"
+
+
+async def save_file(session_id: str, filename: str, data: bytes) -> str:
+    async def write(filepath: str):
+        async with aiofiles.open(filepath, "wb") as f:
+            await f.write(data)
+
+    return await _write(session_id, content_addressed_name(filename, data), len(data), write)
+
+
+def _copy_blob(blob: Blob, filepath: str):
+    with open(filepath, "wb") as f:
+        shutil.copyfileobj(blob.open(), f, UPLOAD_CHUNK_BYTES)
+
+
+async def save_blob(session_id: str, filename: str, blob: Blob) -> str:
+    """Copy an upload from its spool file to storage; both ends are blocking files, so in a worker thread."""
+    return await _write(
+        session_id, _addressed(filename, blob.sha256), blob.size,
+        lambda filepath: asyncio.to_thread(_copy_blob, blob, filepath),
+    )
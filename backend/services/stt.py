@@ -1,28 +1,22 @@
 import io
-import os
-from openai import AsyncOpenAI
 from backend.core.ws import ws_manager
+from backend.core.openai_client import get_client
+from backend.core.tracing import span, record_payload
+from backend.services.hydration import hydration_cache
 from datetime import datetime, timezone
 
-_client: AsyncOpenAI | None = None
 
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    return _client
-
-
-async def transcribe_audio(audio_bytes: bytes, session_id: str, db_session, checkpoint_id: str):
+async def transcribe_audio(audio_bytes: bytes, session_id: str, db_session, checkpoint_id: str, filename: str = "chunk.webm"):
     """Background task: transcribe audio via Whisper, update DB and push via WS."""
     try:
         audio_file = io.BytesIO(audio_bytes)
-        audio_file.name = "chunk.webm"
-        response = await _get_client().audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-        )
+        audio_file.name = filename
+        with span("openai.whisper checkpoint", stage="openai:whisper") as sp:
+            record_payload(sp, "openai", sent=len(audio_bytes))
+            response = await get_client().audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+            )
         transcript_delta = response.text.strip()
         if not transcript_delta:
             return
@@ -38,6 +32,7 @@ async def transcribe_audio(audio_bytes: bytes, session_id: str, db_session, chec
             session.full_transcript = (session.full_transcript or "") + sep + transcript_delta
 
         db_session.commit()
+        hydration_cache.invalidate(session_id)
 
         await ws_manager.broadcast(session_id, {
             "type": "transcript_delta",
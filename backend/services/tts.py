@@ -1,9 +1,10 @@
 import os
-import httpx
+from backend.core.tracing import span, record_payload
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")  # Rachel
 ELEVENLABS_MODEL = "eleven_flash_v2_5"
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
 
 
 async def synthesize_hint(text: str) -> bytes | None:
@@ -11,26 +12,32 @@ async def synthesize_hint(text: str) -> bytes | None:
     if not ELEVENLABS_API_KEY or not text:
         return None
 
+    import httpx
+
     try:
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                url,
-                headers={
-                    "xi-api-key": ELEVENLABS_API_KEY,
-                    "Content-Type": "application/json",
-                    "Accept": "audio/mpeg",
-                },
-                json={
-                    "text": text,
-                    "model_id": ELEVENLABS_MODEL,
-                    "voice_settings": {
-                        "stability": 0.5,
-                        "similarity_boost": 0.75,
+        url = f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
+        with span("elevenlabs.tts", stage="elevenlabs", model=ELEVENLABS_MODEL) as sp:
+            record_payload(sp, "elevenlabs", sent=len(text))
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                resp = await client.post(
+                    url,
+                    headers={
+                        "xi-api-key": ELEVENLABS_API_KEY,
+                        "Content-Type": "application/json",
+                        "Accept": "audio/mpeg",
+                    },
+                    json={
+                        "text": text,
+                        "model_id": ELEVENLABS_MODEL,
+                        "voice_settings": {
+                            "stability": 0.5,
+                            "similarity_boost": 0.75,
+                        },
                     },
-                },
-            )
+                )
+            sp.set("http.status_code", resp.status_code)
             if resp.status_code == 200:
+                record_payload(sp, "elevenlabs", received=len(resp.content))
                 return resp.content
     except Exception as e:
         print(f"[TTS] ElevenLabs error: {e}")
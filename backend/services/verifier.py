@@ -1,15 +1,6 @@
 import json
-import os
-from openai import AsyncOpenAI
-
-_client: AsyncOpenAI | None = None
-
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    return _client
+from backend.core.openai_client import get_client
+from backend.core.tracing import span, record_payload, record_usage, messages_size
 
 
 VERIFY_PROMPT = """You are a code verification engine for LeetCode-style problems.
@@ -54,6 +45,7 @@ async def verify_code(code: str, language: str, problem: dict, problem_title: st
         }
 
     desc = problem.get("description", "")
+    constraints = "; ".join(problem.get("constraints", []))
     examples = problem.get("examples", [])
     examples_str = ""
     for i, ex in enumerate(examples, 1):
@@ -64,6 +56,7 @@ async def verify_code(code: str, language: str, problem: dict, problem_title: st
 
     user_msg = f"""Problem: {problem_title or problem.get('title', 'Unknown')}
 Description: {desc[:2000]}
+Constraints: {constraints or "(none)"}
 {examples_str}
 
 Language: {language}
@@ -75,17 +68,22 @@ Code:
 Verify this solution. Trace through each test case carefully."""
 
     try:
-        response = await _get_client().chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": VERIFY_PROMPT},
-                {"role": "user", "content": user_msg},
-            ],
-            max_tokens=1200,
-            temperature=0.1,
-            response_format={"type": "json_object"},
-        )
-        raw = response.choices[0].message.content or "{}"
+        messages = [
+            {"role": "system", "content": VERIFY_PROMPT},
+            {"role": "user", "content": user_msg},
+        ]
+        with span("openai.chat verify", stage="openai:chat", model="gpt-4o") as sp:
+            record_payload(sp, "openai", sent=messages_size(messages))
+            response = await get_client().chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                max_tokens=1200,
+                temperature=0.1,
+                response_format={"type": "json_object"},
+            )
+            raw = response.choices[0].message.content or "{}"
+            record_usage(sp, "gpt-4o", response.usage)
+            record_payload(sp, "openai", received=len(raw))
         result = json.loads(raw)
         return {
             "status": result.get("status", "error"),
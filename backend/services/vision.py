@@ -1,16 +1,9 @@
 import base64
 import json
-import os
-from openai import AsyncOpenAI
+from backend.core.openai_client import get_client
+from backend.core.tracing import span, record_payload, record_usage, messages_size
+from backend.services.board import describe_board
 
-_client: AsyncOpenAI | None = None
-
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    return _client
 
 VISION_PROMPT = """This is a screenshot of a user's whiteboard while they solve an algorithm problem.
 The drawing is FREEHAND / SKETCH style — expect imperfect lines, rough shapes, and handwritten text.
@@ -52,23 +45,48 @@ description should be able to reconstruct what was drawn without seeing the imag
 Return ONLY valid JSON, no markdown fences."""
 
 
-async def describe_whiteboard(png_bytes: bytes) -> dict:
+async def describe_whiteboard(png_bytes: bytes | None, whiteboard_json: str | None = None) -> dict:
+    """Describe the whiteboard, parsing the tldraw JSON locally and only sending the PNG
+    to GPT-4o when there are freehand strokes the parser could not classify."""
+    local = describe_board(whiteboard_json) if whiteboard_json else None
+    if local and (not local["graph"]["unclassified"] or not png_bytes):
+        return {
+            "visual_description": local["visual_description"],
+            "generated_pseudocode": "",
+        }
+    if not png_bytes:
+        return {"visual_description": "", "generated_pseudocode": ""}
+
+    result = await _vision_pass(png_bytes)
+    if local:
+        result["visual_description"] = (
+            f"{local['visual_description']} Freehand content: {result['visual_description']}"
+        )
+    return result
+
+
+async def _vision_pass(png_bytes: bytes) -> dict:
     """Vision pre-pass: send whiteboard PNG to GPT-4o, return {visual_description, generated_pseudocode}."""
     try:
         b64 = base64.b64encode(png_bytes).decode("utf-8")
-        response = await _get_client().chat.completions.create(
-            model="gpt-4o",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": VISION_PROMPT},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}},
-                ],
-            }],
-            max_tokens=800,
-            response_format={"type": "json_object"},
-        )
-        raw = response.choices[0].message.content or "{}"
+        messages = [{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": VISION_PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}},
+            ],
+        }]
+        with span("openai.chat vision", stage="openai:chat", model="gpt-4o") as sp:
+            record_payload(sp, "openai", sent=messages_size(messages))
+            response = await get_client().chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                max_tokens=800,
+                response_format={"type": "json_object"},
+            )
+            raw = response.choices[0].message.content or "{}"
+            record_usage(sp, "gpt-4o", response.usage)
+            record_payload(sp, "openai", received=len(raw))
         result = json.loads(raw)
         return {
             "visual_description": result.get("visual_description", ""),
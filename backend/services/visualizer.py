@@ -1,15 +1,15 @@
 import json
 import os
-from openai import AsyncOpenAI
+from backend.core.hedge import hedged_call
+from backend.core.openai_client import get_client
+from backend.core.tracing import span, record_payload, record_usage, messages_size
+from backend.services.layout import layout_diagram
+from backend.services.pseudo_parser import parse_pseudocode
 
-_client: AsyncOpenAI | None = None
 
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    return _client
+VISUALIZE_MODEL = os.getenv("VISUALIZE_MODEL", "gpt-4o-mini")
+VISUALIZE_HEDGE_MODEL = os.getenv("VISUALIZE_HEDGE_MODEL", "gpt-4o-mini")
+MAX_SHAPES = 200
 
 
 SYSTEM_PROMPT = """You are a visualization engine that converts pseudocode into a diagram that
@@ -22,58 +22,79 @@ CRITICAL RULE: Your diagram must match the pseudocode EXACTLY.
 - If the pseudocode uses a hashmap → draw key-value boxes.
 - NEVER substitute one data structure for another. If the user wrote "graph", do NOT draw a hashmap.
 
-Given pseudocode (and optionally a problem title), produce a JSON object {"shapes": [...]} where
-each shape is one of:
-
-1. {"type":"box","id":"unique_id","x":number,"y":number,"w":number,"h":number,"label":"text","color":"violet|green|red|yellow"}
-   - Use to represent: data structure elements (graph nodes, array cells, tree nodes, stack frames, queue entries),
-     operations, conditions, function blocks.
-2. {"type":"text","id":"unique_id","x":number,"y":number,"label":"text"}
-   - Use for: titles, annotations, variable names, complexity notes.
-3. {"type":"arrow","id":"unique_id","from":"source_box_id","to":"target_box_id","label":"optional_label"}
-   - Use for: edges in a graph, pointers, data flow, traversal order.
-
-Layout rules:
-- Start at x=0, y=0. Flow top-to-bottom or left-to-right.
-- Use ~160px horizontal spacing and ~90px vertical spacing between boxes.
-- Standard box size: w=140, h=50.
+You only describe TOPOLOGY. Do NOT output coordinates or sizes — a layout engine positions everything.
+
+Produce a JSON object:
+{
+  "layout": "tree" | "flow" | "array" | "stack" | "queue" | "hashmap" | "graph",
+  "title": "optional short title",
+  "nodes": [{"id": "unique_id", "label": "text", "color": "violet|green|red|yellow"}],
+  "edges": [{"from": "node_id", "to": "node_id", "label": "optional_label"}],
+  "notes": ["optional annotations: variable names, complexity notes"]
+}
+
+Nodes represent data structure elements (graph nodes, array cells, tree nodes, stack frames, queue entries),
+operations, conditions and function blocks. Edges represent graph edges, pointers, data flow and traversal order.
+
+Layout choice:
+- "tree": hierarchical parent→child structure. "flow": control flow / step-by-step operations.
+- "array": cells in a row (list them left to right). "stack": top of stack first. "queue": front first.
+- "hashmap": key nodes each with an edge to their value node. "graph": arbitrary network of nodes.
+
+Rules:
 - Colors: "green" for input/start, "red" for termination/return, "yellow" for conditions/decisions, "violet" for processing/operations.
-- Keep labels concise (under 30 chars).
-- Maximum 12 shapes. Focus on the core algorithmic structure from the pseudocode.
+- Keep labels concise (under 30 chars). Use short ids.
+- Include as many nodes as the structure genuinely needs; do not pad.
+
+Return ONLY valid JSON. No markdown fences, no explanation."""
 
-Visualization strategies per data structure:
-- Graph: show nodes as boxes arranged in a network, arrows as edges. Label with node values.
-- Tree: show hierarchical boxes with parent→child arrows.
-- Array: show boxes in a horizontal row, label with indices or values.
-- Stack/Queue: show boxes stacked vertically (stack) or horizontally (queue).
-- HashMap: show key→value pairs as connected box pairs.
-- Two pointers: show array with arrow annotations for left/right pointers.
 
-Return ONLY valid JSON {"shapes": [...]}. No markdown fences, no explanation."""
+async def _complete(model: str, messages: list) -> str:
+    with span("openai.chat visualize", stage="openai:chat", model=model) as sp:
+        record_payload(sp, "openai", sent=messages_size(messages))
+        response = await get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=800,
+            temperature=0.3,
+            response_format={"type": "json_object"},
+        )
+        content = response.choices[0].message.content or "{}"
+        record_usage(sp, model, response.usage)
+        record_payload(sp, "openai", received=len(content))
+        return content
 
 
 async def pseudocode_to_shapes(pseudocode: str, problem_title: str = "") -> list[dict]:
     if len(pseudocode.strip()) < 10:
         return []
 
+    # Stock patterns (two pointers, BFS, DP tables, ...) are drawn locally without an LLM call
+    local = parse_pseudocode(pseudocode)
+    if local:
+        return local[1][:MAX_SHAPES]
+
     context = pseudocode
     if problem_title:
         context = f"Problem: {problem_title}\n\n{pseudocode}"
 
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": context},
+    ]
+
     try:
-        response = await _get_client().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": context},
-            ],
-            max_tokens=800,
-            temperature=0.3,
-            response_format={"type": "json_object"},
+        raw, _ = await hedged_call(
+            "visualize",
+            primary=lambda: _complete(VISUALIZE_MODEL, messages),
+            hedge=lambda: _complete(VISUALIZE_HEDGE_MODEL, messages),
         )
-        raw = response.choices[0].message.content or "[]"
         parsed = json.loads(raw)
 
+        if isinstance(parsed, dict) and isinstance(parsed.get("nodes"), list):
+            return layout_diagram(parsed)[:MAX_SHAPES]
+
+        # Older-style responses that already carry coordinates
         if isinstance(parsed, dict):
             parsed = parsed.get("shapes", parsed.get("diagram", []))
         if not isinstance(parsed, list):
@@ -85,7 +106,7 @@ async def pseudocode_to_shapes(pseudocode: str, problem_title: str = "") -> list
                 continue
             if s["type"] in ("box", "text", "arrow"):
                 valid.append(s)
-        return valid[:12]
+        return valid[:MAX_SHAPES]
 
     except Exception as e:
         print(f"[Visualizer] Error: {e}")
@@ -1,7 +1,7 @@
 "use client";
 import { useEffect, useState, useRef, useCallback } from "react";
 import { useParams, useRouter } from "next/navigation";
-import { getSession, completeSession } from "@/lib/api";
+import { hydrateSession, completeSession } from "@/lib/api";
 import { useWebSocket } from "@/lib/useWebSocket";
 import { useAudioBuffer } from "@/lib/useAudioBuffer";
 import { useTriggerDetector } from "@/lib/useTriggerDetector";
@@ -17,9 +17,10 @@ const API_BASE = "/api";
 interface ProblemData {
   title?: string;
   description?: string;
+  description_html?: string;
   difficulty?: string;
   constraints?: string[];
-  examples?: { input: string; output: string }[];
+  examples?: ({ input: string; output: string; explanation?: string } | string)[];
   topicTags?: string[];
 }
 
@@ -33,6 +34,7 @@ export default function SessionPage() {
   const [problem, setProblem] = useState<ProblemData | null>(null);
   const [coachResponse, setCoachResponse] = useState<any>(null);
   const [coachPending, setCoachPending] = useState(false);
+  const [serviceMode, setServiceMode] = useState("normal");
 
   const [showRightPanel, setShowRightPanel] = useState(false);
   const [activeTab, setActiveTab] = useState<RightTab>("coach");
@@ -68,7 +70,11 @@ export default function SessionPage() {
 
   useEffect(() => {
     if (!sessionId) return;
-    getSession(sessionId).then((d) => { if (d.problem) setProblem(d.problem); });
+    hydrateSession(sessionId, { analyses_limit: "1", transcript_limit: "1" }).then((d) => {
+      if (d.problem) setProblem(d.problem);
+      const latest = d.analyses?.items?.[0];
+      if (latest) setCoachResponse(latest);
+    });
   }, [sessionId]);
 
   useEffect(() => {
@@ -78,6 +84,8 @@ export default function SessionPage() {
       setCoachPending(false);
       if (lastMessage.analysis?.generated_pseudocode)
         editorRef.current?.setAiPseudocode(lastMessage.analysis.generated_pseudocode);
+    } else if (lastMessage.type === "service_mode") {
+      setServiceMode(lastMessage.mode);
     }
   }, [lastMessage]);
 
@@ -91,6 +99,8 @@ export default function SessionPage() {
     drainAudio: audioBuffer.drain,
     exportWhiteboardPng: async () => whiteboardRef.current?.exportPng() ?? null,
     onCoachResponse: (res) => {
+      setCoachPending(false);
+      if (!res) return;
       setCoachResponse(res);
       setCoachPending(false);
       setActiveTab("coach");
@@ -259,6 +269,9 @@ export default function SessionPage() {
           </div>
 
           <div className="flex items-center gap-1.5 shrink-0">
+            {serviceMode !== "normal" && (
+              <span className="text-2xs text-s2s-text-muted px-1.5" title={`Coach running in ${serviceMode.replace("_", " ")} mode`}>Reduced coaching</span>
+            )}
             <AudioRecorder onChunk={handleAudioChunk} onPause={() => fireCoach("pause")} onStuck={() => fireCoach("stuck")} />
             <div className="h-4 w-px bg-s2s-border mx-0.5" />
             <button onClick={() => fireCoach("reflect")} disabled={coachPending} className="h-7 px-2.5 rounded-md text-xs font-medium bg-s2s-accent/10 text-s2s-accent hover:bg-s2s-accent/20 border border-s2s-accent/15 transition-all disabled:opacity-40">Reflect</button>
@@ -331,7 +344,21 @@ export default function SessionPage() {
                     ))}
                   </div>
                 )}
-                <div className="text-[13px] text-s2s-text-secondary leading-relaxed prose prose-invert prose-sm max-w-none [&_pre]:bg-s2s-surface [&_pre]:rounded [&_pre]:p-2.5 [&_pre]:text-xs [&_code]:text-s2s-accent/80 [&_strong]:text-s2s-text" dangerouslySetInnerHTML={{ __html: problem.description || "" }} />
+                {problem.description_html ? (
+                  <div className="text-[13px] text-s2s-text-secondary leading-relaxed prose prose-invert prose-sm max-w-none [&_pre]:bg-s2s-surface [&_pre]:rounded [&_pre]:p-2.5 [&_pre]:text-xs [&_code]:text-s2s-accent/80 [&_strong]:text-s2s-text" dangerouslySetInnerHTML={{ __html: problem.description_html }} />
+                ) : (
+                  <div className="text-[13px] text-s2s-text-secondary leading-relaxed whitespace-pre-wrap">
+                    {problem.description || ""}
+                    {problem.examples?.map((ex, i) => (
+                      <pre key={i} className="mt-2.5 bg-s2s-surface rounded p-2.5 text-xs whitespace-pre-wrap">{typeof ex === "string" ? ex : `Input: ${ex.input}\nOutput: ${ex.output}${ex.explanation ? `\nExplanation: ${ex.explanation}` : ""}`}</pre>
+                    ))}
+                    {problem.constraints && problem.constraints.length > 0 && (
+                      <ul className="mt-2.5 list-disc pl-4 text-xs">
+                        {problem.constraints.map((c) => <li key={c}>{c}</li>)}
+                      </ul>
+                    )}
+                  </div>
+                )}
               </div>
             </div>
           )}
@@ -2,7 +2,8 @@
 import { useRef, useState, useCallback, useEffect } from "react";
 
 interface Props {
-  onChunk: (blob: Blob) => void;
+  // `speech`: the mic rose above the silence level while this chunk was recorded
+  onChunk: (blob: Blob, speech: boolean) => void;
   onPause: () => void;
   onStuck: () => void;
 }
@@ -12,6 +13,7 @@ export function AudioRecorder({ onChunk, onPause }: Props) {
   const mediaRecRef = useRef<MediaRecorder | null>(null);
   const analyserRef = useRef<AnalyserNode | null>(null);
   const streamRef = useRef<MediaStream | null>(null);
+  const heardRef = useRef(false);
 
   const startRecording = useCallback(async () => {
     try {
@@ -27,7 +29,10 @@ export function AudioRecorder({ onChunk, onPause }: Props) {
 
       const recorder = new MediaRecorder(stream, { mimeType: "audio/webm;codecs=opus" });
       mediaRecRef.current = recorder;
-      recorder.ondataavailable = (e) => { if (e.data.size > 0) onChunk(e.data); };
+      recorder.ondataavailable = (e) => {
+        if (e.data.size > 0) onChunk(e.data, heardRef.current);
+        heardRef.current = false;
+      };
       recorder.start(10_000);
       setRecording(true);
       monitorSilence(analyser);
@@ -54,7 +59,7 @@ export function AudioRecorder({ onChunk, onPause }: Props) {
       if (rms < 0.02) {
         if (!silentSince) silentSince = Date.now();
         else if (Date.now() - silentSince > 3000) { onPause(); silentSince = null; }
-      } else { silentSince = null; }
+      } else { silentSince = null; heardRef.current = true; }
       requestAnimationFrame(check);
     };
     requestAnimationFrame(check);
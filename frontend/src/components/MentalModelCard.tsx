@@ -5,7 +5,7 @@ interface CardData {
   id: string;
   final_pattern: string;
   key_invariants: string[];
-  approach_evolution: { sequence_num: string; pattern: string; confidence: number }[];
+  approach_evolution: { sequence_num: string; pattern: string; confidence: number; count?: number }[];
   unanswered_questions: string[];
   full_transcript: string;
 }
@@ -48,7 +48,7 @@ export function MentalModelCard({ card }: Props) {
                   style={{ height: `${(e.confidence || 0.1) * 80}px` }}
                 />
                 <span className="text-[9px] text-coach-muted truncate max-w-full">
-                  {e.pattern}
+                  {e.pattern}{e.count && e.count > 1 ? ` ×${e.count}` : ""}
                 </span>
               </div>
             ))}
@@ -14,6 +14,28 @@ export async function getSession(sessionId: string) {
   return res.json();
 }
 
+const hydrateCache = new Map<string, { etag: string; body: any }>();
+
+export async function hydrateSession(sessionId: string, params: Record<string, string> = {}) {
+  const url = `${API_BASE}/sessions/${sessionId}/hydrate?${new URLSearchParams(params)}`;
+  const cached = hydrateCache.get(url);
+  const res = await fetch(url, { headers: cached ? { "If-None-Match": cached.etag } : {} });
+  if (res.status === 304 && cached) return cached.body;
+  const body = await res.json();
+  const etag = res.headers.get("ETag");
+  if (etag) hydrateCache.set(url, { etag, body });
+  return body;
+}
+
+export interface CheckpointAck {
+  checkpoint_id: string | null;
+  audio_url: string | null;
+  transcript_delta: string | null;
+  noop: boolean;
+  next_interval_s: number;
+  min_interval_s?: number;
+}
+
 export async function postCheckpoint(data: {
   sessionId: string;
   sequenceNum: number;
@@ -32,7 +54,7 @@ export async function postCheckpoint(data: {
     form.append("audio_blob", data.audioBlob, "chunk.webm");
   }
   const res = await fetch(`${API_BASE}/checkpoints`, { method: "POST", body: form });
-  return res.json();
+  return res.json() as Promise<CheckpointAck>;
 }
 
 export async function triggerCoach(data: {
@@ -55,6 +77,8 @@ export async function triggerCoach(data: {
     method: "POST",
     body: form,
   });
+  // Shed under load (automatic triggers only); the server broadcasts its mode over the WebSocket
+  if (res.status === 503) return null;
   return res.json();
 }
 
@@ -8,6 +8,31 @@ interface CheckpointSources {
   getLabels: () => string;
   getPseudocode: () => string;
   getAudioBlob: () => Blob | null;
+  // Whether a recorder chunk contains speech; chunks count as activity when it returns true (default)
+  isSpeech?: (chunk: Blob) => boolean;
+}
+
+const DEFAULT_INTERVAL_MS = 10_000;
+const DEFAULT_MIN_GAP_MS = 5_000;
+const MIN_INTERVAL_MS = 2_000;
+const MAX_INTERVAL_MS = 120_000;
+const CHANGE_POLL_MS = 1_000;
+
+function clampMs(seconds: number | undefined, fallback: number): number {
+  return seconds ? Math.min(MAX_INTERVAL_MS, Math.max(MIN_INTERVAL_MS, seconds * 1000)) : fallback;
+}
+
+// FNV-1a over the checkpoint content; only used to notice local edits between checkpoints
+function contentHash(...parts: string[]): number {
+  let h = 0x811c9dc5;
+  for (const part of parts) {
+    for (let i = 0; i < part.length; i++) {
+      h ^= part.charCodeAt(i);
+      h = Math.imul(h, 0x01000193);
+    }
+    h = Math.imul(h, 0x01000193); // a NUL between parts
+  }
+  return h >>> 0;
 }
 
 export function useCheckpointEngine(sources: CheckpointSources) {
@@ -16,23 +41,71 @@ export function useCheckpointEngine(sources: CheckpointSources) {
   useEffect(() => {
     if (!sources.sessionId) return;
 
-    const interval = setInterval(async () => {
-      const seq = seqRef.current++;
+    let cancelled = false;
+    let inFlight = false;
+    let timer: ReturnType<typeof setTimeout>;
+    const read = () => ({
+      pseudocode: sources.getPseudocode(),
+      whiteboardJson: sources.getWhiteboardJson(),
+      labels: sources.getLabels(),
+    });
+    const hashOf = (c: ReturnType<typeof read>) => contentHash(c.pseudocode, c.whiteboardJson, c.labels);
+
+    let sentHash = hashOf(read());
+    let sentChunk = sources.getAudioBlob();
+    let sentAt = Date.now();
+    let dueAt = sentAt + DEFAULT_INTERVAL_MS;
+    let minGapMs = DEFAULT_MIN_GAP_MS;
+
+    // The server's `next_interval_s` is only an upper bound for an idle board (backing off when
+    // idle or under load). A local edit, or a new recorder chunk with speech in it, is sent as soon
+    // as `min_interval_s` has passed since the previous checkpoint, so talking or resuming after a
+    // pause never waits out the idle back-off.
+    const send = async (content: ReturnType<typeof read>, hash: number, chunk: Blob | null) => {
+      inFlight = true;
+      sentHash = hash;
+      sentChunk = chunk;
+      sentAt = Date.now();
+      dueAt = sentAt + DEFAULT_INTERVAL_MS;
+      // Taken before sending: if the server stores the checkpoint but the ack is lost, the next
+      // checkpoint must not reuse its sequence number
+      const sequenceNum = seqRef.current++;
       try {
-        await postCheckpoint({
+        const ack = await postCheckpoint({
           sessionId: sources.sessionId!,
-          sequenceNum: seq,
-          pseudocode: sources.getPseudocode(),
-          whiteboardJson: sources.getWhiteboardJson(),
-          labels: sources.getLabels(),
-          audioBlob: sources.getAudioBlob() ?? undefined,
+          sequenceNum,
+          ...content,
+          audioBlob: chunk ?? undefined,
         });
+        // Unchanged content isn't stored, so the sequence number stays free
+        if (ack.noop) seqRef.current = sequenceNum;
+        dueAt = sentAt + clampMs(ack.next_interval_s, DEFAULT_INTERVAL_MS);
+        minGapMs = clampMs(ack.min_interval_s, DEFAULT_MIN_GAP_MS);
       } catch (e) {
         console.error("[Checkpoint]", e);
+      } finally {
+        inFlight = false;
+      }
+    };
+
+    const poll = async () => {
+      if (!inFlight) {
+        const now = Date.now();
+        const content = read();
+        const hash = hashOf(content);
+        const chunk = sources.getAudioBlob();
+        const speaking = chunk !== null && chunk !== sentChunk && (sources.isSpeech?.(chunk) ?? true);
+        const active = (hash !== sentHash || speaking) && now - sentAt >= minGapMs;
+        if (active || now >= dueAt) await send(content, hash, chunk);
       }
-    }, 10_000);
+      if (!cancelled) timer = setTimeout(poll, CHANGE_POLL_MS);
+    };
 
-    return () => clearInterval(interval);
+    timer = setTimeout(poll, CHANGE_POLL_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [sources.sessionId]);
 
   return { sequenceNum: seqRef };
@@ -4,7 +4,9 @@ import { useEffect, useRef, useCallback, useState } from "react";
 export type WSMessage =
   | { type: "transcript_delta"; text: string; timestamp: string }
   | { type: "coach_response"; analysis: any }
-  | { type: "checkpoint_saved"; checkpoint_id: string };
+  | { type: "checkpoint_saved"; checkpoint_id: string }
+  | { type: "pattern_guess"; pattern: string; confidence: number }
+  | { type: "service_mode"; mode: string; level: number };
 
 export function useWebSocket(sessionId: string | null) {
   const wsRef = useRef<WebSocket | null>(null);
@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models import db
+from backend.models.db import Checkpoint, Session, SessionLocal
+from backend.services import analytics
+
+
+@pytest.fixture
+def analytics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_DIR", str(tmp_path))
+    db.init_db()
+    with SessionLocal() as s:
+        session = Session(lc_id="1", problem_json={"title": "Two Sum"})
+        s.add(session)
+        s.flush()
+        s.add(Checkpoint(session_id=session.id, sequence_num=0, transcript_delta="hash map"))
+        s.commit()
+    return tmp_path
+
+
+def test_export_advances_watermark(analytics_dir):
+    with SessionLocal() as s:
+        first = analytics.export(s, settle_s=-60)
+        assert first["checkpoints"] >= 1
+        assert analytics.export(s, settle_s=-60)["checkpoints"] == 0
+
+
+def test_concurrent_export_is_refused(analytics_dir):
+    with analytics.file_lock(analytics._lock_path()):
+        with SessionLocal() as s, pytest.raises(analytics.LockHeld):
+            analytics.export(s, settle_s=-60)
+        r = TestClient(app).post("/analytics/export")
+        assert r.status_code == 409
+        assert "error" in r.json()
+    assert not (analytics_dir / "_state.json").exists()  # the refused runs wrote nothing
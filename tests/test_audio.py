@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("av")
+
+from backend.services import audio  # noqa: E402
+from backend.services.audio import FRAME_MS, SAMPLE_RATE, ChunkDeduper, encode_opus, speech_mask  # noqa: E402
+
+
+def _tone(seconds: float, amplitude: float, freq: float = 220.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _speech_like(seconds: float) -> np.ndarray:
+    """Voiced audio whose loudness swings by ~8 dB, syllable by syllable, with no pauses."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 10 ** ((-4 + 4 * np.sin(2 * np.pi * 3.1 * t)) / 20)
+    return (0.3 * envelope * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+
+
+def _speech_seconds(pcm: np.ndarray) -> float:
+    return speech_mask(pcm).sum() * FRAME_MS / 1000
+
+
+def test_continuous_tone_is_speech():
+    assert _speech_seconds(_tone(10, 0.3)) == pytest.approx(10, abs=0.1)
+
+
+def test_speech_without_pauses_is_kept():
+    assert _speech_seconds(_speech_like(10)) > 8
+
+
+def test_quiet_background_is_silence():
+    rng = np.random.default_rng(0)
+    assert _speech_seconds((0.001 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)) == 0
+
+
+def test_speech_between_pauses_is_trimmed():
+    pcm = np.concatenate([np.zeros(3 * SAMPLE_RATE, np.float32), _speech_like(2), np.zeros(3 * SAMPLE_RATE, np.float32)])
+    assert 1.5 < _speech_seconds(pcm) < 3
+
+
+def test_steady_chunk_survives_preprocessing():
+    out, name = audio._process(encode_opus(_tone(10, 0.3)), "audio_1.webm")
+    assert out is not None and name == "audio_1.ogg"
+
+
+def test_encode_failure_passes_original_through(monkeypatch):
+    original = encode_opus(_tone(2, 0.3))
+
+    def broken(pcm):
+        raise RuntimeError("encoder unavailable")
+
+    monkeypatch.setattr(audio, "encode_opus", broken)
+    assert audio._process(original, "audio_1.webm") == (original, "audio_1.webm")
+
+
+def test_chunk_is_only_a_duplicate_once_remembered():
+    deduper = ChunkDeduper()
+    assert deduper.seen("s1", "abc") == (False, None)
+    # The first attempt failed before storing the chunk: its retry must be processed again
+    assert deduper.seen("s1", "abc") == (False, None)
+    deduper.remember("s1", "abc", "/uploads/s1/audio.ogg")
+    assert deduper.seen("s1", "abc") == (True, "/uploads/s1/audio.ogg")
@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("av")
+
+from backend.services import audio_log  # noqa: E402
+from backend.services.audio import SAMPLE_RATE, decode_pcm, encode_opus  # noqa: E402
+
+SESSION = "s1"
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_log, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _chunk(seconds: float, freq: float = 220.0) -> bytes:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return encode_opus((0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32))
+
+
+def _read(found) -> bytes:
+    path, segments, _ = found
+    data = b""
+    with open(path, "rb") as f:
+        for offset, length in segments:
+            f.seek(offset)
+            data += f.read(length)
+    return data
+
+
+async def _drain():
+    while any(t is not asyncio.current_task() for t in asyncio.all_tasks()):
+        await asyncio.sleep(0.01)
+
+
+def test_multi_chunk_span_is_remuxed_before_compaction():
+    async def run():
+        for seq in (1, 2, 3):
+            await audio_log.append(SESSION, seq, _chunk(1.0), "audio.ogg")
+
+    asyncio.run(run())
+    single = audio_log.locate(SESSION, seq=2)
+    assert single[0] is not None and len(single[1]) == 1
+
+    path, segments, media_type = audio_log.locate(SESSION, start=0.5, end=2.5)
+    assert path is None and media_type == "audio/ogg"
+    data = audio_log.remux(SESSION, 0.5, 2.5)
+    # One playable stream holding all three overlapping chunks, not three concatenated containers
+    assert data.count(b"OpusHead") == 1
+    assert len(decode_pcm(data)) / SAMPLE_RATE == pytest.approx(3.0, abs=0.1)
+
+
+def test_append_during_compaction_is_merged():
+    async def run():
+        for seq in (1, 2):
+            await audio_log.append(SESSION, seq, _chunk(1.0), "audio.ogg")
+        # A checkpoint still in flight when the session completes
+        await asyncio.gather(audio_log.compact(SESSION), audio_log.append(SESSION, 3, _chunk(1.0, 440.0), "audio.ogg"))
+        await _drain()  # the compaction the late append scheduled
+
+    asyncio.run(run())
+    session_dir = os.path.join(audio_log.UPLOAD_DIR, SESSION)
+    assert not os.path.exists(os.path.join(session_dir, audio_log.LOG_NAME))
+    path, segments, _ = audio_log.locate(SESSION)
+    assert path.endswith(audio_log.COMPACT_NAME)
+    assert len(decode_pcm(_read((path, segments, None)))) / SAMPLE_RATE == pytest.approx(3.0, abs=0.1)
+    assert audio_log.locate(SESSION, seq=3) is not None
+
+
+def test_late_chunk_is_served_until_merged():
+    late = _chunk(0.5, 440.0)
+
+    async def run():
+        await audio_log.append(SESSION, 1, _chunk(1.0), "audio.ogg")
+        await audio_log.compact(SESSION)
+        await audio_log.append(SESSION, 2, late, "audio.ogg")
+        # The merge it scheduled hasn't run yet: the chunk is served from the new log
+        assert _read(audio_log.locate(SESSION, seq=2)) == late
+        assert audio_log.locate(SESSION, seq=1)[0].endswith(audio_log.COMPACT_NAME)
+        await _drain()
+
+    asyncio.run(run())
+    path, _, _ = audio_log.locate(SESSION, seq=2)
+    assert path.endswith(audio_log.COMPACT_NAME)
+
+
+def _append_from_worker(upload_dir: str, worker: int, chunk: bytes):
+    audio_log.UPLOAD_DIR = upload_dir
+    for i in range(10):
+        asyncio.run(audio_log.append(SESSION, worker * 100 + i, chunk, "audio.ogg"))
+
+
+def test_appends_from_several_processes_do_not_overlap(upload_dir):
+    chunk = _chunk(0.2)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_append_from_worker, args=(str(upload_dir), w, chunk)) for w in range(3)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    assert all(p.exitcode == 0 for p in workers)
+
+    entries = audio_log.read_index(SESSION)
+    assert len(entries) == 30
+    assert sorted(e["offset"] for e in entries) == [i * len(chunk) for i in range(30)]
+    assert sorted(e["start_s"] for e in entries) == pytest.approx([i * 0.2 for i in range(30)], abs=0.05)
+    for e in entries:
+        assert _read(audio_log.locate(SESSION, seq=e["seq"])) == chunk
+
+
+def test_remux_is_cached_until_the_log_changes(monkeypatch):
+    async def run(seqs):
+        for seq in seqs:
+            await audio_log.append(SESSION, seq, _chunk(1.0), "audio.ogg")
+
+    asyncio.run(run((1, 2)))
+    first = audio_log.remux(SESSION)
+    encodes = []
+    monkeypatch.setattr(audio_log, "encode_opus", lambda pcm: encodes.append(len(pcm)) or b"re-encoded")
+    assert audio_log.remux(SESSION) == first and encodes == []
+
+    asyncio.run(run((3,)))
+    assert audio_log.remux(SESSION) == b"re-encoded" and len(encodes) == 1
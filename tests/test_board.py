@@ -0,0 +1,26 @@
+import json
+
+from backend.services.board import diff_boards, diff_size, summarize_diff
+
+
+def _board(pointer_x: float, extra: dict | None = None) -> str:
+    store = {
+        f"shape:c{i}": {"typeName": "shape", "id": f"shape:c{i}", "type": "geo", "x": 40 * i, "y": 100,
+                        "props": {"geo": "rectangle", "w": 40, "h": 40, "text": str(v)}}
+        for i, v in enumerate([1, 3, 5, 7])
+    }
+    store["shape:i"] = {"typeName": "shape", "id": "shape:i", "type": "text", "x": pointer_x, "y": 150,
+                        "props": {"text": "i", "w": 10, "h": 20}}
+    store.update(extra or {})
+    return json.dumps({"store": store})
+
+
+def test_pointer_moving_to_another_cell_is_a_change():
+    diff = diff_boards(_board(15), _board(95))
+    assert diff_size(diff) == 1
+    assert diff["repointed"] == [{"pointer": "i", "before": [(0, 0)], "after": [(0, 2)]}]
+    assert "Moved pointer 'i': index 0 of array 1 -> index 2 of array 1" in summarize_diff(diff)
+
+
+def test_moves_within_a_cell_are_ignored():
+    assert diff_size(diff_boards(_board(12), _board(18))) == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from backend.core import metrics
+from backend.services import cadence
+from backend.services.cadence import CadenceTracker, content_hash, min_interval
+
+
+@pytest.fixture
+def lag(monkeypatch):
+    def set_lag(seconds: float):
+        monkeypatch.setattr(metrics, "last_event_loop_lag", seconds)
+    set_lag(0.0)
+    return set_lag
+
+
+def test_idle_checkpoints_back_off(lag):
+    tracker = CadenceTracker()
+    digest = content_hash("x", "{}", "[]")
+    intervals = [tracker.observe("s", digest, has_audio=False)[1] for _ in range(5)]
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == cadence.CHECKPOINT_MAX_INTERVAL_S
+
+
+def test_speech_cap_holds_under_load(lag):
+    lag(10 * cadence.CADENCE_LAG_TARGET_S)  # load factor at its maximum
+    tracker = CadenceTracker()
+    digest = content_hash("x", "{}", "[]")
+    tracker.observe("s", digest, has_audio=False)
+    _, idle = tracker.observe("s", digest, has_audio=False)
+    _, speech = tracker.observe("s", digest, has_audio=True)
+
+    assert idle == cadence.CHECKPOINT_MAX_INTERVAL_S
+    assert speech <= cadence.CHECKPOINT_BASE_INTERVAL_S
+
+
+def test_min_interval_stretches_with_load(lag):
+    assert min_interval() == cadence.CHECKPOINT_MIN_INTERVAL_S
+    lag(cadence.CADENCE_LAG_TARGET_S)
+    assert min_interval() == pytest.approx(2 * cadence.CHECKPOINT_MIN_INTERVAL_S)
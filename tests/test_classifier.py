@@ -0,0 +1,22 @@
+from backend.models.db import Analysis, Checkpoint, Session
+from backend.services.classifier import load_training_rows
+
+
+def test_training_rows_only_see_speech_up_to_their_checkpoint(db):
+    session = Session(lc_id="1", full_transcript="use a hash map\nactually two pointers")
+    db.add(session)
+    db.flush()
+    first = Checkpoint(session_id=session.id, sequence_num=0, pseudocode="for x in nums", transcript_delta="use a hash map")
+    second = Checkpoint(session_id=session.id, sequence_num=1, pseudocode="l, r = 0, n - 1",
+                        transcript_delta="actually two pointers")
+    db.add_all([first, second])
+    db.flush()
+    for cp, pattern in ((first, "hash map"), (second, "two pointers")):
+        db.add(Analysis(session_id=session.id, checkpoint_id=cp.id, trigger_type="auto",
+                        inferred_pattern=pattern, confidence=0.9))
+    db.commit()
+
+    docs, targets = load_training_rows(db)
+    by_target = dict(zip(targets, docs))
+    assert "hash map" in by_target["hash map"] and "two pointers" not in by_target["hash map"]
+    assert by_target["two pointers"].endswith("use a hash map\nactually two pointers")
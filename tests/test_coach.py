@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.core.admission import admission, NORMAL, SMALL_MODEL
+from backend.models.db import Analysis, Checkpoint, Session
+from backend.services import coach
+from backend.services.coach import _board_followup
+from backend.services.semantic_cache import SemanticCache
+
+BOARD = json.dumps({"elements": [{"id": "a", "type": "rectangle", "x": 0, "y": 0, "width": 40, "height": 40}]})
+PREVIOUS = {"inferred_pattern": "Two Pointers", "confidence": 0.7}
+
+
+@pytest.fixture
+def session_id(db):
+    session = Session(lc_id="11", problem_json={"title": "Container With Most Water"})
+    db.add(session)
+    db.flush()
+    cp = Checkpoint(session_id=session.id, sequence_num=1, whiteboard_json=BOARD, pseudocode="l, r = 0, n - 1")
+    db.add(cp)
+    db.flush()
+    db.add(Analysis(session_id=session.id, checkpoint_id=cp.id, trigger_type="pause", confidence=0.7,
+                    inferred_pattern="Two Pointers", raw_llm_response=json.dumps(PREVIOUS)))
+    db.commit()
+    return session.id
+
+
+def _latest(db, session_id):
+    return db.query(Checkpoint).filter_by(session_id=session_id).one()
+
+
+def test_unchanged_board_replays_previous_answer_for_same_trigger(db, session_id):
+    mode, payload = _board_followup(db, session_id, _latest(db, session_id), {}, None, "pause")
+    assert mode == "unchanged" and json.loads(payload) == PREVIOUS
+
+
+def test_unchanged_board_with_new_trigger_is_answered_afresh(db, session_id):
+    mode, payload = _board_followup(db, session_id, _latest(db, session_id), {}, None, "hint")
+    assert mode == "followup"
+    assert "hint" in payload
+
+
+ANSWER = {"inferred_approach": {"pattern": "Two Pointers", "confidence": 0.8}, "missing_pieces": []}
+
+
+@pytest.fixture
+def coach_calls(monkeypatch):
+    """Model calls made by run_coach, with the upstreams and side channels stubbed out."""
+    calls = []
+
+    async def analyze(text_context, audio_bytes, png, **kwargs):
+        calls.append({"audio": audio_bytes, **kwargs})
+        return ANSWER, json.dumps(ANSWER)
+
+    async def preprocess(audio):
+        return (audio.read() if audio else None), "audio.ogg"
+
+    monkeypatch.setattr(coach, "_analyze", analyze)
+    monkeypatch.setattr(coach, "preprocess_audio", preprocess)
+    monkeypatch.setattr(coach, "classify_pattern", lambda *args: None)
+    monkeypatch.setattr(coach, "semantic_cache", SemanticCache())
+    monkeypatch.setattr(admission, "level", NORMAL)
+    return calls
+
+
+class _Speech:
+    def read(self):
+        return b"\x01" * 4000
+
+
+@pytest.fixture
+def bare_session(db):
+    """No checkpoints yet, so nothing short-circuits before the semantic cache."""
+    session = Session(lc_id="11", problem_json={"title": "Container With Most Water"})
+    db.add(session)
+    db.commit()
+    return session.id
+
+
+def _run(db, session_id, audio=None):
+    return asyncio.run(coach.run_coach(session_id, "hint", audio, None, False, db))
+
+
+def test_new_speech_bypasses_the_semantic_cache(db, bare_session, coach_calls):
+    _run(db, bare_session)
+    _run(db, bare_session)
+    assert len(coach_calls) == 1  # the second, identical request was a cache hit
+
+    _run(db, bare_session, audio=_Speech())
+    assert len(coach_calls) == 2 and coach_calls[-1]["audio"]
+
+
+def test_small_model_answers_are_not_cached(db, bare_session, coach_calls, monkeypatch):
+    monkeypatch.setattr(admission, "level", SMALL_MODEL)
+    _run(db, bare_session)
+    monkeypatch.setattr(admission, "level", NORMAL)
+    _run(db, bare_session)
+    assert [call.get("model") for call in coach_calls] == [coach.COACH_HEDGE_MODEL, None]
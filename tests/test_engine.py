@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from backend.models import db
+from backend.models.db import engine_options, normalize_url
+
+PG_URL = "postgresql+psycopg://user@db.example/sketch2solve"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgres://u:p@h/db", "postgresql+psycopg://u:p@h/db"),
+    ("postgresql://u:p@h/db", "postgresql+psycopg://u:p@h/db"),
+    ("postgresql+psycopg://u:p@h/db", "postgresql+psycopg://u:p@h/db"),
+    ("sqlite:///./sketch2solve.db", "sqlite:///./sketch2solve.db"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_postgres_pool_settings():
+    engine = create_engine(PG_URL, **engine_options(PG_URL))  # no connection is made
+    pool = engine.pool
+    assert isinstance(pool, QueuePool)
+    assert pool.size() == db.DB_POOL_SIZE
+    assert pool._max_overflow == db.DB_MAX_OVERFLOW
+    assert pool._timeout == db.DB_POOL_TIMEOUT_S
+    assert pool._recycle == db.DB_POOL_RECYCLE_S
+    assert pool._pre_ping is True
+    connect_args = engine_options(PG_URL)["connect_args"]
+    assert connect_args["prepare_threshold"] == int(db.DB_PREPARE_THRESHOLD)
+    assert connect_args["application_name"] == "sketch2solve"
+
+
+def test_prepare_threshold_none_disables_prepared_statements(monkeypatch):
+    monkeypatch.setattr(db, "DB_PREPARE_THRESHOLD", "none")
+    assert engine_options(PG_URL)["connect_args"]["prepare_threshold"] is None
+
+
+def test_sqlite_options():
+    options = engine_options("sqlite:///./x.db")
+    assert options == {"connect_args": {"check_same_thread": False}}
+
+
+def test_app_engine_uses_wal_on_sqlite():
+    if db.engine.dialect.name != "sqlite":
+        pytest.skip("DATABASE_URL is not SQLite")
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+@pytest.mark.parametrize("db_engine", ["postgresql"], indirect=True)
+def test_postgres_pool_live(db_engine):
+    with db_engine.connect() as conn:
+        assert conn.execute(text("SHOW application_name")).scalar() == "sketch2solve"
+        assert conn.connection.dbapi_connection.prepare_threshold == int(db.DB_PREPARE_THRESHOLD)
+
+    # The pool hands out pool_size connections, then overflow ones, and keeps only pool_size
+    held = [db_engine.connect() for _ in range(db.DB_POOL_SIZE + 2)]
+    try:
+        assert db_engine.pool.checkedout() == db.DB_POOL_SIZE + 2
+        assert db_engine.pool.overflow() == 2
+    finally:
+        for conn in held:
+            conn.close()
+    assert db_engine.pool.checkedin() == db.DB_POOL_SIZE
+
+    # Concurrent sessions share the pool without exceeding it
+    errors = []
+
+    def worker():
+        try:
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT pg_sleep(0.05)"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(db.DB_POOL_SIZE + db.DB_MAX_OVERFLOW)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend.models.db import Analysis, MentalModelCard, Session
+from backend.services import mental_model
+from backend.services.mental_model import update_card
+
+
+@pytest.fixture
+def session_id(db):
+    session = Session(lc_id="1", problem_json={"title": "Two Sum"})
+    db.add(session)
+    db.commit()
+    return session.id
+
+
+def _analysis(db, session_id: str, pattern: str) -> Analysis:
+    analysis = Analysis(session_id=session_id, trigger_type="pause", inferred_pattern=pattern, confidence=0.6)
+    db.add(analysis)
+    db.commit()
+    return analysis
+
+
+def _steps(db, session_id: str) -> int:
+    db.expire_all()
+    card = db.query(MentalModelCard).filter_by(session_id=session_id).one()
+    return sum(step["count"] for step in card.approach_evolution)
+
+
+def test_stale_card_write_is_rejected(db, db_engine, session_id):
+    update_card(db, session_id, _analysis(db, session_id, "Hash Map"))
+    factory = sessionmaker(bind=db_engine, autoflush=False)
+    with factory() as reader:
+        stale = reader.query(MentalModelCard).filter_by(session_id=session_id).one()
+        update_card(db, session_id, _analysis(db, session_id, "Hash Map"))
+        stale.final_pattern = "Brute Force"
+        with pytest.raises(StaleDataError):
+            reader.commit()
+    assert _steps(db, session_id) == 2
+
+
+def test_lost_race_is_reapplied(db, db_engine, session_id, monkeypatch):
+    if db_engine.dialect.name == "postgresql":
+        pytest.skip("the row lock keeps concurrent runs from interleaving; see test_concurrent_updates_all_fold")
+    update_card(db, session_id, _analysis(db, session_id, "Hash Map"))
+    factory = sessionmaker(bind=db_engine, autoflush=False)
+    apply, raced = mental_model._apply, []
+
+    def racing_apply(card, analysis):
+        if not raced:
+            raced.append(True)
+            # Another coach run commits between this run's read and its commit
+            with factory() as other:
+                update_card(other, session_id, other.get(Analysis, concurrent.id))
+        apply(card, analysis)
+
+    concurrent = _analysis(db, session_id, "Two Pointers")
+    monkeypatch.setattr(mental_model, "_apply", racing_apply)
+    assert update_card(db, session_id, _analysis(db, session_id, "Two Pointers")) is not None
+    assert _steps(db, session_id) == 3
+
+
+def test_concurrent_updates_all_fold(db, db_engine, session_id):
+    if db_engine.dialect.name != "postgresql":
+        pytest.skip("SQLite serialises writers; the race is covered by test_lost_race_is_reapplied")
+    factory = sessionmaker(bind=db_engine, autoflush=False)
+    ids = [_analysis(db, session_id, "Hash Map").id for _ in range(8)]
+    errors = []
+
+    def run(analysis_id):
+        try:
+            with factory() as own:
+                assert update_card(own, session_id, own.get(Analysis, analysis_id)) is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert _steps(db, session_id) == len(ids)
+
+
+def test_completed_session_card_is_final(db, session_id):
+    update_card(db, session_id, _analysis(db, session_id, "Hash Map"))
+    db.get(Session, session_id).status = "completed"
+    db.commit()
+
+    assert update_card(db, session_id, _analysis(db, session_id, "Brute Force")) is None
+    db.expire_all()
+    assert db.query(MentalModelCard).filter_by(session_id=session_id).one().final_pattern == "Hash Map"
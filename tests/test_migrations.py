@@ -0,0 +1,104 @@
+import ast
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, select, text
+
+from backend.models import db
+from backend.models.db import Base, alembic_config
+
+TABLES = {"sessions", "checkpoints", "analyses", "mental_model_cards"}
+PROBLEM_HTML = (
+    "<p>Given an array of integers <code>nums</code>, return indices of the two numbers.</p>\n"
+    "<p><strong>Example 1:</strong></p>\n"
+    "<pre><strong>Input:</strong> nums = [2,7,11,15], target = 9\n<strong>Output:</strong> [0,1]</pre>\n"
+    "<p><strong>Constraints:</strong></p>\n<ul><li><code>2 &lt;= nums.length &lt;= 10<sup>4</sup></code></li></ul>"
+)
+
+
+def _revisions() -> list:
+    """Base to head."""
+    return list(reversed(list(ScriptDirectory.from_config(alembic_config()).walk_revisions())))
+
+
+def _current(engine) -> str | None:
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def test_upgrade_to_head_matches_models(db_engine, migrate):
+    migrate("upgrade", "head")
+
+    assert _current(db_engine) == _revisions()[-1].revision
+    inspector = inspect(db_engine)
+    assert TABLES <= set(inspector.get_table_names())
+    assert "archived_at" in {c["name"] for c in inspector.get_columns("sessions")}
+    assert "ix_checkpoints_session_seq" in {i["name"] for i in inspector.get_indexes("checkpoints")}
+    assert "ix_analyses_session_created" in {i["name"] for i in inspector.get_indexes("analyses")}
+    with db_engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def test_each_revision_upgrades_and_downgrades(db_engine, migrate):
+    revisions = _revisions()
+    for rev in revisions:
+        migrate("upgrade", rev.revision)
+        assert _current(db_engine) == rev.revision
+    for rev in reversed(revisions):
+        migrate("downgrade", rev.down_revision or "base")
+        assert _current(db_engine) == rev.down_revision
+
+    assert not TABLES & set(inspect(db_engine).get_table_names())
+    migrate("upgrade", "head")
+    assert _current(db_engine) == revisions[-1].revision
+
+
+def test_preprocess_problems_migration_round_trip(db_engine, migrate):
+    migrate("upgrade", "0002")
+    problem = {"title": "Two Sum", "difficulty": "Easy", "description": PROBLEM_HTML}
+    sessions = Base.metadata.tables["sessions"]
+    with db_engine.begin() as conn:
+        conn.execute(sessions.insert().values(id="s1", problem_json=problem))
+        conn.execute(sessions.insert().values(id="s2", problem_json=None))
+
+    migrate("upgrade", "0003")
+    with db_engine.connect() as conn:
+        converted = conn.execute(select(sessions.c.problem_json).where(sessions.c.id == "s1")).scalar_one()
+    assert converted["description_html"] == PROBLEM_HTML
+    assert "<p>" not in converted["description"]
+    assert converted["examples"] == [{"input": "nums = [2,7,11,15], target = 9", "output": "[0,1]"}]
+    assert converted["constraints"] == ["2 <= nums.length <= 10^4"]
+
+    migrate("downgrade", "0002")
+    with db_engine.connect() as conn:
+        rows = dict(conn.execute(select(sessions.c.id, sessions.c.problem_json)).all())
+    assert rows["s1"]["description"] == PROBLEM_HTML
+    assert "description_html" not in rows["s1"]
+    assert rows["s2"] is None
+
+
+def test_revisions_do_not_import_application_code():
+    # A revision replays the schema and data as they were; live code changes under it
+    for script in _revisions():
+        with open(script.path) as f:
+            tree = ast.parse(f.read())
+        imported = [node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)]
+        imported += [alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names]
+        assert not [m for m in imported if m and m.split(".")[0] == "backend"], script.revision
+
+
+def test_init_db_stamps_pre_migration_schema(db_engine, migrate, monkeypatch):
+    # A database created by the old create_all(): baseline tables, no alembic_version
+    migrate("upgrade", "0001")
+    with db_engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text("INSERT INTO sessions (id, status) VALUES ('legacy', 'active')"))
+
+    monkeypatch.setattr(db, "engine", db_engine)
+    monkeypatch.setattr(db, "DB_AUTO_MIGRATE", True)
+    db.init_db()
+
+    assert _current(db_engine) == _revisions()[-1].revision
+    with db_engine.connect() as conn:
+        assert conn.execute(text("SELECT archived_at FROM sessions WHERE id = 'legacy'")).one() == (None,)
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from backend.models.db import Session, Checkpoint, Analysis, MentalModelCard
+
+PROBLEM = {
+    "title": "Two Sum",
+    "difficulty": "Hard",
+    "tags": ["Array", "Hash Table"],
+    "examples": [{"input": "nums = [2,7,11,15], target = 9", "output": "[0,1]"}],
+    "stats": {"acceptance": 0.5312, "submissions": 2**53 - 1, "premium": False, "similar": None},
+    "notes": "naïve O(n²) → hash map ✓",
+    "empty": {"list": [], "dict": {}},
+}
+
+
+def _count(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def test_session_checkpoint_analysis_crud(db):
+    session = Session(lc_id="1", problem_json=PROBLEM)
+    db.add(session)
+    db.flush()
+    for seq in (3, 1, 2):
+        db.add(Checkpoint(session_id=session.id, sequence_num=seq, pseudocode=f"step {seq}", labels=[{"id": seq}]))
+    db.flush()
+    first = db.scalars(select(Checkpoint).where(Checkpoint.sequence_num == 1)).one()
+    db.add(Analysis(session_id=session.id, checkpoint_id=first.id, trigger_type="hint",
+                    inferred_pattern="Hash Map", confidence=0.8, missing_pieces=["complement lookup"]))
+    db.add(MentalModelCard(session_id=session.id, final_pattern="Hash Map", key_invariants=["seen holds nums[:i]"]))
+    db.commit()
+    session_id = session.id
+    db.expunge_all()
+
+    loaded = db.get(Session, session_id)
+    assert loaded.status == "active" and loaded.full_transcript == "" and loaded.archived_at is None
+    assert [cp.sequence_num for cp in loaded.checkpoints] == [1, 2, 3]
+    assert loaded.analyses[0].checkpoint_id == loaded.checkpoints[0].id
+    assert loaded.mental_model_card.key_invariants == ["seen holds nums[:i]"]
+
+    created = loaded.updated_at
+    loaded.status = "completed"
+    loaded.analyses[0].micro_hint = "What have you already seen?"
+    db.commit()
+    db.expunge_all()
+    loaded = db.get(Session, session_id)
+    assert loaded.status == "completed" and loaded.updated_at >= created
+    assert loaded.analyses[0].micro_hint == "What have you already seen?"
+
+    for model in (Analysis, MentalModelCard, Checkpoint):
+        for row in db.scalars(select(model).where(model.session_id == session_id)):
+            db.delete(row)
+    db.delete(loaded)
+    db.commit()
+    assert all(_count(db, model) == 0 for model in (Session, Checkpoint, Analysis, MentalModelCard))
+
+
+def test_json_columns_round_trip(db):
+    session = Session(lc_id="1", problem_json=PROBLEM)
+    db.add(session)
+    db.flush()
+    db.add(Checkpoint(session_id=session.id, sequence_num=1, labels=[{"id": "n1", "label": "left ≤ right"}, None, 1.5]))
+    db.add(Analysis(session_id=session.id, trigger_type="stuck", missing_pieces=[], questions=[{"nested": [[1], [2]]}]))
+    db.commit()
+    session_id = session.id
+    db.expunge_all()
+
+    loaded = db.get(Session, session_id)
+    assert loaded.problem_json == PROBLEM
+    assert loaded.checkpoints[0].labels == [{"id": "n1", "label": "left ≤ right"}, None, 1.5]
+    assert loaded.analyses[0].missing_pieces == []
+    assert loaded.analyses[0].questions == [{"nested": [[1], [2]]}]
+
+    # JSON columns are not mutation-tracked: the app replaces the value, which must persist
+    loaded.problem_json = {**PROBLEM, "difficulty": "Easy"}
+    db.commit()
+    db.expunge_all()
+    assert db.get(Session, session_id).problem_json["difficulty"] == "Easy"
+
+
+def test_json_columns_are_jsonb_on_postgres(db, db_engine):
+    if db_engine.dialect.name != "postgresql":
+        pytest.skip("JSONB is PostgreSQL-only")
+    columns = {c["name"]: c["type"] for c in inspect(db_engine).get_columns("sessions")}
+    assert isinstance(columns["problem_json"], JSONB)
+
+    db.add(Session(id="hard", problem_json=PROBLEM))
+    db.add(Session(id="easy", problem_json={**PROBLEM, "difficulty": "Easy"}))
+    db.commit()
+    # Containment and key access run server-side on the binary representation
+    rows = db.execute(text(
+        "SELECT id, problem_json->'stats'->>'submissions' FROM sessions WHERE problem_json @> '{\"difficulty\": \"Hard\"}'"
+    )).all()
+    assert rows == [("hard", str(2**53 - 1))]
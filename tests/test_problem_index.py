@@ -0,0 +1,48 @@
+import pytest
+
+from backend.services import problem_index
+from backend.services.problem_index import ProblemIndex
+
+CATALOG = [
+    {"id": 1, "title": "Two Sum", "slug": "two-sum", "difficulty": "Easy", "tags": ["Array"], "paid_only": False},
+    {"id": 3000, "title": "Maximum Area of Longest Diagonal Rectangle", "slug": "maximum-area-of-longest-diagonal-rectangle",
+     "difficulty": "Easy", "tags": ["Array"], "paid_only": False},
+]
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "problem_index.json.gz")
+    monkeypatch.setattr(problem_index, "INDEX_PATH", path)
+    monkeypatch.setattr(problem_index, "_index", None)
+    monkeypatch.setattr(problem_index, "local_catalog", lambda: CATALOG[:1])
+    return path
+
+
+def test_missing_file_falls_back_to_incomplete_local_index(index_path):
+    index = problem_index.load_index()
+    assert not index.complete and len(index) == 1
+
+
+def test_ensure_catalog_builds_and_persists_full_index(index_path, monkeypatch):
+    monkeypatch.setattr(problem_index, "fetch_catalog", lambda: CATALOG)
+    assert problem_index.ensure_catalog()
+    assert problem_index.load_index().complete
+    assert problem_index.load_index().search("diagonal")[0]["id"] == 3000
+
+    loaded = ProblemIndex.from_file(index_path)
+    assert loaded.complete and len(loaded) == 2
+
+
+def test_failed_fetch_keeps_partial_index(index_path, monkeypatch):
+    def offline():
+        raise OSError("no network")
+
+    monkeypatch.setattr(problem_index, "fetch_catalog", offline)
+    assert not problem_index.ensure_catalog()
+    assert not problem_index.load_index().complete
+
+
+def test_offline_build_is_marked_incomplete(index_path):
+    ProblemIndex(CATALOG, complete=False).to_file(index_path)
+    assert not problem_index.load_index().complete
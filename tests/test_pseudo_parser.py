@@ -0,0 +1,21 @@
+import pytest
+
+from backend.services.pseudo_parser import parse_pseudocode
+
+
+@pytest.mark.parametrize("code", [
+    "dp = [0] * (n + 1)\ndp[0] = 1\nfor i in range(1, n + 1):\n    dp[i] = dp[i-1] + dp[i-2]\nreturn dp[n]",
+    "ways = [1] * n\nfor i in range(2, n):\n    ways[i] = ways[i - 1] + ways[i - 2]\nreturn ways[n-1]",
+    "for i in range(1, m):\n    for j in range(1, n):\n        grid[i][j] += min(grid[i-1][j], grid[i][j-1])\nreturn grid[m-1][n-1]",
+])
+def test_dp_tables_and_recurrences(code):
+    assert parse_pseudocode(code)[0] == "dp"
+
+
+@pytest.mark.parametrize("code", [
+    "table = {}\nfor x in nums:\n    if target - x in table:\n        return True\n    table[x] = True",
+    "table = {}\nfor w in words:\n    table[w] = table.get(w, 0) + 1\nreturn table",
+])
+def test_hash_table_is_not_dp(code):
+    result = parse_pseudocode(code)
+    assert result is None or result[0] != "dp"
@@ -0,0 +1,28 @@
+from backend.services.semantic_cache import SemanticCache, embed
+
+CONTEXT = "two pointers: left = 0, right = n - 1; while left < right: move the smaller side"
+
+
+def test_entries_are_partitioned_by_trigger_type():
+    cache = SemanticCache()
+    vector = embed(CONTEXT)
+    cache.add("11", "hint", vector, None, "a-hint")
+
+    assert cache.lookup("11", "hint", vector, None) == "a-hint"
+    # Same problem and board, different trigger: answered afresh, then cached separately
+    assert cache.lookup("11", "stuck", vector, None) is None
+    cache.add("11", "stuck", vector, None, "a-stuck")
+    assert cache.lookup("11", "stuck", vector, None) == "a-stuck"
+    assert cache.lookup("11", "hint", vector, None) == "a-hint"
+    assert cache.lookup("42", "hint", vector, None) is None
+
+    snapshot = cache.snapshot()
+    assert snapshot["entries"] == 2 and snapshot["problems"] == 1
+
+
+def test_invalidate_spans_trigger_partitions():
+    cache = SemanticCache()
+    vector = embed(CONTEXT)
+    cache.add("11", "hint", vector, None, "a-hint")
+    cache.invalidate("a-hint")
+    assert cache.lookup("11", "hint", vector, None) is None
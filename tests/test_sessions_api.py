@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models import db
+from backend.models.db import Session, SessionLocal
+
+
+@pytest.fixture(scope="module")
+def client():
+    db.init_db()
+    return TestClient(app)  # no lifespan: no warm-up or background monitors
+
+
+@pytest.fixture
+def session_id():
+    with SessionLocal() as s:
+        session = Session(lc_id="1", problem_json={"title": "Two Sum"})
+        s.add(session)
+        s.commit()
+        return session.id
+
+
+@pytest.mark.parametrize("path", ["/sessions/nope", "/sessions/nope/hydrate", "/sessions/nope/card", "/sessions/nope/audio"])
+def test_unknown_session_is_404(client, path):
+    r = client.get(path)
+    assert r.status_code == 404
+    assert "error" in r.json()
+
+
+def test_failed_restore_is_503(client, session_id):
+    with SessionLocal() as s:
+        s.get(Session, session_id).archived_at = datetime(2026, 1, 1)  # archived, but the bundle is missing
+        s.commit()
+    for path in (f"/sessions/{session_id}", f"/sessions/{session_id}/hydrate", f"/sessions/{session_id}/card"):
+        r = client.get(path)
+        assert r.status_code == 503
+        assert r.headers["retry-after"]
+
+
+def test_hydrate_if_none_match_compares_entity_tags(client, session_id):
+    url = f"/sessions/{session_id}/hydrate"
+    etag = client.get(url).headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        assert client.get(url, headers={"If-None-Match": header}).status_code == 304, header
+    # The tag merely appearing inside the header is not a match
+    for header in (f'"x{etag}"', f'"{etag[1:-1]}-gzip"', '"other"'):
+        assert client.get(url, headers={"If-None-Match": header}).status_code == 200, header
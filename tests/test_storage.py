@@ -0,0 +1,60 @@
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import threading
+
+import pytest
+
+from backend.services import storage
+from backend.services.storage import Blob, save_blob, save_file
+
+DATA = os.urandom(3 * storage.UPLOAD_CHUNK_BYTES + 17)
+
+
+class _SpoolFile(io.BytesIO):
+    """Records the threads that read it."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.readers: set[int] = set()
+
+    def read(self, *args):
+        self.readers.add(threading.get_ident())
+        return super().read(*args)
+
+    def readinto(self, b):
+        self.readers.add(threading.get_ident())
+        return super().readinto(b)
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _blob() -> Blob:
+    return Blob(_SpoolFile(DATA), len(DATA), hashlib.sha256(DATA).hexdigest())
+
+
+def test_save_blob_copies_off_the_event_loop(upload_dir):
+    blob = _blob()
+    url = asyncio.run(save_blob("s1", "snap.png", blob))
+
+    assert url == f"/uploads/s1/snap.{blob.sha256[:16]}.png"
+    assert (upload_dir / "s1" / os.path.basename(url)).read_bytes() == DATA
+    assert blob.file.readers and threading.get_ident() not in blob.file.readers
+
+
+def test_save_file_is_content_addressed(upload_dir):
+    url = asyncio.run(save_file("s1", "audio.ogg", DATA))
+    assert storage.CONTENT_HASH_RE.search(url).group(1) == hashlib.sha256(DATA).hexdigest()[:16]
+    assert (upload_dir / "s1" / os.path.basename(url)).read_bytes() == DATA
+
+
+def test_data_url_encodes_in_chunks():
+    url = _blob().data_url("image/png")
+    prefix = "data:image/png;base64,"
+    assert url.startswith(prefix) and base64.b64decode(url[len(prefix):]) == DATA
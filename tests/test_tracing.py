@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+
+def _route_labels(client) -> set[str]:
+    body = client.get("/metrics").text
+    return {line.split('stage="', 1)[1].split('"', 1)[0] for line in body.splitlines() if 'stage="route:' in line}
+
+
+def test_unmatched_requests_share_one_route_label():
+    client = TestClient(app)  # no lifespan: the middleware is all that's under test
+    client.get("/definitely/unknown/123")
+    client.get("/another/unknown/path")
+    client.request("PURGE", "/health")
+    client.get("/health")
+
+    labels = _route_labels(client)
+    assert "route:unmatched" in labels
+    assert "route:GET /health" in labels
+    assert not any("unknown" in label or "PURGE" in label for label in labels)